@@ -0,0 +1,390 @@
+"""Benchmarks for the matching and highlighting pipeline.
+
+Every case runs headless over generated text and reports its throughput. The
+results can be saved as a JSON baseline and later runs are compared against it,
+failing (exit code 1) when a case got slower than the allowed threshold.
+
+    python benchmarks/bench.py                 # compare against the baseline
+    python benchmarks/bench.py --save          # record a new baseline
+    python benchmarks/bench.py -k highlight    # only run cases named *highlight*
+
+Timings depend on the machine, so record a baseline before comparing on a new
+one. Scaling checks don't need a baseline: they time an expression on a text
+and on one 4 times as long, and fail if the time grew much more than that.
+"""
+
+import argparse
+import json
+import platform
+import random
+import string
+import sys
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+
+from regex_playground.expression.regex_input import ValidRegex
+from regex_playground.line_index import LineIndex
+from regex_playground.matcher import MatchWorker, find_spans, match_job, substitute
+from regex_playground.patterns import PATTERN_CACHE
+from regex_playground.spans import LocationStore
+from regex_playground.substitution.substitution_input import ValidSubstitutionRegex
+from regex_playground.text_inputs import TextInput
+
+BASELINE = Path(__file__).with_name("baseline.json")
+DEFAULT_THRESHOLD = 0.25  # allowed fractional drop in throughput
+MIN_TIME = 0.5  # seconds, fast cases are repeated at least this long
+VIEWPORT_ROWS = 50  # rows filled per highlight refresh (about a screen)
+
+PATTERNS = {
+    "dense": r"\w+",
+    "sparse": r"status=500",
+    "multiline": r"(?s)BEGIN.*?END",
+}
+SUBSTITUTION = r"<\g<0>>"
+# expressions that backtrack catastrophically with `re` (and the repeated text
+# they're matched against), the linear-time automaton must keep them linear
+SCALING = {
+    "nested-alternation": (r"(?:(?:a+)+b|a)", "a"),
+    "nested-repeat": (r"(a+)+$", "a"),
+}
+SCALING_SIZES = (2_000, 8_000)  # characters
+MAX_GROWTH = 6.0  # allowed time growth for 4x the text (linear is 4, quadratic 16)
+TYPED_REGEX = r"(?P<date>\d{4}-\d{2}-\d{2}) (?P<level>[A-Z]+) .*?status=(\d{3})"
+TYPED_SUBSTITUTION = r"\g<level> on \g<date> (\3)"
+
+
+def short_lines(size: int) -> str:
+    """Generate log-like text made of many short lines.
+
+    Args:
+        size: Approximate length in characters.
+
+    Returns:
+        Generated text.
+    """
+    rng = random.Random(1)
+    lines = []
+    length = 0
+    while length < size:
+        status = rng.choice((200, 200, 200, 302, 404, 500))
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        line = f"2024-01-01 12:{rng.randint(0, 59):02} INFO {word} status={status}"
+        if rng.random() < 0.01:
+            line += " BEGIN"
+        elif rng.random() < 0.01:
+            line += " END"
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def huge_line(size: int) -> str:
+    """Generate text made of a single huge line.
+
+    Args:
+        size: Approximate length in characters.
+
+    Returns:
+        Generated text.
+    """
+    return short_lines(size).replace("\n", " ")
+
+
+CORPORA: dict[str, Callable[[int], str]] = {
+    "short-lines": short_lines,
+    "huge-line": huge_line,
+}
+
+
+@dataclass
+class Case:
+    """A benchmark case."""
+
+    name: str
+    func: Callable[[], object]  # does the work once
+    work: float  # amount of work done by one call of `func`
+    unit: str  # unit of `work`
+    setup: Callable[[], object] | None = None  # called (untimed) before `func`
+
+
+@dataclass
+class Result:
+    """Timing of a benchmark case."""
+
+    name: str
+    seconds: float  # best time of the repeats
+    throughput: float  # work units per second
+    unit: str
+
+    def format(self) -> str:
+        """Format the result for display."""
+        return (
+            f"{self.name:<36} {self.seconds * 1000:>10.2f} ms"
+            f" {self.throughput:>14,.0f} {self.unit}/s"
+        )
+
+
+def measure(case: Case, repeat: int) -> Result:
+    """Time a benchmark case.
+
+    Args:
+        case: Case to time.
+        repeat: Minimum number of timed calls (the best one counts). Fast
+            cases are called until they've run for `MIN_TIME`.
+
+    Returns:
+        The timing.
+    """
+    best = float("inf")
+    total = 0.0
+    runs = 0
+    while runs < repeat or total < MIN_TIME:
+        if case.setup is not None:
+            case.setup()
+        start = time.perf_counter()
+        case.func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        runs += 1
+    return Result(case.name, best, case.work / best, case.unit)
+
+
+def highlight_rows(widget: TextInput, rows: int) -> None:
+    """Fill highlights for a screen of rows at the top, middle and bottom."""
+    line_count = widget.document.line_count
+    for top in (0, line_count // 2, max(line_count - rows, 0)):
+        for row in range(top, min(top + rows, line_count)):
+            widget._highlights[row]
+
+
+def cases(scale: float, worker: MatchWorker) -> Iterator[Case]:
+    """Generate the benchmark cases.
+
+    Each case is timed before the next one is generated.
+
+    Args:
+        scale: Multiplier for the size of the generated text.
+        worker: Worker process to time matching jobs in.
+
+    Yields:
+        Benchmark cases.
+    """
+    size = int(4_000_000 * scale)
+    runs = 0
+
+    def run_worker(text: str, regex: str) -> None:
+        # alternate a trailing newline so the text is sent and scanned every run
+        nonlocal runs
+        runs += 1
+        worker.run(match_job, text + "\n" * (runs % 2), regex, name="bench")
+
+    for corpus, generate in CORPORA.items():
+        text = generate(size)
+        line_index = LineIndex(text)
+        widget = TextInput(text)
+        yield Case(f"line-index/{corpus}", lambda: LineIndex(text), size, "B")
+
+        for kind, regex in PATTERNS.items():
+            prefix = f"{corpus}/{kind}"
+            spans = find_spans(text, regex)
+            yield Case(f"find/{prefix}", lambda: find_spans(text, regex), size, "B")
+            yield Case(f"worker/{prefix}", lambda: run_worker(text, regex), size, "B")
+            yield Case(
+                f"faux-nodes/{prefix}",
+                lambda: LocationStore.from_spans(spans, line_index),
+                max(len(spans), 1),
+                "match",
+            )
+            yield Case(
+                f"highlight/{prefix}",
+                lambda: (
+                    widget.apply_highlighting(spans, True),
+                    highlight_rows(widget, VIEWPORT_ROWS),
+                ),
+                3 * VIEWPORT_ROWS,
+                "row",
+            )
+            yield Case(
+                f"substitute/{prefix}",
+                lambda: substitute(text, regex, SUBSTITUTION),
+                size,
+                "B",
+            )
+
+    # validation runs on every keystroke, so time an expression being typed
+    prefixes = [TYPED_REGEX[:end] for end in range(1, len(TYPED_REGEX) + 1)]
+    validator = ValidRegex()
+    yield Case(
+        "validate/regex",
+        lambda: [validator.validate(prefix) for prefix in prefixes],
+        len(prefixes),
+        "key",
+        setup=PATTERN_CACHE.clear,
+    )
+    substitutions = [
+        TYPED_SUBSTITUTION[:end] for end in range(1, len(TYPED_SUBSTITUTION) + 1)
+    ]
+    sub_validator = ValidSubstitutionRegex(SimpleNamespace(regex=TYPED_REGEX))
+    yield Case(
+        "validate/substitution",
+        lambda: [sub_validator.validate(sub) for sub in substitutions],
+        len(substitutions),
+        "key",
+        setup=PATTERN_CACHE.clear,
+    )
+
+
+def check_scaling(repeat: int, keyword: str = "") -> list[str]:
+    """Check that matching stays linear on catastrophic backtracking inputs.
+
+    Args:
+        repeat: Minimum number of timed runs of each size (the best counts).
+        keyword: Only check the expressions whose case name contains it.
+
+    Returns:
+        A description of each expression that grew faster than linear.
+    """
+    failures = []
+    small, large = SCALING_SIZES
+    for kind, (regex, unit) in SCALING.items():
+        name = f"scaling/{kind}"
+        if keyword not in name:
+            continue
+        seconds = [
+            measure(
+                Case(name, lambda: find_spans(unit * size, regex), size, "B"), repeat
+            ).seconds
+            for size in (small, large)
+        ]
+        growth = seconds[1] / seconds[0]
+        print(
+            f"{name:<36} {seconds[0] * 1000:>10.2f} ms"
+            f" {seconds[1] * 1000:>10.2f} ms {growth:>6.1f}x"
+            f" for {large // small}x the text",
+            flush=True,
+        )
+        if growth > MAX_GROWTH:
+            failures.append(f"{name}: {growth:.1f}x the time for {large // small}x")
+    return failures
+
+
+def compare(
+    results: list[Result], baseline: dict[str, dict[str, float]], threshold: float
+) -> list[str]:
+    """Find the cases that regressed compared to a baseline.
+
+    Args:
+        results: Current timings.
+        baseline: Baseline results by case name.
+        threshold: Allowed fractional drop in throughput.
+
+    Returns:
+        A description of each regression.
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        change = result.throughput / base["throughput"] - 1
+        if change < -threshold:
+            regressions.append(f"{result.name}: {change:+.0%} throughput")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE,
+        help="baseline file (default: benchmarks/baseline.json)",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="save the results as the new baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed fractional drop in throughput (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="minimum timed runs per case, the best counts (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiplier for the generated text size (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-k", dest="keyword", default="", help="only run cases containing KEYWORD"
+    )
+    args = parser.parse_args(argv)
+
+    baseline: dict[str, dict[str, float]] = {}
+    if args.baseline.exists():
+        data = json.loads(args.baseline.read_text())
+        if data["scale"] == args.scale:
+            baseline = data["results"]
+        elif not args.save:
+            parser.error(f"the baseline was recorded with --scale {data['scale']}")
+
+    results = []
+    failures = check_scaling(args.repeat, args.keyword)
+    worker = MatchWorker(timeout=60)
+    try:
+        for case in cases(args.scale, worker):
+            if args.keyword not in case.name:
+                continue
+            result = measure(case, args.repeat)
+            results.append(result)
+            line = result.format()
+            if result.name in baseline and not args.save:
+                change = result.throughput / baseline[result.name]["throughput"] - 1
+                line += f" {change:>+7.0%}"
+            print(line, flush=True)
+    finally:
+        worker.close()
+
+    if args.save:
+        # cases that weren't run (see -k) keep their previous baseline
+        for result in results:
+            baseline[result.name] = {
+                "seconds": result.seconds,
+                "throughput": result.throughput,
+                "unit": result.unit,
+            }
+        data = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "scale": args.scale,
+            "results": baseline,
+        }
+        args.baseline.write_text(json.dumps(data, indent=2) + "\n")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if failures:
+        print(f"\n{len(failures)} expression(s) matched in superlinear time:")
+        print("\n".join(failures))
+        return 1
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) past {args.threshold:.0%}:")
+        print("\n".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
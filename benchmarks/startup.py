@@ -0,0 +1,142 @@
+"""Startup benchmarks for the command line and the TUI.
+
+Each case starts a new Python process (so nothing is imported yet) and times
+it, the best of the runs counts. The script fails (exit code 1) when a case is
+over its time budget.
+
+    python benchmarks/startup.py                      # check the budgets
+    python benchmarks/startup.py --paint-budget 1500  # allow a slower first paint
+
+`--version` latency is the time to print the version and exit. Time to first
+paint is the time until the playground (loaded with the default text) has
+displayed its first frame, measured headless so the terminal isn't involved.
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+VERSION_BUDGET = 400  # ms
+PAINT_BUDGET = 1200  # ms
+
+# started in a new process, reports (on stderr) once the first frame is shown
+FIRST_PAINT = """
+import sys
+from pathlib import Path
+
+import regex_playground
+from regex_playground import RegexPlayground
+
+
+async def painted(pilot):
+    sys.__stderr__.write("painted\\n")
+    sys.__stderr__.flush()
+    pilot.app.exit()
+
+
+app = RegexPlayground()
+app.load_text(Path(regex_playground.__file__).with_name("zen.txt").read_text())
+app.run(headless=True, auto_pilot=painted)
+"""
+
+
+@dataclass
+class Result:
+    """Timing of a startup case."""
+
+    name: str
+    seconds: float  # best time of the runs
+    budget: float  # seconds
+
+    def format(self) -> str:
+        """Format the result for display."""
+        status = "ok" if self.seconds <= self.budget else "OVER BUDGET"
+        return (
+            f"{self.name:<16} {self.seconds * 1000:>8.0f} ms"
+            f" (budget {self.budget * 1000:.0f} ms) {status}"
+        )
+
+
+def time_version() -> float:
+    """Time `regex-playground --version`.
+
+    Returns:
+        Seconds until the process exited.
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "regex_playground", "--version"],
+        check=True,
+        capture_output=True,
+    )
+    return time.perf_counter() - start
+
+
+def time_first_paint() -> float:
+    """Time the playground starting up until its first frame is shown.
+
+    Returns:
+        Seconds until the first frame was reported.
+    """
+    start = time.perf_counter()
+    with subprocess.Popen(
+        [sys.executable, "-c", FIRST_PAINT],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    ) as process:
+        assert process.stderr is not None
+        line = process.stderr.readline()
+        elapsed = time.perf_counter() - start
+        error = process.stderr.read()
+    if line.strip() != "painted":
+        raise RuntimeError(f"the playground didn't start:\n{line}{error}")
+    return elapsed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--version-budget",
+        type=float,
+        default=VERSION_BUDGET,
+        metavar="MS",
+        help="time budget for `--version` (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--paint-budget",
+        type=float,
+        default=PAINT_BUDGET,
+        metavar="MS",
+        help="time budget for the first paint (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="timed runs per case, the best counts (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    cases = [
+        ("--version", time_version, args.version_budget),
+        ("first-paint", time_first_paint, args.paint_budget),
+    ]
+    results = []
+    for name, func, budget in cases:
+        seconds = min(func() for _ in range(args.repeat))
+        result = Result(name, seconds, budget / 1000)
+        results.append(result)
+        print(result.format(), flush=True)
+
+    over = [result.name for result in results if result.seconds > result.budget]
+    if over:
+        print(f"\nOver budget: {', '.join(over)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,19 @@
-from .app import RegexPlayground
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .app import RegexPlayground
 
 __all__ = ["RegexPlayground"]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the app the first time it's used.
+
+    It pulls in the whole TUI, which the command line doesn't need to print its
+    version or run in batch mode.
+    """
+    if name != "RegexPlayground":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from .app import RegexPlayground
+
+    return RegexPlayground
@@ -1,19 +1,26 @@
-import webbrowser
 from pathlib import Path
 
-from textual import on
+from textual import on, work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.notifications import Notification, Notify
 from textual.reactive import reactive
 from textual.validation import ValidationResult
-from textual.widgets import Footer, Header, Input, Rule, TextArea
+from textual.widgets import Footer, Header, Input, Label, Rule, TextArea
 
+from .cache import MatchCache
+from .defaults import DEFAULT_TIMEOUT, FOLLOW_LINES
 from .expression import ExpressionContainer, Flags, RegexInput
-from .expression.flags import FLAG_PATTERN, Flag
-from .screens import AboutModal, HelpModal
+from .expression.flags import Flag
+from .mapped import MAPPED_THRESHOLD, MappedText
+from .match_list import MatchList
+from .matcher import MatchWorker
+from .patterns import toggle_flag
+from .scheduler import UpdateScheduler
 from .substitution import SubstitutionContainer, SubstitutionInput
-from .text_inputs import TextInput, TextResult
+from .text_inputs import RegexTextArea, TextInput, TextResult
+from .timings import Timings
+from .timings_overlay import TimingsOverlay
 
 
 class RegexPlayground(App[int]):
@@ -24,6 +31,14 @@ class RegexPlayground(App[int]):
     BINDINGS = [
         Binding("f1", "help", "Help"),
         Binding("f2", "about", "About"),
+        Binding("f3", "timings", "Timings"),
+        Binding("ctrl+t", "export_timings", "Export Timings"),
+        Binding("f4", "files", "Files"),
+        Binding("f10", "race", "Race"),
+        Binding("ctrl+f", "follow", "Follow"),
+        Binding("f8", "next_match", "Next Match"),
+        Binding("shift+f8", "previous_match", "Previous Match", show=False),
+        Binding("f9", "matches", "Matches"),
         Binding("ctrl+g", "global_match", "Global Toggle"),
     ]
     AUTO_FOCUS = "#regex-input"
@@ -32,11 +47,38 @@ class RegexPlayground(App[int]):
     substitution: reactive[str] = reactive("", init=False)
     global_match: reactive[bool] = reactive(True, init=False)
 
-    def __init__(self, *args, **kwargs) -> None:
-        """Initialize the application."""
+    def __init__(
+        self,
+        *args,
+        match_timeout: float = DEFAULT_TIMEOUT,
+        cache: MatchCache | None = None,
+        follow_lines: int = FOLLOW_LINES,
+        **kwargs,
+    ) -> None:
+        """Initialize the application.
+
+        Args:
+            match_timeout: Time budget (in seconds) for matching and substitution
+                before a pattern is considered to have timed out. Defaults to 1.0.
+            cache: On-disk cache for match spans and line indexes of large texts,
+                the last expression and substitution are restored from it (and
+                saved to it on exit). Defaults to None.
+            follow_lines: Number of lines of a followed file to keep. Defaults to
+                10,000.
+        """
 
         self._initial_text: str = ""
+        self._initial_mapped: MappedText | None = None
+        self._initial_follow: Path | None = None
         self._initial_notifications: list[Notification] = []
+        self.files: list[Path] = []
+        self.file: Path | None = None  # file last loaded (or followed)
+        self.follow_lines = follow_lines
+        self.cache = cache
+        self.match_worker = MatchWorker(match_timeout, cache)
+        self.match_worker.start()
+        self.scheduler = UpdateScheduler(self)
+        self.timings = Timings()
         super().__init__(*args, **kwargs)
 
     #########################
@@ -53,21 +95,47 @@ class RegexPlayground(App[int]):
         yield ExpressionContainer(id="expression-container")
         yield Rule(line_style="thick")
         yield SubstitutionContainer(id="substitution-container")
+        yield TimingsOverlay(self.timings, id="timings")
         yield Footer()
 
     def on_mount(self) -> None:
         """Load text into the app."""
-        if self._initial_text:
+        if self._initial_follow is not None:
+            self.follow_file(self._initial_follow)
+        elif self._initial_mapped is not None:
+            self.query_one("#text-input", TextInput).load_mapped(self._initial_mapped)
+        elif self._initial_text:
             text_input = self.query_one("#text-input", TextInput)
             text_result = self.query_one("#text-result", TextResult)
             text_input.load_text(self._initial_text)
             text_result.load_text(self._initial_text, True)
+        if self.cache is not None:
+            self.restore_session(self.cache)
+
+    def restore_session(self, cache: MatchCache) -> None:
+        """Restore the expression and substitution of the last session.
+
+        Args:
+            cache: Cache the session was saved in.
+        """
+        session = cache.load_session()
+        regex_input = self.query_one("#regex-input", RegexInput)
+        substitution_input = self.query_one("#substitution-input", SubstitutionInput)
+        substitution_input.value = session["substitution"]
+        regex_input.value = session["regex"]
+        regex_input.action_end()
 
     def on_ready(self) -> None:
         """Show any notifications."""
         for notification in self._initial_notifications:
             self.post_message(Notify(notification))
 
+    def on_unmount(self) -> None:
+        """Stop the match worker process and save the session."""
+        self.match_worker.close()
+        if self.cache is not None:
+            self.cache.save_session(self.regex, self.substitution)
+
     #################
     # WATCH METHODS #
     #################
@@ -128,11 +196,14 @@ class RegexPlayground(App[int]):
         widget: Input, validation_result: ValidationResult | None
     ) -> str:
         value = widget.value or ""
-        tooltip = None
+        tooltip = warning = None
         if validation_result and not validation_result.is_valid:
             tooltip = validation_result.failure_descriptions[-1]
             value = ""
+        elif isinstance(widget, RegexInput):
+            tooltip = warning = widget.warning
         widget.tooltip = tooltip
+        widget.set_class(warning is not None, "-warning")
         return value
 
     ###########################
@@ -149,7 +220,7 @@ class RegexPlayground(App[int]):
         if self.app._running:
             text_input = self.query_one("#text-input", TextInput)
             text_result = self.query_one("#text-result", TextResult)
-            if text == text_input.text:
+            if text == text_input.text and text_input.mapped is None:
                 return
             text_input.load_text(text)
             text_result.load_text(text, True)
@@ -161,24 +232,95 @@ class RegexPlayground(App[int]):
                 self.post_message(Notify(notification))
         else:
             self._initial_text = text
+            self._initial_mapped = None
+            self._initial_follow = None
+            if notification:
+                self._initial_notifications.append(notification)
+
+    def load_mapped(
+        self, mapped: MappedText, notification: Notification | None = None
+    ) -> None:
+        """Load a memory mapped file into the application (read-only).
+
+        Args:
+            mapped: Memory mapped file.
+            notification: Message to display in an alert toast. Defaults to None.
+        """
+        if self.app._running:
+            text_input = self.query_one("#text-input", TextInput)
+            text_input.load_mapped(mapped)
+
+            if notification:
+                self.post_message(Notify(notification))
+        else:
+            self._initial_mapped = mapped
+            self._initial_follow = None
             if notification:
                 self._initial_notifications.append(notification)
 
     def load_file(self, file: str | Path) -> None:
         """Load a text file into the application.
 
+        Files larger than `MAPPED_THRESHOLD` are memory mapped and displayed
+        read-only, a window of rows at a time.
+
         Args:
             file: File path.
         """
         if isinstance(file, str):
             file = Path(file)
-        text = file.read_text()
+        self.file = file
         notification = Notification(
             f"Text from {file.name} was loaded successfully.",
             "Input Text Updated",
         )
+        if file.stat().st_size > MAPPED_THRESHOLD:
+            self.load_mapped(MappedText(file), notification)
+            return
+        text = file.read_text()
         self.load_text(text, notification)
 
+    def load_files(self, files: list[Path], follow: bool = False) -> None:
+        """Load many text files, the first is opened and the rest can be searched.
+
+        Args:
+            files: File paths.
+            follow: Follow the first file as it grows (see `follow_file`) instead
+                of loading it. Defaults to False.
+        """
+        self.files = files
+        if files and follow:
+            self.follow_file(files[0])
+        elif files:
+            self.load_file(files[0])
+
+    def follow_file(self, file: str | Path) -> None:
+        """Follow a growing file, like `tail -f`.
+
+        The last `follow_lines` lines of the file are loaded and the lines written
+        to it are appended as they come in, dropping the oldest ones (see
+        `TextInput.follow`).
+
+        Args:
+            file: File path.
+        """
+        if isinstance(file, str):
+            file = Path(file)
+        self.file = file
+        if not self.app._running:
+            self._initial_follow = file
+            return
+        text_input = self.query_one("#text-input", TextInput)
+        try:
+            text_input.follow(file, self.follow_lines)
+        except OSError as e:
+            self.notify(f"{e}", title="Error Following File", severity="warning")
+            return
+        self.notify(
+            f"Following {file.name}, new lines are matched as they're written.",
+            title="Following File",
+        )
+
     @on(TextInput.NewFile)
     def load_file_from_tui(self, message: TextInput.NewFile) -> None:
         self.load_file(message.path)
@@ -186,8 +328,11 @@ class RegexPlayground(App[int]):
     @on(TextArea.Changed, "#text-input")
     def update_text_result_with_changes(self, event: TextArea.Changed) -> None:
         """Update `TextResult` text with changes from `TextInput`."""
+        text_input = event.control
         text_result = self.query_one("#text-result", TextResult)
-        text_result.load_text(event.control.text, True)
+        self.scheduler.schedule(
+            text_result, prepare=lambda: text_result.load_text(text_input.text, True)
+        )
 
     ##################################
     # REGEX AND HIGHLIGHTING METHODS #
@@ -196,27 +341,18 @@ class RegexPlayground(App[int]):
     @on(Flag.Clicked)
     def clicked_flag(self, message: Flag.Clicked) -> None:
         """Update the regex string and ui when a flag is clicked"""
-        flag_letter = message.letter
         regex_input = self.query_one("#regex-input", RegexInput)
-        current_value = regex_input.value
-        current_flags = FLAG_PATTERN.match(current_value)
-        if current_flags:
-            flags = current_flags.groups()[0]
-            updated_flags = (
-                flags.replace(flag_letter, "")
-                if flag_letter in flags
-                else flags + flag_letter
-            )
-            new_value = (
-                FLAG_PATTERN.sub(f"(?{updated_flags})", current_value)
-                if updated_flags
-                else FLAG_PATTERN.sub("", current_value)
-            )
-        else:
-            new_value = f"(?{flag_letter}){current_value}"
+        new_value = toggle_flag(regex_input.value, message.letter)
         regex_input.value = new_value
         regex_input.action_end()
 
+    @on(RegexTextArea.TimedOut)
+    def show_timeout_alert(self, message: RegexTextArea.TimedOut) -> None:
+        """Alert the user that matching took longer than the time budget."""
+        timeout_alert = self.query_one("#timeout-alert", Label)
+        timeout_alert.update(f"pattern timed out after {message.timeout * 1000:.0f} ms")
+        timeout_alert.remove_class("-hidden")
+
     @on(TextResult.ResetInputWithResult)
     def reset_input_with_result(self, message: TextResult.ResetInputWithResult) -> None:
         """Reset the contents of `TextInput` with the contents of `TextResult`."""
@@ -236,12 +372,117 @@ class RegexPlayground(App[int]):
 
     def action_visit(self, url: str) -> None:
         """Visit a web URL."""
+        import webbrowser
+
         webbrowser.open(url)
 
+    def action_files(self) -> None:
+        """Show match counts for the current expression across all loaded files."""
+        if len(self.files) < 2:
+            self.notify(
+                "Pass more than one file (or a directory) on the command line.",
+                title="No Files To Search",
+                severity="warning",
+            )
+            return
+        from .screens import FilesModal
+
+        self.push_screen(
+            FilesModal(self.files, self.regex),
+            callback=lambda path: None if path is None else self.load_file(path),
+        )
+
+    def action_race(self) -> None:
+        """Race candidate expressions against the text."""
+        text_input = self.query_one("#text-input", TextInput)
+        if text_input.mapped is not None:
+            self.notify(
+                "Races aren't available for memory mapped files.",
+                title="Pattern Race",
+                severity="warning",
+            )
+            return
+        from .screens import RaceModal
+
+        self.push_screen(RaceModal(text_input.text, self.regex))
+
+    def action_follow(self) -> None:
+        """Follow the loaded file as it grows, or stop following it."""
+        text_input = self.query_one("#text-input", TextInput)
+        if text_input.following is not None:
+            text_input.stop_following()
+            return
+        if self.file is None:
+            self.notify(
+                "Load a file (from the command line or with `CTRL+L`) to follow it.",
+                title="No File To Follow",
+                severity="warning",
+            )
+            return
+        self.follow_file(self.file)
+
+    def action_next_match(self) -> None:
+        """Select the next match in the text."""
+        self.query_one("#text-input", TextInput).next_match()
+
+    def action_previous_match(self) -> None:
+        """Select the previous match in the text."""
+        self.query_one("#text-input", TextInput).previous_match()
+
+    def action_matches(self) -> None:
+        """Toggle the match list."""
+        match_list = self.query_one("#match-list", MatchList)
+        match_list.display = not match_list.display
+        if match_list.display:
+            match_list.refresh_matches()
+            match_list.focus()
+
+    def check_action(self, action: str, parameters: tuple[object, ...]) -> bool | None:
+        """Only allow exporting timings while they're shown."""
+        if action == "export_timings":
+            return self.query_one("#timings", TimingsOverlay).display
+        return True
+
+    def action_timings(self) -> None:
+        """Toggle the timings overlay."""
+        overlay = self.query_one("#timings", TimingsOverlay)
+        overlay.display = not overlay.display
+        overlay.show_timings()
+        self.refresh_bindings()
+
+    @work(exclusive=True)
+    async def action_export_timings(self) -> None:
+        """Save the recorded timings to a JSON file."""
+        from textual_fspicker import FileSave
+
+        from .screens.overwrite import OverwriteModal
+
+        path = await self.push_screen(
+            FileSave(".", title="Export Timings As"),
+            wait_for_dismiss=True,
+        )
+
+        if (
+            path is None
+            or path.exists()
+            and not await self.push_screen(OverwriteModal(path), wait_for_dismiss=True)
+        ):
+            return
+
+        try:
+            path.write_text(self.timings.to_json())
+            self.notify(f"{path}", title="Timings Exported", severity="information")
+        except OSError as e:
+            self.notify(f"{e}", title="Error Exporting Timings", severity="warning")
+
     def action_about(self) -> None:
         """Show about modal."""
+        from .screens import AboutModal
+
         self.push_screen(AboutModal())
 
     def action_help(self) -> None:
         """Show help modal."""
+        from .screens import HelpModal
+
         self.push_screen(HelpModal())
@@ -0,0 +1,805 @@
+import re
+from array import array
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from re import _compiler, _constants, _parser  # type: ignore[attr-defined]
+from typing import Any
+
+AUTOMATON = "automaton"  # engine names shown in the match status
+BACKTRACKING = "re"
+
+MAX_INSTRUCTIONS = 10_000  # larger patterns (e.g. big counted repeats) use `re`
+MAX_STATES = 2_000  # states a DFA keeps before it's flushed
+MAX_TRANSITIONS = 50_000  # transitions a DFA keeps before it's flushed
+
+# instruction opcodes
+CHAR, SPLIT, ASSERT, MATCH = range(4)
+
+# character classes (bit flags) used to evaluate assertions between characters
+NEWLINE = 1
+WORD = 2
+ASCII_WORD = 4
+FINAL = 8  # the newline ending the text (where `$` also matches)
+NOTHING = 16  # before the start or after the end of the text
+
+END = None  # symbol for the end (or, searching backwards, the start) of the text
+FINAL_NEWLINE = ("\n",)  # symbol for a newline that ends the text
+
+# transition flags (the low bits of a transition, the next state is above them)
+MATCHED = 1
+IDLE = 2  # the next state has no threads in progress (or no threads at all)
+DEAD = 0  # state id of the state with no threads
+
+REPEATS = (_constants.MAX_REPEAT, _constants.MIN_REPEAT)
+ATOMS = (_constants.LITERAL, _constants.NOT_LITERAL, _constants.ANY, _constants.IN)
+UNICODE_WORD = re.compile(r"\w")
+ASCII_WORD_PATTERN = re.compile(r"\w", re.ASCII)
+
+
+class Unsupported(Exception):
+    """Raised when a pattern uses features outside of the regular subset."""
+
+
+def compile_items(items: list[tuple[Any, Any]], flags: int) -> re.Pattern[str]:
+    """Compile parsed pattern items with `re`.
+
+    Args:
+        items: Items parsed by `re._parser.parse`.
+        flags: Flags in effect for the items.
+
+    Returns:
+        Compiled pattern.
+    """
+    state = _parser.State()
+    state.flags = flags
+    parsed = _parser.SubPattern(state, items)
+    pattern: re.Pattern[str] = _compiler.compile(parsed, flags)
+    return pattern
+
+
+def _nullable(items: Any) -> bool:
+    """Check if parsed pattern items can match an empty string."""
+    for op, av in items:
+        if op in ATOMS:
+            return False
+        if op is _constants.SUBPATTERN and not _nullable(av[3].data):
+            return False
+        if op is _constants.BRANCH and not any(_nullable(p.data) for p in av[1]):
+            return False
+        if op in REPEATS and av[0] > 0 and not _nullable(av[2].data):
+            return False
+    return True
+
+
+def _classify(symbol: Any) -> int:
+    """Get the character class bits of a symbol."""
+    if symbol is END:
+        return NOTHING
+    if symbol is FINAL_NEWLINE:
+        return NEWLINE | FINAL
+    bits = NEWLINE if symbol == "\n" else 0
+    if UNICODE_WORD.match(symbol):
+        bits |= WORD
+    if ASCII_WORD_PATTERN.match(symbol):
+        bits |= ASCII_WORD
+    return bits
+
+
+def _holds(assertion: tuple[Any, int], before: int, after: int) -> bool:
+    """Check a zero-width assertion between two character classes."""
+    code, word = assertion
+    if code is _constants.AT_BEGINNING or code is _constants.AT_BEGINNING_STRING:
+        return bool(before & NOTHING)
+    if code is _constants.AT_BEGINNING_LINE:
+        return bool(before & (NOTHING | NEWLINE))
+    if code is _constants.AT_END:
+        return bool(after & (NOTHING | FINAL))
+    if code is _constants.AT_END_LINE:
+        return bool(after & (NOTHING | NEWLINE))
+    if code is _constants.AT_END_STRING:
+        return bool(after & NOTHING)
+    boundary = bool(before & word) != bool(after & word)
+    return boundary if code is _constants.AT_BOUNDARY else not boundary
+
+
+class Program:
+    """A pattern compiled into NFA instructions.
+
+    Instructions are compiled back to front, each pointing at the instruction
+    that follows it. A reversed program matches the text backwards (from the
+    end of a match to its start).
+    """
+
+    def __init__(self, parsed: Any, reverse: bool = False) -> None:
+        """Compile a parsed pattern.
+
+        Args:
+            parsed: Pattern parsed by `re._parser.parse`.
+            reverse: Compile the program to run backwards. Defaults to False.
+
+        Raises:
+            Unsupported: If the pattern isn't in the regular subset.
+        """
+        self.reverse = reverse
+        self.ops: list[int] = []
+        self.args: list[Any] = []  # atom index, or assertion (code, word bit)
+        self.outs: list[int] = []  # next instruction (preferred one for a split)
+        self.alts: list[int] = []  # other instruction of a split
+        self.atoms: list[re.Pattern[str]] = []  # single character matchers
+        self.items: list[tuple[Any, Any, int]] = []  # parsed atoms with their flags
+        self.exits: dict[int, int] = {}  # instruction after each loop's split
+        self.start = self._sequence(parsed.data, self._add(MATCH), parsed.state.flags)
+
+    def _add(self, op: int, arg: Any = None, out: int = -1, alt: int = -1) -> int:
+        if len(self.ops) >= MAX_INSTRUCTIONS:
+            raise Unsupported("pattern is too large")
+        self.ops.append(op)
+        self.args.append(arg)
+        self.outs.append(out)
+        self.alts.append(alt)
+        return len(self.ops) - 1
+
+    def _sequence(self, items: list[tuple[Any, Any]], next: int, flags: int) -> int:
+        for op, av in items if self.reverse else reversed(items):
+            next = self._item(op, av, next, flags)
+        return next
+
+    def _item(self, op: Any, av: Any, next: int, flags: int) -> int:
+        if op in ATOMS:
+            # single characters are matched with `re` so case folding and
+            # character categories behave exactly the same
+            self.atoms.append(compile_items([(op, av)], flags))
+            self.items.append((op, av, flags))
+            return self._add(CHAR, len(self.atoms) - 1, next)
+
+        if op is _constants.AT:
+            if flags & re.MULTILINE:
+                av = {
+                    _constants.AT_BEGINNING: _constants.AT_BEGINNING_LINE,
+                    _constants.AT_END: _constants.AT_END_LINE,
+                }.get(av, av)
+            word = ASCII_WORD if flags & re.ASCII else WORD
+            return self._add(ASSERT, (av, word), next)
+
+        if op is _constants.SUBPATTERN:
+            _, add_flags, del_flags, p = av
+            if (add_flags | del_flags) & re.ASCII:
+                # `re` skips ahead using the pattern flags, not the scoped ones
+                raise Unsupported("scoped ASCII flags aren't supported")
+            flags = _compiler._combine_flags(flags, add_flags, del_flags)
+            return self._sequence(p.data, next, flags)
+
+        if op is _constants.BRANCH:
+            entries = [self._sequence(p.data, next, flags) for p in av[1]]
+            pc = entries[-1]
+            for entry in reversed(entries[:-1]):
+                pc = self._add(SPLIT, out=entry, alt=pc)
+            return pc
+
+        if op in REPEATS:
+            low, high, body = av
+            if high > 1 and _nullable(body.data):
+                # `re` stops repeating after an iteration that matched nothing,
+                # which threads of a shared loop body can't keep track of
+                raise Unsupported("repeats of empty matches aren't supported")
+            greedy = op is _constants.MAX_REPEAT
+            if high is _constants.MAXREPEAT:
+                loop = self._add(SPLIT)
+                body_pc = self._sequence(body.data, loop, flags)
+                self.outs[loop], self.alts[loop] = (
+                    (body_pc, next) if greedy else (next, body_pc)
+                )
+                self.exits[loop] = next
+                tail = loop
+            else:
+                tail = next
+                for _ in range(high - low):
+                    body_pc = self._sequence(body.data, tail, flags)
+                    out, alt = (body_pc, next) if greedy else (next, body_pc)
+                    tail = self._add(SPLIT, out=out, alt=alt)
+            for _ in range(low):
+                tail = self._sequence(body.data, tail, flags)
+            return tail
+
+        raise Unsupported(f"{op} isn't supported")
+
+    def first_atoms(self) -> list[int] | None:
+        """Get the atoms that can match the first character of a match.
+
+        Returns:
+            Atom indexes, or None if the pattern can match an empty string.
+        """
+        atoms = []
+        stack = [self.start]
+        seen = set()
+        while stack:
+            pc = stack.pop()
+            if pc in seen:
+                continue
+            seen.add(pc)
+            op = self.ops[pc]
+            if op == CHAR:
+                atoms.append(self.args[pc])
+            elif op == SPLIT:
+                stack += (self.alts[pc], self.outs[pc])
+            elif op == ASSERT:
+                stack.append(self.outs[pc])
+            else:
+                return None
+        return atoms
+
+
+class LazyDFA:
+    """A DFA built from a program as the text is scanned.
+
+    Each state is a list of NFA threads and each transition is computed once
+    (by simulating the threads) the first time a character is seen from that
+    state, so matching takes time linear in the length of the text no matter
+    the pattern.
+
+    A forward DFA keeps the threads in priority order and drops the threads
+    below a thread that matched, which finds the same match end as the
+    backtracking `re` engine (leftmost-first). It also starts a new thread at
+    each position until something matches (an unanchored search). A reverse
+    DFA is anchored at the end of a match and only tracks which threads are
+    alive, to find the earliest start of a match ending there.
+
+    The states are kept for the life of the DFA (and the automaton is kept by
+    `automaton_for`), so once there are `MAX_STATES` states or `MAX_TRANSITIONS`
+    transitions they're all dropped and built again as needed. Matching stays
+    linear, a text that keeps reaching new states is only matched more slowly.
+    """
+
+    def __init__(self, program: Program) -> None:
+        """Initialize the DFA.
+
+        Args:
+            program: Compiled pattern.
+        """
+        self.program = program
+        self.forward = not program.reverse
+        self.rows: list[dict[Any, int]] = []  # transitions by state id
+        self.keys: list[tuple[tuple[int, ...], int, bool]] = []
+        self.ids: dict[tuple[tuple[int, ...], int, bool], int] = {}
+        self.size = 0  # number of transitions
+        self.flushes = 0  # times the states were dropped (see `flush`)
+        self.state((), 0, False)  # the dead state
+
+    def flush(self) -> None:
+        """Drop all states and transitions.
+
+        The lists are cleared in place, as scans hold on to them. State ids
+        from before the flush are no longer valid (except `DEAD`).
+        """
+        self.rows.clear()
+        self.keys.clear()
+        self.ids.clear()
+        self.size = 0
+        self.flushes += 1
+        self.state((), 0, False)
+
+    def state(self, threads: tuple[int, ...], before: int, seed: bool) -> int:
+        """Get the id of a state.
+
+        Args:
+            threads: Instructions waiting to run at the current position.
+            before: Class bits of the character before the current position.
+            seed: Start a new thread at the current position.
+
+        Returns:
+            State id.
+        """
+        if not threads and not seed:
+            before = 0
+        key = (threads, before, seed)
+        state = self.ids.get(key)
+        if state is None:
+            if len(self.keys) >= MAX_STATES:
+                self.flush()
+            state = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.rows.append({})
+        return state
+
+    def initial(self, before: int) -> int:
+        """Get the state to start matching in.
+
+        Args:
+            before: Class bits of the character before the start position.
+
+        Returns:
+            State id.
+        """
+        if self.forward:
+            return self.state((), before, True)
+        return self.state((self.program.start,), before, False)
+
+    def step(self, state: int, symbol: Any, allow_match: bool = True) -> int:
+        """Compute (and remember) the transition from a state on a symbol.
+
+        Args:
+            state: State id.
+            symbol: Next character (or `END`, `FINAL_NEWLINE`).
+            allow_match: Can the program match at the current position.
+                Transitions that don't allow matches aren't remembered.
+                Defaults to True.
+
+        Returns:
+            The next state id shifted left by two, or'ed with the `MATCHED` and
+            `IDLE` flags. If the states were flushed to make room for the next
+            state, `state` is no longer valid but the next state is.
+        """
+        program = self.program
+        ops, args, outs, alts = program.ops, program.args, program.outs, program.alts
+        exits = program.exits
+        threads, before, seed = self.keys[state]
+        current = after = _classify(symbol)
+        if not self.forward:
+            before, after = after, before
+
+        # follow the threads through splits and assertions in priority order
+        stack = list(reversed(threads))
+        if seed:
+            stack.insert(0, program.start)
+        seen = set()
+        waiting = []
+        matched = False
+        while stack:
+            pc = stack.pop()
+            if pc in seen:
+                if pc in exits:
+                    # like `re`, leave a loop after an iteration matching nothing
+                    stack.append(exits[pc])
+                continue
+            seen.add(pc)
+            op = ops[pc]
+            if op == CHAR:
+                waiting.append(pc)
+            elif op == SPLIT:
+                stack += (alts[pc], outs[pc])
+            elif op == ASSERT:
+                if _holds(args[pc], before, after):
+                    stack.append(outs[pc])
+            elif allow_match:
+                matched = True
+                if self.forward:
+                    break  # threads of lower priority can't win
+
+        flags = MATCHED if matched else 0
+        if symbol is END:
+            return flags
+        char = "\n" if symbol is FINAL_NEWLINE else symbol
+        atoms = program.atoms
+        moved = tuple(
+            dict.fromkeys(outs[pc] for pc in waiting if atoms[args[pc]].match(char))
+        )
+        flushes = self.flushes
+        if self.size >= MAX_TRANSITIONS:
+            self.flush()
+        if not self.forward:
+            moved = tuple(sorted(moved))
+            next_state = self.state(moved, current, False)
+        else:
+            next_state = self.state(moved, current, seed and not matched)
+        if not moved:
+            flags |= IDLE
+        transition = next_state << 2 | flags
+        if allow_match and self.flushes == flushes:
+            self.rows[state][symbol] = transition
+            self.size += 1
+        return transition
+
+
+class ReachDFA:
+    """A DFA run backwards over a text to find which threads can still match.
+
+    Its state at a position is the set of character instructions that match
+    the character there and lead to a match further on (and the class bits of
+    that character). A forward thread whose instructions reach none of them
+    (or the end of the program) can't match anymore, however far it's run.
+
+    The states of a text are held by id while it's scanned, so they can't be
+    flushed during a run like a `LazyDFA`'s. A run that would need more than
+    `MAX_STATES` states or `MAX_TRANSITIONS` transitions is given up instead.
+    """
+
+    def __init__(self, program: Program) -> None:
+        """Initialize the DFA.
+
+        Args:
+            program: Compiled (forward) pattern.
+        """
+        self.program = program
+        self.chars = [pc for pc, op in enumerate(program.ops) if op == CHAR]
+        self.rows: list[dict[Any, int]] = []  # transitions by state id
+        self.keys: list[tuple[frozenset[int], int]] = []
+        self.ids: dict[tuple[frozenset[int], int], int] = {}
+        self.size = 0  # number of transitions
+        self.flushes = 0  # times the states were dropped (see `flush`)
+        self._alive: dict[tuple[int, int], bool] = {}  # see `alive`
+        self._flushes = 0  # `LazyDFA.flushes` of the DFA `_alive` is for
+
+    def flush(self) -> None:
+        """Drop all states and transitions."""
+        self.rows.clear()
+        self.keys.clear()
+        self.ids.clear()
+        self.size = 0
+        self.flushes += 1
+        self._alive.clear()
+
+    def state(self, chars: frozenset[int], current: int) -> int:
+        """Get the id of a state.
+
+        Args:
+            chars: Character instructions leading to a match from the position.
+            current: Class bits of the character at the position.
+
+        Returns:
+            State id.
+        """
+        key = (chars, current)
+        state = self.ids.get(key)
+        if state is None:
+            state = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.rows.append({})
+        return state
+
+    def _reaches(
+        self, pcs: Iterable[int], before: int, after: int, chars: frozenset[int]
+    ) -> bool:
+        """Check if instructions reach a match or one of `chars` without moving."""
+        program = self.program
+        ops, args, outs, alts = program.ops, program.args, program.outs, program.alts
+        stack = list(pcs)
+        seen = set()
+        while stack:
+            pc = stack.pop()
+            if pc in seen:
+                continue
+            seen.add(pc)
+            op = ops[pc]
+            if op == CHAR:
+                if pc in chars:
+                    return True
+            elif op == SPLIT:
+                stack += (alts[pc], outs[pc])
+            elif op == ASSERT:
+                if _holds(args[pc], before, after):
+                    stack.append(outs[pc])
+            else:
+                return True
+        return False
+
+    def step(self, state: int, symbol: Any) -> int:
+        """Compute (and remember) the state at the position before a symbol.
+
+        Args:
+            state: State id at the position after the symbol.
+            symbol: Character (or `FINAL_NEWLINE`) at the position.
+
+        Returns:
+            State id.
+        """
+        program = self.program
+        chars, after = self.keys[state]
+        before = _classify(symbol)
+        char = "\n" if symbol is FINAL_NEWLINE else symbol
+        atoms, args, outs = program.atoms, program.args, program.outs
+        moved = frozenset(
+            pc
+            for pc in self.chars
+            if atoms[args[pc]].match(char)
+            and self._reaches((outs[pc],), before, after, chars)
+        )
+        next_state = self.state(moved, before)
+        self.rows[state][symbol] = next_state
+        self.size += 1
+        return next_state
+
+    def run(self, text: str) -> "array[int] | None":
+        """Find the state at each position of a text (scanning it backwards).
+
+        Args:
+            text: Text to scan.
+
+        Returns:
+            State ids by position (the last one is at the end of the text), or
+            None if there are too many of them to keep.
+        """
+        if len(self.keys) > MAX_STATES // 2 or self.size > MAX_TRANSITIONS // 2:
+            self.flush()  # make room for the states of this text
+        rows = self.rows
+        step = self.step
+        states = array("I", [0]) * (len(text) + 1)
+        state = states[len(text)] = self.state(frozenset(), NOTHING)
+        for i in range(len(text) - 1, -1, -1):
+            symbol = Automaton._symbol(text, i)
+            cached = rows[state].get(symbol)
+            if cached is None:
+                if len(self.keys) >= MAX_STATES or self.size >= MAX_TRANSITIONS:
+                    self.flush()
+                    return None
+                cached = step(state, symbol)
+            state = states[i] = cached
+        return states
+
+    def alive(self, dfa: LazyDFA, forward: int, state: int) -> bool:
+        """Check if any thread of a forward DFA state can still match.
+
+        Args:
+            dfa: Forward DFA.
+            forward: Forward DFA state id at a position.
+            state: State id at the same position.
+
+        Returns:
+            True if a thread can still match (or new threads are started).
+        """
+        if dfa.flushes != self._flushes or len(self._alive) >= MAX_TRANSITIONS:
+            # forward state ids changed (or the cache is full)
+            self._alive.clear()
+            self._flushes = dfa.flushes
+        alive = self._alive.get((forward, state))
+        if alive is None:
+            threads, before, seed = dfa.keys[forward]
+            chars, after = self.keys[state]
+            alive = seed or self._reaches(threads, before, after, chars)
+            self._alive[forward, state] = alive
+        return alive
+
+
+class Automaton:
+    """Find regular expression matches in linear time.
+
+    Only patterns without backreferences, lookaround, atomic groups and
+    possessive repeats can be compiled. Matches are the same as `re.finditer`
+    finds, but a pattern can't backtrack catastrophically. Each match is found
+    with a forward DFA (for the match end) and a reverse DFA (for its start).
+    If scans keep running past the matches they find (so the same text is
+    scanned again for the next match), a `ReachDFA` is run over the text once
+    to stop them, so no position is scanned more than a few times.
+    """
+
+    def __init__(self, regex: str) -> None:
+        """Compile a regular expression.
+
+        Args:
+            regex: Regular expression string.
+
+        Raises:
+            re.error: If `regex` isn't a valid regular expression.
+            Unsupported: If the pattern isn't in the regular subset.
+        """
+        self.pattern = re.compile(regex)
+        parsed = _parser.parse(regex)
+        if parsed.state.flags & re.LOCALE:
+            raise Unsupported("locale dependent patterns aren't supported")
+        program = Program(parsed)
+        self.forward = LazyDFA(program)
+        self.reverse = LazyDFA(Program(parsed, reverse=True))
+        self.reach = ReachDFA(program)
+
+        # skip to where a match could start with `re` (which scans much faster)
+        self.prefilter: re.Pattern[str] | None = None
+        atoms = program.first_atoms()
+        if atoms:
+            branches = []
+            for op, av, flags in map(program.items.__getitem__, dict.fromkeys(atoms)):
+                atom = _parser.SubPattern(_parser.State(), [(op, av)])
+                scoped = (_constants.SUBPATTERN, (None, flags, 0, atom))
+                branches.append(_parser.SubPattern(_parser.State(), [scoped]))
+            self.prefilter = compile_items([(_constants.BRANCH, (None, branches))], 0)
+
+    @staticmethod
+    def _symbol(text: str, index: int) -> Any:
+        if index >= len(text):
+            return END
+        char = text[index]
+        if char == "\n" and index == len(text) - 1:
+            return FINAL_NEWLINE
+        return char
+
+    def _before(self, text: str, index: int) -> int:
+        return NOTHING if index == 0 else _classify(self._symbol(text, index - 1))
+
+    def _find_end(
+        self,
+        text: str,
+        pos: int,
+        must_advance: bool,
+        reach: "array[int] | None" = None,
+    ) -> tuple[int, int]:
+        """Find the end of the first match at or after `pos`.
+
+        Once a match is found, the scan goes on while threads of a higher
+        priority are alive, as they could still find a longer match. With the
+        `ReachDFA` states of the text, it stops as soon as none of them can.
+
+        Returns:
+            The end of the match (-1 if there's none) and where the scan stopped.
+        """
+        dfa = self.forward
+        rows = dfa.rows
+        step = dfa.step
+        alive = self.reach.alive
+        prefilter = self.prefilter
+        # only stop when the DFA goes idle if there's a prefilter to skip ahead with
+        stop = MATCHED | IDLE if prefilter is not None else MATCHED
+        # the last character is stepped over outside the loop (see `_symbol`)
+        last = len(text) - 1 if text.endswith("\n") else len(text)
+        end = -1
+        i = pos
+        state = dfa.initial(self._before(text, i))
+        if must_advance:
+            # an empty match at `pos` was just found so don't find it again
+            transition = step(state, self._symbol(text, i), allow_match=False)
+            if transition < 4 or i == len(text):
+                return -1, i
+            state = transition >> 2
+            i += 1
+        while True:
+            if prefilter is not None and dfa.keys[state][0] == () and end < 0:
+                match = prefilter.search(text, i)
+                if match is None:
+                    return -1, len(text)
+                i = match.start()
+                state = dfa.initial(self._before(text, i))
+            while i < last:
+                char = text[i]
+                cached = rows[state].get(char)
+                transition = step(state, char) if cached is None else cached
+                if transition & stop:
+                    break
+                state = transition >> 2
+                i += 1
+            else:
+                break
+            if transition & MATCHED:
+                end = i
+            state = transition >> 2
+            i += 1
+            if state == DEAD:
+                return end, i
+            if reach is not None:
+                # after a match only higher priority threads are left
+                while i < last and alive(dfa, state, reach[i]):
+                    char = text[i]
+                    cached = rows[state].get(char)
+                    transition = step(state, char) if cached is None else cached
+                    if transition & MATCHED:
+                        end = i
+                    state = transition >> 2
+                    i += 1
+                if i < last or not alive(dfa, state, reach[i]):
+                    return end, i
+
+        # the final newline and the end of the text
+        while True:
+            symbol = self._symbol(text, i)
+            transition = step(state, symbol)
+            if transition & MATCHED:
+                end = i
+            state = transition >> 2
+            if symbol is END or state == DEAD:
+                return end, i
+            i += 1
+
+    def _find_start(self, text: str, pos: int, end: int) -> int:
+        """Find the earliest start (not before `pos`) of a match ending at `end`."""
+        dfa = self.reverse
+        rows = dfa.rows
+        start = end
+        state = dfa.initial(_classify(self._symbol(text, end)))
+        i = end
+        while True:
+            symbol = END if i == 0 else self._symbol(text, i - 1)
+            transition = rows[state].get(symbol)
+            if transition is None:
+                transition = dfa.step(state, symbol)
+            if transition & MATCHED:
+                start = i
+            state = transition >> 2
+            if i == pos or state == DEAD:
+                return start
+            i -= 1
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int]]:
+        """Find all non-overlapping matches (the same ones as `re.finditer`).
+
+        Args:
+            text: Text to search.
+
+        Yields:
+            Match (start, end) offsets.
+        """
+        if not text:
+            # word boundaries never match in an empty string
+            yield from (match.span() for match in self.pattern.finditer(text))
+            return
+        pos = 0
+        must_advance = False
+        # text scanned past the end of matches (and scanned again for the next)
+        rescanned = 0
+        reach = None
+        reached = False  # was a `ReachDFA` run (it's given up on huge texts)
+        flushes = 0
+        while pos <= len(text):
+            if reach is not None and self.reach.flushes != flushes:
+                # another scan flushed the states (between two matches)
+                reach = None
+                reached = False
+            end, scanned = self._find_end(text, pos, must_advance, reach)
+            if end < 0:
+                return
+            start = self._find_start(text, pos, end)
+            yield start, end
+            must_advance = start == end
+            pos = end
+            rescanned += scanned - end
+            if not reached and rescanned > len(text):
+                # threads that can never match are keeping the scans going
+                # past each match, stop them so the text is scanned in linear
+                # time (instead of quadratic)
+                reach = self.reach.run(text)
+                reached = True
+                flushes = self.reach.flushes
+
+
+def _may_backtrack(items: Any, repeated: bool = False) -> bool:
+    """Check if a parsed pattern has nested repeats or repeated alternations."""
+    for op, av in items:
+        if op in REPEATS or op is _constants.POSSESSIVE_REPEAT:
+            high = av[1]
+            if repeated and high > 1:
+                return True
+            if _may_backtrack(av[2].data, repeated or high > 1):
+                return True
+        elif op is _constants.BRANCH:
+            if repeated or any(_may_backtrack(p.data, repeated) for p in av[1]):
+                return True
+        elif op is _constants.SUBPATTERN:
+            if _may_backtrack(av[3].data, repeated):
+                return True
+    return False
+
+
+@lru_cache(maxsize=32)
+def automaton_for(regex: str) -> Automaton | None:
+    """Get a linear time automaton for a pattern that could backtrack badly.
+
+    Patterns without nested repeats or repeated alternations can't backtrack
+    catastrophically and run much faster with `re`, so they (and patterns
+    outside of the regular subset) don't get an automaton.
+
+    Args:
+        regex: Regular expression string.
+
+    Raises:
+        re.error: If `regex` isn't a valid regular expression.
+
+    Returns:
+        The automaton, or None if `re` should be used.
+    """
+    re.compile(regex)
+    if not _may_backtrack(_parser.parse(regex).data):
+        return None
+    try:
+        return Automaton(regex)
+    except Unsupported:
+        return None
+
+
+def engine_for(regex: str) -> str:
+    """Get the name of the engine that matches a pattern.
+
+    Args:
+        regex: Regular expression string.
+
+    Returns:
+        `AUTOMATON` or `BACKTRACKING`.
+    """
+    try:
+        return BACKTRACKING if automaton_for(regex) is None else AUTOMATON
+    except re.error:
+        return BACKTRACKING
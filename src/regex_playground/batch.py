@@ -0,0 +1,185 @@
+import re
+import sys
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TextIO
+
+from .incremental import LINE_BOUNDED, match_extent
+from .patterns import FLAG_PATTERN, compile_pattern, compile_template, expand_template
+
+CHUNK_SIZE = 1 << 20  # characters read at a time
+
+
+def read_chunks(stream: TextIO, size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Read a text stream a chunk at a time.
+
+    Args:
+        stream: Text stream.
+        size: Characters per chunk. Defaults to `CHUNK_SIZE`.
+
+    Yields:
+        Chunks of text.
+    """
+    while chunk := stream.read(size):
+        yield chunk
+
+
+def stream_matches(
+    pattern: re.Pattern[str], chunks: Iterable[str]
+) -> Iterator[str | re.Match[str]]:
+    """Find regular expression matches in text that arrives a chunk at a time.
+
+    Matches are the same as `pattern.finditer` would find in the joined text.
+    Only text that could still be part of a match is kept between chunks, so
+    memory stays bounded for patterns whose matches have a maximum width or
+    can't span a newline (see `match_extent`). Other patterns are matched once
+    all the text has been read.
+
+    Args:
+        pattern: Compiled regular expression.
+        chunks: Text chunks.
+
+    Yields:
+        The text in order, unmatched text as strings and matched text as the
+        match objects (with offsets into a buffer, not the whole text).
+    """
+    extent = match_extent(pattern)
+    buffer = ""
+    pending: list[str] = []  # chunks read but not added to the buffer yet
+    pos = 0  # buffer offset to search from (everything before it is yielded)
+    last_match: tuple[int, int] | None = None  # in whole text offsets
+    base = 0  # whole text offset of the buffer start
+
+    def settled(final: bool) -> int:
+        # buffer offset before which a match attempt can't see past the buffer
+        if final:
+            return len(buffer) + 1
+        if extent is None:
+            return 0
+        if extent == LINE_BOUNDED:
+            return buffer.rfind("\n", 0, len(buffer) - 1) + 1
+        return max(0, len(buffer) - extent - 2)
+
+    chunk_iter = iter(chunks)
+    final = False
+    while not final:
+        chunk = next(chunk_iter, None)
+        if chunk is None:
+            final = True
+        else:
+            pending.append(chunk)
+            # nothing can settle until the end (or a newline) so don't copy the
+            # growing buffer for every chunk
+            if extent is None or extent == LINE_BOUNDED and "\n" not in chunk:
+                continue
+        buffer = "".join([buffer, *pending])
+        pending.clear()
+        limit = settled(final)
+        if limit <= pos:
+            continue
+
+        for match in pattern.finditer(buffer, pos):
+            start, end = match.span()
+            if start >= limit:
+                break
+            span = (base + start, base + end)
+            if start == end and span == last_match:
+                continue  # an empty match found again by a restarted search
+            if start > pos:
+                yield buffer[pos:start]
+            yield match
+            pos, last_match = end, span
+        if limit > pos and limit <= len(buffer):
+            yield buffer[pos:limit]
+            pos = limit
+
+        # keep one character before `pos` so anchors and \b see real context
+        if pos > 1:
+            cut = pos - 1
+            buffer = buffer[cut:]
+            base += cut
+            pos -= cut
+
+    if pos < len(buffer):
+        yield buffer[pos:]
+
+
+def run_batch(
+    regex: str,
+    substitution: str | None,
+    files: list[Path],
+    global_match: bool = True,
+    count_only: bool = False,
+    output: TextIO = sys.stdout,
+) -> int:
+    """Run a regular expression over files (or stdin) without the TUI.
+
+    Files that can't be read or decoded are reported on stderr and skipped.
+
+    Args:
+        regex: Regular expression string (including any inline flags).
+        substitution: Substitution expression string, print the substituted
+            text when given.
+        files: Files to read, stdin when empty or for a path of "-".
+        global_match: Should all matches be printed/substituted (only the first
+            when False). Defaults to True.
+        count_only: Only print the number of matches. Defaults to False.
+        output: Stream to write to. Defaults to stdout.
+
+    Raises:
+        re.error: If `regex` or `substitution` isn't valid.
+
+    Returns:
+        Exit code, 2 if a file couldn't be read, otherwise 0 if anything
+        matched and 1 if not.
+    """
+    # an expression of only flags matches nothing (same as the TUI)
+    pattern = compile_pattern(regex) if FLAG_PATTERN.sub("", regex) else None
+    parts = None
+    if pattern is not None and substitution is not None:
+        parts = compile_template(pattern, substitution)
+
+    total = 0
+    failed = False
+    for file in files or [Path("-")]:
+        try:
+            stream = sys.stdin if str(file) == "-" else file.open()
+        except OSError as e:
+            print(
+                f"regex-playground: error: {file}: {e.strerror or e}", file=sys.stderr
+            )
+            failed = True
+            continue
+        try:
+            count = 0
+            chunks = read_chunks(stream)
+            pieces = chunks if pattern is None else stream_matches(pattern, chunks)
+            for piece in pieces:
+                if isinstance(piece, str):
+                    if substitution is not None and not count_only:
+                        output.write(piece)
+                    continue
+                count += 1
+                if count_only or (count > 1 and not global_match):
+                    if substitution is not None and not count_only:
+                        output.write(piece.group())
+                    continue
+                if parts is not None:
+                    output.write(expand_template(parts, piece))
+                else:
+                    output.write(piece.group() + "\n")
+        except (OSError, UnicodeDecodeError) as e:
+            reason = e.strerror or e if isinstance(e, OSError) else e
+            print(f"regex-playground: error: {file}: {reason}", file=sys.stderr)
+            failed = True
+            continue
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        if count_only:
+            prefix = f"{file}:" if len(files) > 1 else ""
+            output.write(f"{prefix}{count}\n")
+        total += count
+    if failed:
+        return 2
+    return 0 if total else 1
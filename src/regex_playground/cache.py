@@ -0,0 +1,326 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+
+from .line_index import LineIndex
+from .mapped import MappedText, MatchIndex
+from .spans import SpanStore
+
+CACHE_SIZE = 512 * 1024 * 1024  # bytes of cached match indexes kept on disk
+CACHE_MIN_LENGTH = 1 << 20  # characters, smaller texts are faster to rescan
+HASH_CHUNK = 1 << 26  # characters (or bytes) hashed between progress reports
+STALE_AGE = 24 * 60 * 60  # seconds before a temporary file is left over
+
+HEADER = struct.Struct("<4sQQ")  # magic, number of items, text length
+SPANS_MAGIC = b"RPS1"
+LINES_MAGIC = b"RPL1"
+INDEX_MAGIC = b"RPI1"
+SESSION_FILE = "session.json"
+
+
+def default_cache_dir() -> Path:
+    """Get the directory the playground caches match indexes in.
+
+    Returns:
+        `$REGEX_PLAYGROUND_CACHE` if set, otherwise a `regex-playground`
+        directory within the platform's user cache directory.
+    """
+    if directory := os.environ.get("REGEX_PLAYGROUND_CACHE"):
+        return Path(directory)
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData/Local"))
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library/Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    return base / "regex-playground"
+
+
+def hash_content(text: str | MappedText) -> Generator[float, None, str]:
+    """Hash the content of a text (or memory mapped file) a chunk at a time.
+
+    Args:
+        text: Text or memory mapped file.
+
+    Yields:
+        The fraction of the content hashed.
+
+    Returns:
+        Hex digest of the content.
+    """
+    digest = hashlib.sha256()
+    if isinstance(text, MappedText):
+        # spans are byte offsets into mapped files so they're cached apart
+        digest.update(b"bytes\0")
+        size = text.size
+        for start in range(0, size, HASH_CHUNK):
+            digest.update(text.read(start, start + HASH_CHUNK))
+            yield min(start + HASH_CHUNK, size) / size
+    else:
+        digest.update(b"text\0")
+        size = len(text)
+        for start in range(0, size, HASH_CHUNK):
+            digest.update(
+                text[start : start + HASH_CHUNK].encode(errors="surrogatepass")
+            )
+            yield min(start + HASH_CHUNK, size) / size
+    return digest.hexdigest()
+
+
+def content_digest(text: str | MappedText) -> str:
+    """Hash the content of a text (or memory mapped file), see `hash_content`.
+
+    Args:
+        text: Text or memory mapped file.
+
+    Returns:
+        Hex digest of the content.
+    """
+    hashing = hash_content(text)
+    while True:
+        try:
+            next(hashing)
+        except StopIteration as stop:
+            return stop.value  # type: ignore[no-any-return]
+
+
+class MatchCache:
+    """Match spans and line indexes kept on disk between sessions.
+
+    Spans (and the match indexes of memory mapped files) are keyed by the
+    expression (inline flags included), the content digest of the text (see
+    `content_digest`) and the Python version (which decides how `re` matches),
+    line indexes by the content digest alone. Each
+    entry is a file of raw typed arrays. Once the entries add up to more than
+    `max_size` bytes, the least recently used ones are removed (along with the
+    temporary files of writes that were interrupted).
+
+    The last expression and substitution of a session are kept in the same
+    directory. Any error reading or writing the cache is ignored, the cache is
+    only ever a shortcut.
+    """
+
+    def __init__(self, directory: Path, max_size: int = CACHE_SIZE) -> None:
+        """Initialize the cache.
+
+        Args:
+            directory: Cache directory (created when something is stored).
+            max_size: Maximum total size of the entries in bytes. Defaults to
+                `CACHE_SIZE`.
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+    def _path(self, kind: str, *parts: str) -> Path:
+        key = "\0".join((f"{sys.version_info[:2]}", *parts))
+        digest = hashlib.sha256(key.encode(errors="surrogatepass"))
+        return self.directory / f"{digest.hexdigest()}.{kind}"
+
+    def _read(self, path: Path, magic: bytes) -> tuple[int, int, memoryview] | None:
+        """Read an entry, marking it as recently used.
+
+        Returns:
+            The number of items, the text length and the raw arrays, or None if
+            there's no (valid) entry.
+        """
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        found, count, length = HEADER.unpack_from(data)
+        if found != magic:
+            return None
+        return count, length, memoryview(data)[HEADER.size :]
+
+    def _write(self, path: Path, magic: bytes, length: int, *arrays: Any) -> None:
+        """Write an entry (atomically) and evict old entries if needed."""
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with temporary.open("wb") as f:
+                f.write(HEADER.pack(magic, len(arrays[0]), length))
+                for items in arrays:
+                    items.tofile(f)
+            os.replace(temporary, path)
+        except OSError:
+            try:
+                temporary.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def get_spans(self, regex: str, digest: str) -> SpanStore | None:
+        """Get the cached match spans of an expression in a text.
+
+        Args:
+            regex: Regular expression string.
+            digest: Content digest of the text.
+
+        Returns:
+            Match (start, end) offsets, or None if they aren't cached.
+        """
+        entry = self._read(self._path("spans", regex, digest), SPANS_MAGIC)
+        if entry is None:
+            return None
+        count, _, data = entry
+        spans = SpanStore()
+        size = count * spans.starts.itemsize
+        if len(data) != 2 * size:
+            return None
+        spans.starts.frombytes(data[:size])
+        spans.ends.frombytes(data[size:])
+        return spans
+
+    def put_spans(self, regex: str, digest: str, spans: SpanStore) -> None:
+        """Cache the match spans of an expression in a text.
+
+        Args:
+            regex: Regular expression string.
+            digest: Content digest of the text.
+            spans: Match (start, end) offsets.
+        """
+        path = self._path("spans", regex, digest)
+        self._write(path, SPANS_MAGIC, 0, spans.starts, spans.ends)
+
+    def get_index(self, regex: str, digest: str) -> MatchIndex | None:
+        """Get the cached match index of an expression in a memory mapped file.
+
+        Args:
+            regex: Regular expression string.
+            digest: Content digest of the file.
+
+        Returns:
+            The match index, or None if it isn't cached.
+        """
+        entry = self._read(self._path("index", regex, digest), INDEX_MAGIC)
+        if entry is None:
+            return None
+        checkpoints, count, data = entry
+        index = MatchIndex()
+        size = checkpoints * index.starts.itemsize
+        if len(data) != 3 * size:
+            return None
+        index.count = count
+        index.numbers.frombytes(data[:size])
+        index.starts.frombytes(data[size : 2 * size])
+        index.ends.frombytes(data[2 * size :])
+        return index
+
+    def put_index(self, regex: str, digest: str, index: MatchIndex) -> None:
+        """Cache the match index of an expression in a memory mapped file.
+
+        Args:
+            regex: Regular expression string.
+            digest: Content digest of the file.
+            index: Match index.
+        """
+        path = self._path("index", regex, digest)
+        arrays = (index.numbers, index.starts, index.ends)
+        self._write(path, INDEX_MAGIC, index.count, *arrays)
+
+    def get_line_index(self, digest: str) -> LineIndex | None:
+        """Get the cached line index of a text.
+
+        Args:
+            digest: Content digest of the text.
+
+        Returns:
+            The line index, or None if it isn't cached.
+        """
+        entry = self._read(self._path("lines", digest), LINES_MAGIC)
+        if entry is None:
+            return None
+        count, length, data = entry
+        line_starts = array("q")
+        if len(data) != count * line_starts.itemsize:
+            return None
+        line_starts.frombytes(data)
+        return LineIndex.from_starts(line_starts.tolist(), length)
+
+    def put_line_index(self, digest: str, line_index: LineIndex) -> None:
+        """Cache the line index of a text.
+
+        Args:
+            digest: Content digest of the text.
+            line_index: Line index of the text.
+        """
+        path = self._path("lines", digest)
+        line_starts = array("q", line_index.line_starts)
+        self._write(path, LINES_MAGIC, line_index.length, line_starts)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits.
+
+        Temporary files older than `STALE_AGE` (left by a process that was
+        stopped while writing) are removed too. Newer ones may still be
+        written by another process.
+        """
+        entries = []
+        stale = time.time() - STALE_AGE
+        try:
+            for path in self.directory.glob("*.*"):
+                if path.suffix not in (".spans", ".lines", ".index", ".tmp"):
+                    continue
+                try:
+                    stat = path.stat()
+                    if path.suffix == ".tmp":
+                        if stat.st_mtime < stale:
+                            path.unlink(missing_ok=True)
+                        continue
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                continue  # still there, remove the next one instead
+            total -= size
+
+    def load_session(self) -> dict[str, str]:
+        """Get the expression and substitution of the last session.
+
+        Returns:
+            The `regex` and `substitution` strings (empty if there's no
+            session).
+        """
+        session = {"regex": "", "substitution": ""}
+        try:
+            saved = json.loads((self.directory / SESSION_FILE).read_text())
+        except (OSError, ValueError):
+            return session
+        if isinstance(saved, dict):
+            for key in session:
+                if isinstance(saved.get(key), str):
+                    session[key] = saved[key]
+        return session
+
+    def save_session(self, regex: str, substitution: str) -> None:
+        """Remember the expression and substitution for the next session.
+
+        Args:
+            regex: Regular expression string.
+            substitution: Substitution expression string.
+        """
+        session = {"regex": regex, "substitution": substitution}
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / SESSION_FILE).write_text(json.dumps(session))
+        except OSError:
+            pass
@@ -1,10 +1,12 @@
+import re
 import sys
 from argparse import ArgumentParser, Namespace
 from collections.abc import Sequence
 from importlib.metadata import version
 from pathlib import Path
 
-from regex_playground import RegexPlayground
+from regex_playground.defaults import DEFAULT_TIMEOUT, FOLLOW_LINES
+from regex_playground.patterns import FLAG_PATTERN, toggle_flag
 
 
 def parse_args(argv: Sequence[str] | None = None) -> Namespace:
@@ -24,14 +26,111 @@ def parse_args(argv: Sequence[str] | None = None) -> Namespace:
         "file",
         type=Path,
         nargs="*",
-        help="text to load into the playground",
+        help="text files (or directories) to load into the playground",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=int(DEFAULT_TIMEOUT * 1000),
+        metavar="MS",
+        help="matching time budget in milliseconds (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-f",
+        "--follow",
+        action="store_true",
+        help="follow the (first) file as it grows, matching new lines as they're "
+        "written",
+    )
+    parser.add_argument(
+        "--retain",
+        type=int,
+        default=FOLLOW_LINES,
+        metavar="LINES",
+        help="lines of a followed file to keep (default: %(default)s)",
+    )
+    batch = parser.add_argument_group(
+        "batch mode", "run an expression over the files (or stdin) without the TUI"
+    )
+    batch.add_argument(
+        "--batch",
+        action="store_true",
+        help="print matches (or substituted text) instead of starting the TUI",
+    )
+    batch.add_argument("-e", "--regex", help="regular expression to match")
+    batch.add_argument(
+        "-s",
+        "--sub",
+        help="substitution expression, print the substituted text",
+    )
+    batch.add_argument(
+        "--flags",
+        default="",
+        metavar="LETTERS",
+        help="inline flags to turn on (e.g. 'im' for (?im))",
+    )
+    batch.add_argument(
+        "--count", action="store_true", help="only print the number of matches"
+    )
+    batch.add_argument(
+        "--first",
+        action="store_true",
+        help="only print/substitute the first match (global toggle off)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="don't cache match indexes on disk or restore the last session",
     )
     parser.add_argument(
         "--version",
         action="version",
         version=f"%(prog)s {version('regex_playground')}",
     )
-    return parser.parse_args(argv)
+    args = parser.parse_args(argv)
+    if args.batch and args.regex is None:
+        parser.error("--batch requires --regex")
+    if args.follow and args.batch:
+        parser.error("--follow can't be used with --batch")
+    if args.follow and not args.file:
+        parser.error("--follow requires a file")
+    if args.timeout < 1:
+        parser.error("--timeout must be at least 1")
+    if args.retain < 1:
+        parser.error("--retain must be at least 1")
+    if invalid := set(args.flags) - set("aiLmsux"):
+        parser.error(f"invalid flags: {''.join(sorted(invalid))}")
+    return args
+
+
+def run_batch_mode(args: Namespace) -> int:
+    """Run the batch mode with the parsed command line arguments.
+
+    Args:
+        args: Parsed arguments.
+
+    Returns:
+        Exit code.
+    """
+    from regex_playground.batch import run_batch
+    from regex_playground.search import collect_files
+
+    regex = args.regex
+    for letter in args.flags:
+        current_flags = FLAG_PATTERN.match(regex)
+        if current_flags is None or letter not in current_flags.group(1):
+            regex = toggle_flag(regex, letter)
+    try:
+        return run_batch(
+            regex,
+            args.sub,
+            collect_files(args.file),
+            global_match=not args.first,
+            count_only=args.count,
+        )
+    except re.error as e:
+        print(f"regex-playground: error: {e}", file=sys.stderr)
+        return 2
 
 
 def main(argv: Sequence[str] | None = None) -> int:
@@ -44,11 +143,20 @@ def main(argv: Sequence[str] | None = None) -> int:
         Exit code.
     """
     args = parse_args(argv)
+    if args.batch:
+        return run_batch_mode(args)
+
+    # the TUI takes a while to import so `--version` and batch mode skip it
+    from regex_playground import RegexPlayground
+    from regex_playground.cache import MatchCache, default_cache_dir
+    from regex_playground.search import collect_files
 
-    app = RegexPlayground()
+    cache = None if args.no_cache else MatchCache(default_cache_dir())
+    app = RegexPlayground(
+        match_timeout=args.timeout / 1000, cache=cache, follow_lines=args.retain
+    )
     if args.file:
-        file = args.file[0]
-        app.load_file(file)
+        app.load_files(collect_files(args.file), follow=args.follow)
     else:
         text = Path(__file__).parent.joinpath("zen.txt").read_text()
         app.load_text(text)
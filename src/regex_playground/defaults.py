@@ -0,0 +1,3 @@
+# defaults the command line needs without importing the modules that use them
+DEFAULT_TIMEOUT = 1.0  # seconds a matching job may run (see `MatchWorker`)
+FOLLOW_LINES = 10_000  # lines of a followed file kept in the text panel
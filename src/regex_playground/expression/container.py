@@ -4,13 +4,15 @@ from textual.containers import Container, Horizontal
 from textual.events import DescendantBlur
 from textual.widgets import Label
 
+from ..automaton import AUTOMATON
+from ..match_list import MatchList
 from ..text_inputs import TextInput
 from .flags import Flags
 from .regex_input import RegexInput, ValidRegex
 
 
 class ExpressionContainer(Container):
-    """A custom container for the `RegexInput`, `Flags`, and `TextInput` elements."""
+    """A custom container for the `RegexInput`, `Flags`, `TextInput` and `MatchList`."""
 
     def compose(self) -> ComposeResult:
         """Create child widgets for the container."""
@@ -21,14 +23,38 @@ class ExpressionContainer(Container):
                 id="regex-input",
             )
             yield Label("", id="matches-alert")
+            yield Label("", id="timeout-alert", classes="-hidden")
         yield Flags(id="flags")
-        yield TextInput(id="text-input")
+        with Container(id="text-input-container"):
+            text_input = TextInput(id="text-input")
+            yield text_input
+            yield MatchList(text_input, id="match-list")
 
     @on(TextInput.MatchesFound)
     def updated_substitutions_alert(self, message: TextInput.MatchesFound) -> None:
         matches_alert = self.query_one("#matches-alert", Label)
-        msg = f"{message.count} matches" if message.count else ""
+        msg = f"{message.count:,} matches" if message.count else ""
+        if message.progress is not None:
+            msg = f"{message.count:,} matches… scanning {message.progress:.0%}"
+        if msg and message.engine == AUTOMATON:
+            msg += " · linear-time engine"
         matches_alert.update(msg)
+        timeout_alert = self.query_one("#timeout-alert", Label)
+        timeout_alert.update("")
+        timeout_alert.add_class("-hidden")
+        self.query_one("#match-list", MatchList).refresh_matches()
+
+    @on(TextInput.MatchSelected)
+    def show_selected_match(self, message: TextInput.MatchSelected) -> None:
+        """Show which match is selected (in the match count and the list)."""
+        matches_alert = self.query_one("#matches-alert", Label)
+        matches_alert.update(f"match {message.index + 1:,} of {message.count:,}")
+        self.query_one("#match-list", MatchList).cursor = message.index
+
+    @on(MatchList.Selected)
+    def go_to_match(self, message: MatchList.Selected) -> None:
+        """Select the match picked from the list in the text."""
+        self.query_one("#text-input", TextInput).select_match(message.index)
 
     @on(DescendantBlur, "#text-input")
     def hide_cursor(self, event: DescendantBlur):
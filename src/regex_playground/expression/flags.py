@@ -1,4 +1,3 @@
-import re
 from dataclasses import dataclass
 
 from textual.app import ComposeResult
@@ -8,7 +7,7 @@ from textual.message import Message
 from textual.reactive import reactive
 from textual.widgets import Label
 
-FLAG_PATTERN = re.compile(r"\(\?([a,i,L,m,s,u,x]*?)\)")
+from ..patterns import FLAG_PATTERN
 
 
 class Flag(Label, can_focus=True):  # type: ignore[call-arg]
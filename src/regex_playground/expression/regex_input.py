@@ -4,17 +4,36 @@ from textual.binding import Binding
 from textual.validation import ValidationResult, Validator
 from textual.widgets import Input
 
+from ..automaton import AUTOMATON, engine_for
+from ..patterns import compile_pattern
+from ..redos import find_backtracking
+
 
 class ValidRegex(Validator):
-    """Custom regular expression string validator."""
+    """Custom regular expression string validator.
+
+    Valid expressions are also checked for constructs that could backtrack
+    catastrophically (see `find_backtracking`). They still pass validation but
+    the problem found is kept in `warning`.
+    """
+
+    warning: str | None = None
 
     def validate(self, value: str) -> ValidationResult:
         """Check if `value` is a valid regular expression."""
         try:
-            re.compile(value)
-            return self.success()
+            compile_pattern(value)
         except re.error as e:
+            self.warning = None
             return self.failure(e.msg)
+        problem = find_backtracking(value)
+        if problem is None:
+            self.warning = None
+        else:
+            self.warning = f"Possible catastrophic backtracking: {problem}."
+            if engine_for(value) == AUTOMATON:
+                self.warning += " The playground matches it in linear time, `re` won't."
+        return self.success()
 
 
 class RegexInput(Input):
@@ -32,6 +51,14 @@ class RegexInput(Input):
             return False
         return True
 
+    @property
+    def warning(self) -> str | None:
+        """Warning about the current value (see `ValidRegex`)."""
+        for validator in self.validators:
+            if isinstance(validator, ValidRegex):
+                return validator.warning
+        return None
+
     def action_reset(self) -> None:
         """Reset the input."""
         self.value = ""
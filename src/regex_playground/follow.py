@@ -0,0 +1,128 @@
+import os
+from pathlib import Path
+
+FOLLOW_INTERVAL = 0.5  # seconds between checks of a followed file for new lines
+READ_LIMIT = 1 << 22  # bytes read from a followed file at a time
+
+
+def count_lines(path: Path, end: int) -> int:
+    """Count the lines of a file before a byte offset.
+
+    This reads the file up to `end`, so for a large file it's run in a thread.
+
+    Args:
+        path: File path.
+        end: Byte offset to count the lines before.
+
+    Raises:
+        OSError: If the file can't be read.
+
+    Returns:
+        Number of newlines before `end`.
+    """
+    count = 0
+    with path.open("rb") as f:
+        for block in range(0, end, READ_LIMIT):
+            count += f.read(min(READ_LIMIT, end - block)).count(b"\n")
+    return count
+
+
+class FileReplaced(Exception):
+    """Raised when a followed file was truncated or replaced (e.g. rotated)."""
+
+
+class FileFollower:
+    """Read the lines appended to a growing file, like `tail -f`.
+
+    Only complete lines are returned. The bytes of a line still being written
+    are kept until its newline arrives, so a match never has to be found in
+    half a line (and a multi-byte character is never split between reads).
+    """
+
+    def __init__(self, path: Path, encoding: str = "utf-8") -> None:
+        """Open the file to follow.
+
+        Args:
+            path: File path.
+            encoding: Text encoding of the file. Defaults to "utf-8".
+        """
+        self.path = path
+        self.encoding = encoding
+        self._file = path.open("rb", buffering=0)
+        stat = os.fstat(self._file.fileno())
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._partial = b""  # start of a line still being written
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+    def tail(self, lines: int) -> tuple[int, str]:
+        """Read the last complete lines of the file and follow it from there on.
+
+        Args:
+            lines: Maximum number of lines to read.
+
+        Returns:
+            The byte offset of the lines read (see `count_lines`) and the lines
+            read.
+        """
+        f = self._file
+        size = os.fstat(f.fileno()).st_size
+        # read backwards until there's a newline before the lines to keep
+        start = size
+        data = b""
+        while start and data.count(b"\n") <= lines:
+            block = max(0, start - READ_LIMIT)
+            f.seek(block)
+            data = f.read(start - block) + data
+            start = block
+
+        end = data.rfind(b"\n") + 1
+        self._partial = data[end:]
+        cut = end
+        for _ in range(lines):
+            if not cut:
+                break
+            cut = data.rfind(b"\n", 0, cut - 1) + 1
+        f.seek(size)
+        return start + cut, self._decode(data[cut:end])
+
+    def read(self) -> str:
+        """Read the lines appended to the file since the last read.
+
+        At most `READ_LIMIT` bytes are read at once, the rest is left for the
+        next read. A line longer than that is returned in pieces.
+
+        Raises:
+            FileReplaced: If the file was truncated or replaced since it was
+                read last (once everything written to it before was read).
+            OSError: If the file can't be read.
+
+        Returns:
+            The new complete lines (empty if there are none).
+        """
+        data = self._file.read(READ_LIMIT)
+        if not data:
+            if self._replaced():
+                raise FileReplaced(self.path)
+            return ""
+        data = self._partial + data
+        end = data.rfind(b"\n") + 1
+        if not end and len(data) >= READ_LIMIT:
+            end = len(data)  # keep the memory held for a single line bounded
+        self._partial = data[end:]
+        return self._decode(data[:end])
+
+    def _replaced(self) -> bool:
+        """Check if the path now leads to another file, or a truncated one."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False  # moved away but not recreated (yet)
+        if (stat.st_dev, stat.st_ino) != self._identity:
+            return True
+        return stat.st_size < self._file.tell()
+
+    def _decode(self, data: bytes) -> str:
+        return data.decode(self.encoding, errors="replace")
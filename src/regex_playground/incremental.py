@@ -0,0 +1,232 @@
+import re
+from bisect import bisect_left, bisect_right
+from re import _constants, _parser  # type: ignore[attr-defined]
+from typing import Any
+
+from .spans import SpanStore
+
+TextEdit = tuple[int, int, int]  # (start, old end, new end) offsets of a replaced range
+
+LINE_BOUNDED = -1  # a match can be any length but can never span a newline
+
+
+def combine_edits(first: TextEdit | None, second: TextEdit) -> TextEdit:
+    """Combine two consecutive edits into one edit covering both.
+
+    Args:
+        first: Earlier edit (offsets into the original text), or None.
+        second: Later edit (offsets into the text after `first`).
+
+    Returns:
+        Single edit taking the original text to the text after `second`.
+    """
+    if first is None:
+        return second
+    start, old_end, new_end = first
+    second_start, second_old_end, second_new_end = second
+
+    # map the end of the second edit back into original offsets
+    original_end = second_old_end
+    if second_old_end >= new_end:
+        original_end -= new_end - old_end
+    elif second_old_end > start:
+        original_end = old_end
+
+    # map the end of the first edit forward past the second edit
+    final_end = new_end
+    if new_end >= second_old_end:
+        final_end += second_new_end - second_old_end
+    elif new_end > second_start:
+        final_end = second_new_end
+
+    return (
+        min(start, second_start),
+        max(old_end, original_end),
+        max(final_end, second_new_end),
+    )
+
+
+def _can_match_newline(subpattern: Any, dotall: bool) -> bool:
+    """Check if any character matched by a parsed pattern could be a newline."""
+    for op, av in subpattern:
+        if op is _constants.LITERAL:
+            if av == 10:
+                return True
+        elif op is _constants.NOT_LITERAL:
+            if av != 10:
+                return True
+        elif op is _constants.ANY:
+            if dotall:
+                return True
+        elif op is _constants.IN:
+            negate = False
+            found = False
+            for item_op, item_av in av:
+                if item_op is _constants.NEGATE:
+                    negate = True
+                elif item_op is _constants.LITERAL:
+                    found = found or item_av == 10
+                elif item_op is _constants.RANGE:
+                    found = found or item_av[0] <= 10 <= item_av[1]
+                elif item_op is _constants.CATEGORY:
+                    name = str(item_av)
+                    is_space = "SPACE" in name or "LINEBREAK" in name
+                    found = found or is_space != ("NOT" in name)
+                else:
+                    found = True
+            if found != negate:
+                return True
+        elif op is _constants.SUBPATTERN:
+            _, add_flags, del_flags, p = av
+            scoped_dotall = dotall
+            if add_flags & re.DOTALL:
+                scoped_dotall = True
+            if del_flags & re.DOTALL:
+                scoped_dotall = False
+            if _can_match_newline(p, scoped_dotall):
+                return True
+        elif op is _constants.BRANCH:
+            if any(_can_match_newline(p, dotall) for p in av[1]):
+                return True
+        elif op in (
+            _constants.MAX_REPEAT,
+            _constants.MIN_REPEAT,
+            _constants.POSSESSIVE_REPEAT,
+        ):
+            if _can_match_newline(av[2], dotall):
+                return True
+        elif op is _constants.ATOMIC_GROUP:
+            if _can_match_newline(av, dotall):
+                return True
+        elif op is _constants.GROUPREF_EXISTS:
+            if _can_match_newline(av[1], dotall) or (
+                av[2] is not None and _can_match_newline(av[2], dotall)
+            ):
+                return True
+    return False
+
+
+def _has_lookaround(subpattern: Any) -> bool:
+    """Check if a parsed pattern contains any lookahead or lookbehind assertions."""
+    for op, av in subpattern:
+        if op in (_constants.ASSERT, _constants.ASSERT_NOT):
+            return True
+        if op is _constants.SUBPATTERN:
+            children = [av[3]]
+        elif op is _constants.BRANCH:
+            children = av[1]
+        elif op in (
+            _constants.MAX_REPEAT,
+            _constants.MIN_REPEAT,
+            _constants.POSSESSIVE_REPEAT,
+        ):
+            children = [av[2]]
+        elif op is _constants.ATOMIC_GROUP:
+            children = [av]
+        elif op is _constants.GROUPREF_EXISTS:
+            children = [p for p in av[1:] if p is not None]
+        else:
+            continue
+        if any(_has_lookaround(child) for child in children):
+            return True
+    return False
+
+
+def match_extent(pattern: re.Pattern[str]) -> int | None:
+    """Work out how far past its start position a match attempt can look.
+
+    Args:
+        pattern: Compiled regular expression.
+
+    Returns:
+        The maximum match width, `LINE_BOUNDED` if matches are unbounded but
+        can't span a newline, or None if an edit can affect matches anywhere
+        (unbounded multiline matches or lookaround assertions).
+    """
+    parsed = _parser.parse(pattern.pattern, pattern.flags)
+    if _has_lookaround(parsed):
+        return None
+    _, width = parsed.getwidth()
+    if width < _constants.MAXREPEAT:
+        return int(width)
+    if not _can_match_newline(parsed, bool(parsed.state.flags & re.DOTALL)):
+        return LINE_BOUNDED
+    return None
+
+
+def rematch(
+    pattern: re.Pattern[str],
+    text: str,
+    spans: SpanStore,
+    edit: TextEdit,
+    extent: int,
+) -> SpanStore:
+    """Update match spans after an edit by only rescanning around the edit.
+
+    Matches far enough before the edit are kept, the text is rescanned from
+    just before the edit until the new scan lines back up with the old one,
+    and the rest of the old matches are reused with their offsets shifted.
+
+    Args:
+        pattern: Compiled regular expression.
+        text: Text after the edit.
+        spans: Match spans of `pattern` in the text before the edit.
+        edit: The edited range.
+        extent: How far a match attempt can look (see `match_extent`).
+
+    Returns:
+        Match spans of `pattern` in `text`.
+    """
+    start, old_end, new_end = edit
+    delta = new_end - old_end
+
+    # keep matches whose attempts couldn't have seen the edited text
+    if extent == LINE_BOUNDED:
+        line_start = text.rfind("\n", 0, start)
+        left = text.rfind("\n", 0, max(line_start, 0)) + 1
+    else:
+        left = start - extent - 2
+    starts, ends = spans.starts, spans.ends
+    keep = bisect_left(starts, left)
+    result = spans[:keep]
+
+    # rescan from a position where the old scan was starting a fresh attempt
+    pos = max(left, 0)
+    if result:
+        last_start, last_end = result[-1]
+        pos = max(pos, last_end if last_end > last_start else last_end + 1)
+
+    def window_end(position: int) -> int:
+        if extent == LINE_BOUNDED:
+            newline = text.find("\n", position)
+            return len(text) if newline < 0 else min(len(text), newline + 2)
+        return min(len(text), position + extent + 2)
+
+    def scan(end: int, stop: int) -> None:
+        nonlocal pos
+        for match in pattern.finditer(text, pos, end):
+            match_start, match_end = match.span()
+            if match_start >= stop:
+                break
+            if match_start == match_end and result and result[-1] == match.span():
+                continue
+            result.append(match_start, match_end)
+            pos = match_end
+
+    # find a point after the edit where both scans are starting fresh attempts
+    q = max(new_end + 1, pos)
+    while q <= len(text):
+        scan(window_end(q), q)
+        if result and result[-1][1] > q:
+            q = result[-1][1]
+            continue
+        old_q = q - delta
+        i = bisect_right(starts, old_q) - 1
+        if i >= 0 and starts[i] < old_q < ends[i]:
+            q = ends[i] + delta
+            continue
+        result.extend(spans[bisect_left(starts, old_q) :], delta)
+        return result
+
+    scan(len(text), len(text) + 1)
+    return result
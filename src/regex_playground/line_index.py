@@ -0,0 +1,116 @@
+from bisect import bisect_right
+from collections.abc import Iterable
+from itertools import accumulate
+
+
+class LineIndex:
+    """Line start offsets for a block of text.
+
+    Built once per version of the text and queried with bisection to convert
+    string offsets into (row, column) locations without copying the text.
+    """
+
+    def __init__(self, text: str) -> None:
+        """Initialize the index.
+
+        Args:
+            text: Text to index.
+        """
+        lines = text.split("\n")
+        self.line_starts: list[int] = [0]
+        self.line_starts.extend(accumulate(len(line) + 1 for line in lines[:-1]))
+        self.length = len(text)
+
+    @classmethod
+    def from_starts(cls, line_starts: list[int], length: int) -> "LineIndex":
+        """Build an index from line start offsets (e.g. a cached index).
+
+        Args:
+            line_starts: Start offset of each line.
+            length: Length of the text.
+
+        Returns:
+            The line index.
+        """
+        line_index = cls("")
+        line_index.line_starts = line_starts
+        line_index.length = length
+        return line_index
+
+    def __len__(self) -> int:
+        return len(self.line_starts)
+
+    def row(self, offset: int) -> int:
+        """Get the row containing a string offset.
+
+        Args:
+            offset: String offset.
+
+        Returns:
+            Row index.
+        """
+        return bisect_right(self.line_starts, offset) - 1
+
+    def location(self, offset: int) -> tuple[int, int]:
+        """Convert a string offset into a (row, column) location.
+
+        Args:
+            offset: String offset.
+
+        Returns:
+            Row and column for the offset.
+        """
+        row = bisect_right(self.line_starts, offset) - 1
+        return row, offset - self.line_starts[row]
+
+    def offset(self, location: tuple[int, int]) -> int:
+        """Convert a (row, column) location into a string offset.
+
+        Args:
+            location: Row and column.
+
+        Returns:
+            String offset for the location.
+        """
+        row, column = location
+        return self.line_starts[row] + column
+
+    def apply_edit(self, start: int, end: int, text: str) -> None:
+        """Update the index after the range `start`-`end` is replaced by `text`.
+
+        Args:
+            start: Start offset of the replaced range.
+            end: End offset of the replaced range.
+            text: Replacement text.
+        """
+        starts = self.line_starts
+        delta = len(text) - (end - start)
+        first = bisect_right(starts, start)
+        last = bisect_right(starts, end)
+        inserted = [start + i + 1 for i, char in enumerate(text) if char == "\n"]
+        starts[first:] = inserted + [offset + delta for offset in starts[last:]]
+        self.length += delta
+
+    def apply_edits(self, edits: Iterable[tuple[int, int, str]]) -> None:
+        """Update the index after several ranges are replaced, in a single pass.
+
+        Args:
+            edits: Replaced (start, end) ranges and their replacement text, in
+                order, not overlapping and with offsets into the text before
+                any of them were replaced.
+        """
+        starts = self.line_starts
+        line_starts: list[int] = []
+        delta = 0
+        last = 0
+        for start, end, text in edits:
+            first = bisect_right(starts, start)
+            line_starts.extend(offset + delta for offset in starts[last:first])
+            line_starts.extend(
+                start + delta + i + 1 for i, char in enumerate(text) if char == "\n"
+            )
+            last = bisect_right(starts, end)
+            delta += len(text) - (end - start)
+        line_starts.extend(offset + delta for offset in starts[last:])
+        self.line_starts = line_starts
+        self.length += delta
@@ -0,0 +1,334 @@
+import mmap
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from pathlib import Path
+from re import _constants, _parser  # type: ignore[attr-defined]
+from typing import Any
+
+from .spans import SpanStore
+
+MAPPED_THRESHOLD = 64 * 1024 * 1024  # bytes, larger files are memory mapped
+WINDOW_ROWS = 1000  # rows of a memory mapped file decoded for display at once
+CHECKPOINT_MATCHES = 1024  # matches between the checkpoints of a `MatchIndex`
+CHECKPOINT_BYTES = 1 << 20  # bytes the matches of a checkpoint start within
+
+
+class NonAsciiPattern(re.error):
+    """Raised when a pattern for a memory mapped file has non-ASCII characters."""
+
+
+def _non_ascii(items: Any) -> bool:
+    """Check if parsed bytes pattern items match a byte above 127 by value."""
+    for op, av in items:
+        if op is _constants.LITERAL or op is _constants.NOT_LITERAL:
+            found = av > 127
+        elif op is _constants.RANGE:
+            found = av[1] > 127
+        elif op is _constants.IN:
+            found = _non_ascii(av)
+        elif op is _constants.BRANCH:
+            found = any(_non_ascii(branch.data) for branch in av[1])
+        else:
+            values = av if isinstance(av, tuple) else (av,)
+            found = any(
+                isinstance(value, _parser.SubPattern) and _non_ascii(value.data)
+                for value in values
+            )
+        if found:
+            return True
+    return False
+
+
+class MappedText:
+    """A read-only, memory mapped text file.
+
+    Only a sparse line index (the row at the start of each chunk of bytes) is
+    kept in memory. Rows are located by scanning the mapped bytes of a single
+    chunk and text is only decoded for the rows that are asked for, so files
+    larger than available memory can be searched and displayed.
+    """
+
+    CHUNK_SIZE = 1 << 20  # bytes
+
+    def __init__(self, path: Path, encoding: str = "utf-8") -> None:
+        """Initialize the mapping.
+
+        Args:
+            path: File path (the file must not be empty).
+            encoding: Text encoding of the file. Defaults to "utf-8".
+        """
+        self.path = path
+        self.encoding = encoding
+        self._open()
+
+        buffer = self._buffer
+        chunk_size = self.CHUNK_SIZE
+        self.chunk_rows = array("Q", [0])
+        for start in range(0, self.size, chunk_size):
+            newlines = buffer[start : start + chunk_size].count(b"\n")
+            self.chunk_rows.append(self.chunk_rows[-1] + newlines)
+
+    def _open(self) -> None:
+        self._file = self.path.open("rb")
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self._buffer)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # the mapping itself can't be pickled so it is reopened when unpickled
+        state = self.__dict__.copy()
+        del state["_file"], state["_buffer"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._open()
+
+    @property
+    def line_count(self) -> int:
+        """Number of rows in the file."""
+        return self.chunk_rows[-1] + 1
+
+    def close(self) -> None:
+        """Close the mapping."""
+        self._buffer.close()
+        self._file.close()
+
+    def read(self, start: int, end: int) -> bytes:
+        """Read a range of the file.
+
+        Args:
+            start: Start byte offset.
+            end: End byte offset.
+
+        Returns:
+            The bytes of the range.
+        """
+        return self._buffer[start:end]
+
+    def row(self, offset: int) -> int:
+        """Get the row containing a byte offset.
+
+        Args:
+            offset: Byte offset.
+
+        Returns:
+            Row index.
+        """
+        chunk = min(offset, self.size) // self.CHUNK_SIZE
+        start = chunk * self.CHUNK_SIZE
+        return self.chunk_rows[chunk] + self._buffer[start:offset].count(b"\n")
+
+    def line_offset(self, row: int) -> int:
+        """Get the byte offset a row starts at.
+
+        Args:
+            row: Row index.
+
+        Returns:
+            Byte offset of the row start (the file size past the last row).
+        """
+        if row <= 0:
+            return 0
+        if row >= self.line_count:
+            return self.size
+        # the newline ending the previous row is in the last chunk starting before
+        chunk = bisect_left(self.chunk_rows, row) - 1
+        offset = chunk * self.CHUNK_SIZE - 1
+        find = self._buffer.find
+        for _ in range(row - self.chunk_rows[chunk]):
+            offset = find(b"\n", offset + 1)
+        return offset + 1
+
+    def window(self, top: int, bottom: int) -> tuple[int, int, str]:
+        """Decode a range of rows.
+
+        Args:
+            top: First row.
+            bottom: Row after the last row.
+
+        Returns:
+            The start and end byte offsets of the rows and their text.
+        """
+        start = self.line_offset(top)
+        end = self.line_offset(bottom)
+        if bottom < self.line_count:
+            end -= 1  # leave off the newline ending the last row
+        text = self._buffer[start:end].decode(self.encoding, errors="replace")
+        return start, end, text
+
+    @property
+    def buffer(self) -> mmap.mmap:
+        """The mapped bytes of the file."""
+        return self._buffer
+
+    def compile(self, regex: str) -> re.Pattern[bytes]:
+        """Compile a regular expression to search the file with.
+
+        The expression is compiled as a bytes pattern so it can run over the
+        mapping directly without decoding the file. A bytes pattern matches a
+        non-ASCII character as a sequence of bytes, so a character class or
+        repeat of one (or a case-insensitive one) would match single bytes of
+        it. Expressions with non-ASCII characters (or escapes of bytes above
+        127) are rejected instead of finding parts of characters.
+
+        Args:
+            regex: Regular expression string.
+
+        Raises:
+            NonAsciiPattern: If `regex` has non-ASCII characters.
+            re.error: If `regex` isn't valid as a bytes pattern.
+
+        Returns:
+            Compiled bytes pattern.
+        """
+        encoded = regex.encode(self.encoding)
+        if _non_ascii(_parser.parse(encoded)):
+            raise NonAsciiPattern(
+                "non-ASCII characters can't be matched in a memory mapped file"
+            )
+        return re.compile(encoded)
+
+    def finditer(self, regex: str, pos: int = 0) -> Iterator[re.Match[bytes]]:
+        """Find all regular expression matches in the file (see `compile`).
+
+        Args:
+            regex: Regular expression string.
+            pos: Byte offset to search from (the bytes before it are still
+                seen by anchors and lookbehinds). Defaults to 0.
+
+        Raises:
+            NonAsciiPattern: If `regex` has non-ASCII characters.
+            re.error: If `regex` isn't valid as a bytes pattern.
+
+        Returns:
+            Matches (with byte offsets).
+        """
+        return self.compile(regex).finditer(self._buffer, pos)
+
+    def char_spans(self, start: int, end: int, spans: SpanStore) -> SpanStore:
+        """Convert byte spans within a window into string offsets of its text.
+
+        Args:
+            start: Start byte offset of the window.
+            end: End byte offset of the window.
+            spans: Sorted (start, end) byte offsets relative to `start`.
+
+        Returns:
+            The spans as offsets into the decoded window text.
+        """
+        data = self._buffer[start:end]
+        if data.isascii():
+            return spans
+
+        # spans don't overlap so their offsets can be converted in one pass
+        last_byte = last_char = 0
+
+        def convert(offset: int) -> int:
+            nonlocal last_byte, last_char
+            piece = data[last_byte:offset]
+            last_char += len(piece.decode(self.encoding, errors="replace"))
+            last_byte = offset
+            return last_char
+
+        result = SpanStore()
+        for first, last in spans:
+            result.append(convert(first), convert(last))
+        return result
+
+
+class MatchIndex:
+    """Sparse index of the matches of an expression in a memory mapped file.
+
+    The spans of every match in a file larger than memory could take more
+    memory than there is, so only the number of matches and a checkpoint every
+    `CHECKPOINT_MATCHES` matches (or sooner, once a match starts more than
+    `CHECKPOINT_BYTES` after the last checkpoint) are kept. A checkpoint is the
+    number and start of a match and the end of the last match before the next
+    checkpoint. The matches within a window of the file are found again by
+    searching from the checkpoint before it (see `window`).
+    """
+
+    __slots__ = ("count", "numbers", "starts", "ends", "_last")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.numbers = array("q")  # number of the match at each checkpoint
+        self.starts = array("q")  # start offset of that match
+        self.ends = array("q")  # end offset of the last match before the next
+        self._last = (-1, -1)  # span of the last match added
+
+    def add(self, start: int, end: int) -> None:
+        """Add the next match.
+
+        Args:
+            start: Start byte offset.
+            end: End byte offset.
+        """
+        starts = self.starts
+        # a search from an empty match would find it again, so it can't be
+        # followed by a checkpoint at the same offset
+        if (
+            not starts
+            or self.count - self.numbers[-1] >= CHECKPOINT_MATCHES
+            or start - starts[-1] > CHECKPOINT_BYTES
+        ) and self._last != (start, start):
+            self.numbers.append(self.count)
+            starts.append(start)
+            self.ends.append(end)
+        else:
+            self.ends[-1] = end
+        self.count += 1
+        self._last = (start, end)
+
+    def window(
+        self, mapped: MappedText, regex: str, start: int, end: int, count: int = 0
+    ) -> SpanStore:
+        """Find the matches within a window of the file again.
+
+        The search starts at the last checkpoint at or before the window (or the
+        next one if none of its matches reach the window) and stops once it's
+        past the window, or at the next checkpoint if that's past the window,
+        so it never searches through more than about `CHECKPOINT_BYTES` bytes
+        outside the window.
+
+        Args:
+            mapped: The memory mapped file the index is for.
+            regex: Regular expression string the index is for.
+            start: Start byte offset of the window.
+            end: End byte offset of the window.
+            count: Only find the first `count` matches (0 for all). Defaults to
+                0.
+
+        Returns:
+            The spans of the matches within the window, clipped to it and
+            relative to its start.
+        """
+        spans = SpanStore()
+        numbers, starts, ends = self.numbers, self.starts, self.ends
+        limit = min(count, self.count) if count else self.count
+        checkpoint = max(0, bisect_right(starts, start) - 1)
+        if checkpoint < len(ends) and ends[checkpoint] < start:
+            checkpoint += 1
+        if checkpoint >= len(numbers) or numbers[checkpoint] >= limit:
+            return spans
+
+        number = numbers[checkpoint]
+        following = checkpoint + 1
+        for match in mapped.finditer(regex, starts[checkpoint]):
+            match_start, match_end = match.span()
+            if match_start >= end:
+                break
+            if match_end > start or match_start == start:
+                spans.append(
+                    max(match_start, start) - start, min(match_end, end) - start
+                )
+            number += 1
+            if number >= limit:
+                break
+            if following < len(numbers) and number == numbers[following]:
+                if starts[following] >= end:
+                    break  # don't search the gap before it
+                following += 1
+        return spans
@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+
+from rich.segment import Segment
+from textual.binding import Binding
+from textual.events import Click
+from textual.geometry import Size
+from textual.message import Message
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+from .text_inputs import TextInput
+
+CONTEXT = 12  # characters shown before a match
+
+
+class MatchList(ScrollView, can_focus=True):
+    """A list of the highlighted matches with their line number and a preview.
+
+    Rows are rendered on demand from the sorted spans of the text input (a line
+    lookup and a slice each), so only the matches in view cost anything and the
+    list is as quick with hundreds of thousands of matches as with a few.
+    """
+
+    BINDINGS = [
+        Binding("up", "cursor_up", show=False),
+        Binding("down", "cursor_down", show=False),
+        Binding("pageup", "page_up", show=False),
+        Binding("pagedown", "page_down", show=False),
+        Binding("home", "first", show=False),
+        Binding("end", "last", show=False),
+        Binding("enter", "select", "Go To Match"),
+    ]
+
+    COMPONENT_CLASSES = {
+        "match-list--cursor",
+        "match-list--line-number",
+        "match-list--match",
+    }
+
+    cursor: reactive[int] = reactive(0)
+
+    @dataclass
+    class Selected(Message):
+        """Posted when a match is picked from the list."""
+
+        index: int  # index of the match in the text input's spans
+
+    def __init__(self, text_input: TextInput, *args, **kwargs) -> None:
+        """Initialize the list.
+
+        Args:
+            text_input: Text input whose matches are listed.
+        """
+        self.text_input = text_input
+        super().__init__(*args, **kwargs)
+
+    def refresh_matches(self) -> None:
+        """Resize the list to the current matches and redraw it."""
+        count = len(self.text_input.spans)
+        self.virtual_size = Size(0, count)
+        self.cursor = min(self.cursor, max(count - 1, 0))
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        """Render a match (or a blank line past the last one).
+
+        Args:
+            y: Line of the widget to render.
+
+        Returns:
+            The rendered line.
+        """
+        text_input = self.text_input
+        spans = text_input.spans
+        index = self.scroll_offset.y + y
+        width = self.scrollable_content_region.width
+        style = self.rich_style
+        if index >= len(spans):
+            return Strip.blank(width, style)
+
+        line_index = text_input.line_index
+        start, end = spans[index]
+        # spans can be behind the text while it's matched again after an edit
+        start, end = min(start, line_index.length), min(end, line_index.length)
+        row, column = line_index.location(start)
+        line = text_input.document.get_line(row)
+        line_number = text_input.line_number_start + row
+        digits = len(str(text_input.line_number_start + len(line_index) - 1))
+
+        # only the part of the line that fits is used (lines can be huge)
+        context = max(0, column - CONTEXT)
+        preview = line[context : context + width].replace("\t", " ")
+        column -= context
+        end_column = min(column + end - start, len(preview))
+        strip = Strip(
+            [
+                Segment(
+                    f"{line_number:>{digits}} ",
+                    self.get_component_rich_style("match-list--line-number"),
+                ),
+                Segment(preview[:column], style),
+                Segment(
+                    preview[column:end_column],
+                    self.get_component_rich_style("match-list--match"),
+                ),
+                Segment(preview[end_column:], style),
+            ]
+        ).crop_extend(0, width, style)
+        if index == self.cursor:
+            strip = strip.apply_style(
+                self.get_component_rich_style("match-list--cursor")
+            )
+        return strip
+
+    def watch_cursor(self, cursor: int) -> None:
+        """Keep the cursor in view."""
+        height = self.scrollable_content_region.height
+        if cursor < self.scroll_offset.y:
+            self.scroll_to(y=cursor, animate=False)
+        elif height and cursor >= self.scroll_offset.y + height:
+            self.scroll_to(y=cursor - height + 1, animate=False)
+        self.refresh()
+
+    def move_cursor(self, rows: int) -> None:
+        """Move the cursor, staying on the list.
+
+        Args:
+            rows: Number of rows to move by (negative to move up).
+        """
+        count = len(self.text_input.spans)
+        self.cursor = max(0, min(self.cursor + rows, count - 1))
+
+    def action_cursor_up(self) -> None:
+        """Move the cursor up a match."""
+        self.move_cursor(-1)
+
+    def action_cursor_down(self) -> None:
+        """Move the cursor down a match."""
+        self.move_cursor(1)
+
+    def action_page_up(self) -> None:
+        """Move the cursor up a page."""
+        self.move_cursor(-self.scrollable_content_region.height)
+
+    def action_page_down(self) -> None:
+        """Move the cursor down a page."""
+        self.move_cursor(self.scrollable_content_region.height)
+
+    def action_first(self) -> None:
+        """Move the cursor to the first match."""
+        self.move_cursor(-self.cursor)
+
+    def action_last(self) -> None:
+        """Move the cursor to the last match."""
+        self.move_cursor(len(self.text_input.spans))
+
+    def action_select(self) -> None:
+        """Go to the match under the cursor."""
+        if self.cursor < len(self.text_input.spans):
+            self.post_message(self.Selected(self.cursor))
+
+    def on_click(self, event: Click) -> None:
+        """Go to the clicked match."""
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return
+        index = self.scroll_offset.y + offset.y
+        if index < len(self.text_input.spans):
+            self.cursor = index
+            self.action_select()
@@ -0,0 +1,1093 @@
+import hashlib
+import inspect
+import multiprocessing
+import random
+import re
+import signal
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from collections.abc import Callable, Generator, Iterator
+from dataclasses import dataclass
+from itertools import islice
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from types import SimpleNamespace
+from typing import Any, TypeVar
+
+from .automaton import automaton_for
+from .cache import CACHE_MIN_LENGTH, MatchCache, hash_content
+from .defaults import DEFAULT_TIMEOUT
+from .incremental import (
+    LINE_BOUNDED,
+    TextEdit,
+    combine_edits,
+    match_extent,
+    rematch,
+)
+from .mapped import MappedText, MatchIndex
+from .patterns import compile_pattern, compile_template, expand_template
+from .spans import SpanStore
+from .timings import timed
+
+T = TypeVar("T")
+
+PROGRESS_CHUNK = 1 << 20  # characters (or bytes) scanned between progress reports
+COST_INTERVAL = 0.05  # seconds between progress reports while profiling
+COST_BLOCK = 1024  # match attempts between checks of the report interval
+RACE_RUNS = 15  # timed scans of each expression in a pattern race
+MAX_PATCH = 0.5  # patches larger than this fraction of a result send it whole
+MAX_PATCH_ROWS = 0.5  # as do more patches than this per line (reloading is faster)
+
+Scan = Generator[tuple[int, SpanStore, float], None, SpanStore]
+Chunks = Iterator[tuple[int, list[tuple[int, int]]]]  # searched to and spans found
+Patch = tuple[int, int, str]  # (start, end) offsets of a range and its replacement
+
+
+class MatchTimeout(Exception):
+    """Raised when a matching job runs longer than its time budget."""
+
+    def __init__(self, timeout: float, position: int = -1) -> None:
+        self.timeout = timeout
+        self.position = position  # where the job was (see `MatchSource.position`)
+        super().__init__(f"pattern timed out after {timeout * 1000:.0f} ms")
+
+
+class MatchCancelled(Exception):
+    """Raised when a matching job was cancelled before it finished."""
+
+
+def iter_spans(text: str, regex: str) -> Iterator[tuple[int, int]]:
+    """Iterate over the spans of all regular expression matches in `text`.
+
+    Patterns that could backtrack catastrophically are matched in linear time
+    by an automaton (see `automaton_for`), everything else by `re`.
+
+    Args:
+        text: Text to search.
+        regex: Regular expression string.
+
+    Returns:
+        Match (start, end) offsets.
+    """
+    automaton = automaton_for(regex)
+    if automaton is not None:
+        return automaton.finditer(text)
+    return map(re.Match.span, compile_pattern(regex).finditer(text))
+
+
+def find_spans(text: str, regex: str, count: int = 0) -> SpanStore:
+    """Find the spans of all regular expression matches in `text`.
+
+    Args:
+        text: Text to search.
+        regex: Regular expression string.
+        count: Maximum number of matches to find (0 for all). Defaults to 0.
+
+    Returns:
+        Match (start, end) offsets.
+    """
+    spans = iter_spans(text, regex)
+    if count:
+        spans = islice(spans, count)
+    return SpanStore.from_spans(spans)
+
+
+def search_chunks(
+    pattern: re.Pattern[Any], text: Any, length: int, chunk_size: int
+) -> Chunks:
+    """Find all regular expression matches a chunk of text at a time.
+
+    A chunk ends once the search is past the next multiple of `chunk_size`,
+    whether or not anything matched, so a scan for a rare pattern reports
+    progress (and gets the time budget of a step) as often as any other.
+
+    Each chunk is searched with `endpos` set just far enough past its end that
+    no match attempt starting within it can tell the text was cut short (see
+    `match_extent`), and matches starting past its end are searched for again
+    with the next chunk, so the matches are the same as `pattern.finditer`
+    would find. Patterns whose attempts can look arbitrarily far ahead are
+    searched in one go, reporting as matches pass chunk boundaries.
+
+    Args:
+        pattern: Compiled regular expression.
+        text: Text (or bytes, e.g. a memory mapped file) to search.
+        length: Length of the text.
+        chunk_size: Amount of text to search at a time (0 for all at once).
+
+    Yields:
+        The offset the text was searched to and the match (start, end)
+        offsets found in the chunk.
+    """
+    extent = match_extent(pattern)
+    if not chunk_size or extent is None:
+        yield from _group_chunks(
+            map(re.Match.span, pattern.finditer(text)), length, chunk_size
+        )
+        return
+
+    newline = b"\n" if isinstance(pattern.pattern, bytes) else "\n"
+    pos = 0
+    last = (-1, -1)  # an empty match is found again when searching from its end
+    while True:
+        boundary = pos - pos % chunk_size + chunk_size
+        if extent == LINE_BOUNDED:
+            line_end = text.find(newline, boundary - 1)
+            endpos = length if line_end < 0 else line_end + 2
+        else:
+            endpos = boundary + extent + 2
+        if endpos >= length:
+            endpos = boundary = length + 1
+        spans = []
+        for match in pattern.finditer(text, pos, endpos):
+            span = match.span()
+            if span[0] >= boundary:
+                break
+            if span != last or span[0] != span[1]:
+                spans.append(span)
+                last = span
+        if boundary > length:
+            yield length, spans
+            return
+        pos = max(boundary, last[1])
+        yield pos, spans
+
+
+def iter_chunks(text: str, regex: str, chunk_size: int) -> Chunks:
+    """Find all regular expression matches a chunk of text at a time.
+
+    Patterns matched by an automaton (see `iter_spans`) report as matches pass
+    chunk boundaries, everything else is searched by `search_chunks`.
+
+    Args:
+        text: Text to search.
+        regex: Regular expression string.
+        chunk_size: Amount of text to search at a time (0 for all at once).
+
+    Returns:
+        The offset the text was searched to and the match (start, end)
+        offsets found, for each chunk.
+    """
+    automaton = automaton_for(regex)
+    if automaton is not None:
+        return _group_chunks(automaton.finditer(text), len(text), chunk_size)
+    return search_chunks(compile_pattern(regex), text, len(text), chunk_size)
+
+
+def _group_chunks(
+    matches: Iterator[tuple[int, int]], length: int, chunk_size: int
+) -> Chunks:
+    """Group matches into chunks of text as they pass chunk boundaries."""
+    if not chunk_size:
+        yield length, list(matches)
+        return
+    spans: list[tuple[int, int]] = []
+    boundary = chunk_size
+    for start, end in matches:
+        if start >= boundary:
+            yield start, spans
+            spans = []
+            boundary = start - start % chunk_size + chunk_size
+        spans.append((start, end))
+    yield length, spans
+
+
+def scan_spans(chunks: Chunks, length: int, chunk_size: int) -> Scan:
+    """Collect match spans, reporting them a chunk of text at a time.
+
+    Args:
+        chunks: Offsets searched to and the match (start, end) offsets found
+            (see `search_chunks`).
+        length: Length of the text being matched.
+        chunk_size: Amount of text searched between reports (0 for no reports).
+
+    Yields:
+        The number of matches found so far, the spans found since the last
+        report, and the fraction of the text scanned.
+
+    Returns:
+        All match spans.
+    """
+    spans = SpanStore()
+    for position, found in chunks:
+        new = SpanStore.from_spans(found)
+        spans.extend(new)
+        if chunk_size and position < length:
+            yield len(spans), new, position / length
+    return spans
+
+
+def scan_index(
+    chunks: Chunks,
+    length: int,
+    chunk_size: int,
+    start: int,
+    end: int,
+    count: int = 0,
+) -> Generator[tuple[int, SpanStore, float], None, MatchIndex]:
+    """Index matches (see `MatchIndex`), reporting the ones within a window.
+
+    Args:
+        chunks: Offsets searched to and the match (start, end) offsets found
+            (see `search_chunks`).
+        length: Length of the text being matched.
+        chunk_size: Amount of text searched between reports (0 for no reports).
+        start: Start offset of the window.
+        end: End offset of the window.
+        count: Only report the first `count` matches (0 for all). Defaults to 0.
+
+    Yields:
+        The number of matches found so far, the spans found since the last
+        report that fall within the window (clipped to it and relative to its
+        start), and the fraction of the text scanned.
+
+    Returns:
+        The match index.
+    """
+    index = MatchIndex()
+    add = index.add
+    for position, found in chunks:
+        new = SpanStore()
+        for match_start, match_end in found:
+            if (
+                (match_end > start or match_start == start)
+                and match_start < end
+                and (not count or index.count < count)
+            ):
+                new.append(max(match_start, start) - start, min(match_end, end) - start)
+            add(match_start, match_end)
+        if chunk_size and position < length:
+            yield index.count, new, position / length
+    return index
+
+
+def substitute(
+    text: str,
+    regex: str,
+    template: str,
+    count: int = 0,
+    matches: SpanStore | None = None,
+) -> tuple[str, SpanStore]:
+    """Apply a regular expression substitution to `text`.
+
+    The substitution template is parsed once and the resulting text and the
+    replacement spans are built in a single pass over the matches.
+
+    Args:
+        text: Text to substitute.
+        regex: Regular expression string.
+        template: Substitution expression string.
+        count: Maximum number of substitutions (0 for all). Defaults to 0.
+        matches: Filled in with the (start, end) offsets of the replaced matches
+            within `text`. Defaults to None.
+
+    Returns:
+        The resulting text and the (start, end) offsets of each replacement
+        within the resulting text.
+    """
+    pattern = compile_pattern(regex)
+    parts = compile_template(pattern, template)
+    literals = [part for part in parts if isinstance(part, str)]
+    literal = "".join(literals) if len(literals) == len(parts) else None
+
+    pieces: list[str] = []
+    spans = SpanStore()
+    length = 0
+    last = 0
+    automaton = automaton_for(regex)
+    found: Iterator[tuple[int, int] | re.Match[str]]
+    found = automaton.finditer(text) if automaton else pattern.finditer(text)
+    if count:
+        found = islice(found, count)
+    for match in found:
+        start, end = match if isinstance(match, tuple) else match.span()
+        if matches is not None:
+            matches.append(start, end)
+        if literal is not None:
+            replacement = literal
+        else:
+            if isinstance(match, tuple):
+                match = _match_at(pattern, text, start, end)
+            replacement = expand_template(parts, match)
+        pieces.append(text[last:start])
+        pieces.append(replacement)
+        length += start - last
+        spans.append(length, length + len(replacement))
+        length += len(replacement)
+        last = end
+    pieces.append(text[last:])
+    return "".join(pieces), spans
+
+
+def _match_at(
+    pattern: re.Pattern[str], text: str, start: int, end: int
+) -> re.Match[str]:
+    """Get the `re` match (and its groups) for a span found by an automaton."""
+    match = pattern.match(text, start)
+    if match is None or match.end() != end:
+        # an empty match was already found at `start` (see `Automaton.finditer`)
+        match = pattern.fullmatch(text, start, end)
+    assert match is not None
+    return match
+
+
+@dataclass
+class Substitution:
+    """A substitution result kept by the worker to diff the next one against."""
+
+    token: int  # identifies the result (see `substitute_job`)
+    source: str  # substituted text
+    matches: SpanStore  # replaced matches within `source`
+    text: str  # resulting text
+    spans: SpanStore  # replacements within `text`
+
+
+def diff_substitutions(
+    old: Substitution, new: Substitution, limit: int | None = None
+) -> list[Patch] | None:
+    """Get the edits that turn the text of one substitution into another.
+
+    Both substitutions were applied to the same text, so the text between
+    matches is the same. Matches found by both at the same offsets with the
+    same replacement are skipped, every run of other (overlapping or adjacent)
+    matches becomes an edit.
+
+    Args:
+        old: Substitution to edit.
+        new: Substitution to edit it into.
+        limit: Maximum number of edits. Defaults to None.
+
+    Returns:
+        The ranges of the old text to replace, in order and within the old text,
+        or None if it takes more than `limit` edits.
+    """
+    old_starts, old_ends = old.matches.starts, old.matches.ends
+    new_starts, new_ends = new.matches.starts, new.matches.ends
+    old_text, new_text = old.text, new.text
+    old_spans, new_spans = old.spans, new.spans
+
+    patches: list[Patch] = []
+    # offsets of the results relative to the source after the last match handled
+    old_shift = new_shift = 0
+    start = end = -1  # source range of the current run of changed matches
+    run_old_shift = run_new_shift = 0  # offsets of the results at its start
+
+    def end_run() -> None:
+        replacement = new_text[start + run_new_shift : end + new_shift]
+        patches.append((start + run_old_shift, end + old_shift, replacement))
+
+    i = j = 0
+    while i < len(old_starts) or j < len(new_starts):
+        if (
+            i < len(old_starts)
+            and j < len(new_starts)
+            and old_starts[i] == new_starts[j]
+            and old_ends[i] == new_ends[j]
+            and old_text[old_spans.starts[i] : old_spans.ends[i]]
+            == new_text[new_spans.starts[j] : new_spans.ends[j]]
+        ):
+            if start >= 0:
+                end_run()
+                start = -1
+            old_shift = old_spans.ends[i] - old_ends[i]
+            new_shift = new_spans.ends[j] - new_ends[j]
+            i += 1
+            j += 1
+            continue
+
+        # matches don't overlap, so whichever starts first is a changed one
+        changed_old = j == len(new_starts) or (
+            i < len(old_starts) and old_starts[i] <= new_starts[j]
+        )
+        match_start = old_starts[i] if changed_old else new_starts[j]
+        if start >= 0 and match_start > end:
+            # unchanged text in between, so keep the edits small
+            end_run()
+            start = -1
+            if limit is not None and len(patches) > limit:
+                return None
+        if start < 0:
+            start, run_old_shift, run_new_shift = match_start, old_shift, new_shift
+        if changed_old:
+            end = max(end, old_ends[i])
+            old_shift = old_spans.ends[i] - old_ends[i]
+            i += 1
+        else:
+            end = max(end, new_ends[j])
+            new_shift = new_spans.ends[j] - new_ends[j]
+            j += 1
+    if start >= 0:
+        end_run()
+    if limit is not None and len(patches) > limit:
+        return None
+    return patches
+
+
+class MatchSource:
+    """Text held by the worker process along with recent match results.
+
+    Edits are applied in place and remembered per cached result so the next
+    search for the same expression only rescans the region around the edits
+    (see `rematch`) instead of the whole text. The text can also be a memory
+    mapped file, whose matches are indexed (see `index`) instead of kept.
+
+    Results of full scans of large texts are also kept in `cache` (on disk) and
+    reused when the same text is matched again, in a later session as well.
+    Edited texts (e.g. a followed file) aren't cached, they won't be seen again.
+
+    The time spent in each stage of the current job is kept in `stages`. Jobs
+    can set `position.value` to where they are, so a job that times out can be
+    told where it got stuck. The last substitution applied to the text is kept
+    in `substitution`.
+    """
+
+    def __init__(
+        self,
+        text: str | MappedText = "",
+        maxsize: int = 8,
+        cache: MatchCache | None = None,
+    ) -> None:
+        """Initialize the source.
+
+        Args:
+            text: Initial text or memory mapped file. Defaults to "".
+            maxsize: Maximum number of expressions to keep results for.
+                Defaults to 8.
+            cache: On-disk cache for the results of full scans. Defaults to
+                None.
+        """
+        self.text = text
+        self.maxsize = maxsize
+        self.cache = cache
+        self._digest: str | None = None  # content digest of the text (for `cache`)
+        self._edited = False  # edited texts aren't cached, they're not in a file
+        self.stages: dict[str, float] = {}
+        self.position: Any = SimpleNamespace(value=-1)
+        self.substitution: Substitution | None = None
+        self._matches: OrderedDict[str, tuple[SpanStore, TextEdit | None]] = (
+            OrderedDict()
+        )
+        self._indexes: OrderedDict[str, MatchIndex] = OrderedDict()
+
+    def set_text(self, text: str | MappedText) -> None:
+        """Replace the text and drop all cached results.
+
+        Args:
+            text: New text or memory mapped file.
+        """
+        self.text = text
+        self._digest = None
+        self._edited = False
+        self._matches.clear()
+        self._indexes.clear()
+
+    def apply_edit(self, start: int, end: int, replacement: str) -> None:
+        """Replace a range of the text, marking cached results as dirty there.
+
+        Args:
+            start: Start offset of the replaced range.
+            end: End offset of the replaced range.
+            replacement: Replacement text.
+        """
+        assert isinstance(self.text, str), "memory mapped files are read-only"
+        self.text = self.text[:start] + replacement + self.text[end:]
+        self._digest = None
+        self._edited = True
+        edit = (start, end, start + len(replacement))
+        for regex, (spans, dirty) in self._matches.items():
+            self._matches[regex] = (spans, combine_edits(dirty, edit))
+
+    def scan(self, regex: str, chunk_size: int = 0) -> Scan:
+        """Find the spans of all regular expression matches in the text.
+
+        Cached results are reused, edited text is re-matched around the edits,
+        results of earlier sessions are read from `cache` and everything else is
+        scanned in full, reporting progress as it goes (see `scan_spans`).
+
+        Args:
+            regex: Regular expression string.
+            chunk_size: Amount of text to scan between progress reports
+                (0 for no reports). Defaults to 0.
+
+        Yields:
+            Progress reports for full scans.
+
+        Returns:
+            Match (start, end) offsets.
+        """
+        text = self.text
+        assert isinstance(text, str), "memory mapped files are indexed"
+        cached = self._matches.pop(regex, None)
+        extent = None
+        if cached is not None and cached[1] is not None:
+            with timed(self.stages, "compile"):
+                pattern = compile_pattern(regex)
+            # patterns matched by an automaton are always scanned in full, the
+            # region around an edit could still backtrack catastrophically
+            if automaton_for(regex) is None:
+                extent = match_extent(pattern)
+
+        if cached is not None and cached[1] is None:
+            spans = cached[0]
+        elif cached is not None and extent is not None:
+            assert cached[1] is not None
+            spans = rematch(pattern, text, cached[0], cached[1], extent)
+        else:
+            digest = yield from self._hash(chunk_size)
+            stored = None
+            if digest is not None and self.cache is not None:
+                with timed(self.stages, "cache"):
+                    stored = self.cache.get_spans(regex, digest)
+            if stored is not None:
+                spans = stored
+            else:
+                with timed(self.stages, "compile"):
+                    chunks = iter_chunks(text, regex, chunk_size)
+                spans = yield from scan_spans(chunks, len(text), chunk_size)
+            if stored is None and digest is not None and self.cache is not None:
+                with timed(self.stages, "cache"):
+                    self.cache.put_spans(regex, digest, spans)
+
+        self._matches[regex] = (spans, None)
+        if len(self._matches) > self.maxsize:
+            self._matches.popitem(last=False)
+        return spans
+
+    def index(
+        self, regex: str, start: int, end: int, count: int = 0, chunk_size: int = 0
+    ) -> Generator[tuple[int, SpanStore, float], None, MatchIndex]:
+        """Index the regular expression matches in a memory mapped file.
+
+        Indexes are kept for recent expressions and in `cache` like the spans
+        of a full scan (see `scan`), everything else is scanned in full,
+        reporting the matches within a window as it goes (see `scan_index`).
+
+        Args:
+            regex: Regular expression string.
+            start: Start byte offset of the window reported.
+            end: End byte offset of the window reported.
+            count: Only report the first `count` matches (0 for all). Defaults
+                to 0.
+            chunk_size: Amount of the file to scan between progress reports
+                (0 for no reports). Defaults to 0.
+
+        Yields:
+            Progress reports for full scans.
+
+        Returns:
+            The match index.
+        """
+        text = self.text
+        assert isinstance(text, MappedText), "only memory mapped files are indexed"
+        index = self._indexes.pop(regex, None)
+        if index is None:
+            digest = yield from self._hash(chunk_size)
+            if digest is not None and self.cache is not None:
+                with timed(self.stages, "cache"):
+                    index = self.cache.get_index(regex, digest)
+            if index is None:
+                with timed(self.stages, "compile"):
+                    pattern = text.compile(regex)
+                chunks = search_chunks(pattern, text.buffer, text.size, chunk_size)
+                index = yield from scan_index(
+                    chunks, text.size, chunk_size, start, end, count
+                )
+                if digest is not None and self.cache is not None:
+                    with timed(self.stages, "cache"):
+                        self.cache.put_index(regex, digest, index)
+
+        self._indexes[regex] = index
+        if len(self._indexes) > self.maxsize:
+            self._indexes.popitem(last=False)
+        return index
+
+    def _hash(self, chunk_size: int = 0) -> Generator[Any, None, str | None]:
+        """Get the content digest of the text (if it's large enough to cache).
+
+        Hashing a large file takes a while, so it reports (no matches found and
+        nothing scanned) after each chunk if the scan reports progress.
+
+        Args:
+            chunk_size: Report progress while hashing if not 0. Defaults to 0.
+
+        Yields:
+            Progress reports (see `scan_spans`).
+
+        Returns:
+            The digest, or None if the text isn't cached.
+        """
+        text = self.text
+        size = text.size if isinstance(text, MappedText) else len(text)
+        if self.cache is None or self._edited or size < CACHE_MIN_LENGTH:
+            return None
+        hashing = hash_content(text)
+        while self._digest is None:
+            with timed(self.stages, "hash"):
+                try:
+                    next(hashing)
+                except StopIteration as stop:
+                    self._digest = stop.value
+            if chunk_size and self._digest is None:
+                yield 0, SpanStore(), 0.0
+        return self._digest
+
+
+def _clip(spans: SpanStore, start: int, end: int) -> SpanStore:
+    """Clip spans to a window of the text, relative to the window start."""
+    first = bisect_left(spans.ends, start)
+    last = bisect_left(spans.starts, end, lo=first)
+    return SpanStore(
+        (max(span_start, start) - start for span_start in spans.starts[first:last]),
+        (min(span_end, end) - start for span_end in spans.ends[first:last]),
+    )
+
+
+def match_job(source: MatchSource, regex: str, count: int = 0) -> Scan:
+    """Worker job finding match spans, reporting progress as it goes.
+
+    Args:
+        source: Text to search.
+        regex: Regular expression string.
+        count: Maximum number of matches to return (0 for all). Defaults to 0.
+
+    Yields:
+        The number of matches found so far, the spans found since the last
+        report, and the fraction of the text scanned.
+
+    Returns:
+        Match (start, end) offsets.
+    """
+    spans = yield from source.scan(regex, PROGRESS_CHUNK)
+    return spans[:count] if count else spans
+
+
+def window_job(
+    source: MatchSource, regex: str, start: int, end: int, count: int = 0
+) -> Generator[tuple[int, SpanStore, float], None, tuple[int, SpanStore]]:
+    """Worker job finding the match spans that fall within a window of the text.
+
+    Memory mapped files are indexed (see `MatchSource.index`) and the matches
+    within the window found again from the index, so their spans are never
+    all held at once.
+
+    Args:
+        source: Text to search.
+        regex: Regular expression string.
+        start: Start offset of the window.
+        end: End offset of the window.
+        count: Maximum number of matches to return (0 for all). Defaults to 0.
+
+    Yields:
+        The number of matches found so far, the new spans within the window
+        (clipped to the window and relative to its start), and the fraction of
+        the text scanned.
+
+    Returns:
+        The total number of matches and the spans within the window.
+    """
+    text = source.text
+    if isinstance(text, MappedText):
+        index = yield from source.index(regex, start, end, count, PROGRESS_CHUNK)
+        return index.count, index.window(text, regex, start, end, count)
+
+    scan = source.scan(regex, PROGRESS_CHUNK)
+    while True:
+        try:
+            found, spans, fraction = next(scan)
+        except StopIteration as stop:
+            spans = stop.value
+            break
+        if count:
+            spans = spans[: max(0, count - found + len(spans))]
+        yield found, _clip(spans, start, end), fraction
+    return len(spans), _clip(spans[:count] if count else spans, start, end)
+
+
+def groups_job(source: MatchSource, regex: str, spans: SpanStore) -> SpanStore:
+    """Worker job finding the capture group spans of some of the matches.
+
+    Groups are only needed for the matches in view, so they're found for the
+    given matches rather than for every match of a scan.
+
+    Args:
+        source: Text the matches were found in.
+        regex: Regular expression string.
+        spans: Match (start, end) offsets.
+
+    Returns:
+        The (start, end) offsets of each group of each match, match by match,
+        (-1, -1) for groups that didn't participate in a match.
+    """
+    text = source.text
+    assert isinstance(text, str), "memory mapped files don't have groups"
+    with timed(source.stages, "compile"):
+        pattern = compile_pattern(regex)
+    groups = range(1, pattern.groups + 1)
+    group_spans = SpanStore()
+    append = group_spans.append
+    for start, end in spans:
+        match = pattern.match(text, start)
+        if match is None or match.end() != end:
+            # an empty match was already found at `start` (see `_match_at`)
+            match = pattern.fullmatch(text, start, end)
+        for group in groups:
+            append(*(match.span(group) if match is not None else (-1, -1)))
+    return group_spans
+
+
+def substitute_job(
+    source: MatchSource,
+    regex: str,
+    template: str,
+    count: int = 0,
+    shown: int | None = None,
+) -> tuple[int, str | list[Patch], SpanStore]:
+    """Worker job applying a substitution (see `substitute`).
+
+    The result is kept, and if the caller still shows the last result, only the
+    edits turning it into the new one are sent back (see `diff_substitutions`)
+    instead of the whole text. Unless the edits touch so much of the text that
+    reloading it is faster.
+
+    Args:
+        source: Text to substitute.
+        regex: Regular expression string.
+        template: Substitution expression string.
+        count: Maximum number of substitutions (0 for all). Defaults to 0.
+        shown: Token of the result the caller shows. Defaults to None.
+
+    Returns:
+        A token for the result, the resulting text (or the edits to apply to
+        the shown one) and the (start, end) offsets of each replacement within
+        the resulting text.
+    """
+    text = source.text
+    assert isinstance(text, str), "memory mapped files can't be substituted"
+    with timed(source.stages, "compile"):
+        compile_pattern(regex)
+    matches = SpanStore()
+    result, spans = substitute(text, regex, template, count, matches)
+    # random so a restarted worker can't reuse the token of a shown result
+    token = random.getrandbits(63)
+    last, source.substitution = source.substitution, Substitution(
+        token, text, matches, result, spans
+    )
+    if last is None or last.token != shown or last.source is not text:
+        return token, result, spans
+    limit = int(MAX_PATCH_ROWS * (result.count("\n") + 1))
+    patches = diff_substitutions(last, source.substitution, limit)
+    if patches is None or (
+        sum(end - start + len(replacement) for start, end, replacement in patches)
+        > MAX_PATCH * len(result)
+    ):
+        return token, result, spans
+    return token, patches, spans
+
+
+def cost_job(
+    source: MatchSource, regex: str
+) -> Generator[tuple[int, "array[float]", float], None, int]:
+    """Worker job timing a match attempt at every offset of the text.
+
+    Attempts are made with `re` (even for patterns matched by an automaton)
+    since that's where a pattern spends its time outside of the playground.
+    Costs are reported by line, a line also covers the attempt at its newline.
+    The line being timed is the job's position (see `MatchTimeout.position`).
+
+    Args:
+        source: Text to profile.
+        regex: Regular expression string.
+
+    Yields:
+        The first line of the new costs, the seconds spent attempting a match
+        at the offsets of each line since the last report, and the fraction of
+        the text profiled.
+
+    Returns:
+        The number of lines profiled.
+    """
+    text = source.text
+    assert isinstance(text, str), "memory mapped files can't be profiled"
+    with timed(source.stages, "compile"):
+        match = compile_pattern(regex).match
+    clock = time.perf_counter
+    length = len(text)
+    costs: array[float] = array("d")
+    row = reported_row = 0
+    reported = clock()
+    start = 0
+    position = source.position
+    while start <= length:
+        position.value = row
+        end = text.find("\n", start)
+        if end < 0:
+            end = length
+        cost = 0.0
+        # time blocks of attempts so long lines still report regularly
+        for block in range(start, end + 1, COST_BLOCK):
+            began = clock()
+            for offset in range(block, min(block + COST_BLOCK, end + 1)):
+                match(text, offset)
+            now = clock()
+            cost += now - began
+            if now - reported > COST_INTERVAL:
+                yield reported_row, costs, block / max(length, 1)
+                reported_row, costs, reported = row, array("d"), now
+        costs.append(cost)
+        row += 1
+        start = end + 1
+    yield reported_row, costs, 1.0
+    return row
+
+
+def race_job(
+    source: MatchSource, regex: str, runs: int = RACE_RUNS
+) -> Generator[float, None, tuple[int, str]]:
+    """Worker job timing full scans of the text for a pattern race.
+
+    Scans are made with `re` (even for patterns matched by an automaton) since
+    the race compares expressions for use outside of the playground. An untimed
+    scan collects the matches first, which also warms up the pattern.
+
+    Args:
+        source: Text to scan.
+        regex: Regular expression string.
+        runs: Number of timed scans. Defaults to 15.
+
+    Yields:
+        Seconds each timed scan took.
+
+    Returns:
+        The number of matches and a digest of their spans, to tell if two
+        expressions find the same matches.
+    """
+    text = source.text
+    assert isinstance(text, str), "memory mapped files can't be raced"
+    with timed(source.stages, "compile"):
+        pattern = compile_pattern(regex)
+    spans = SpanStore.from_matches(pattern.finditer(text))
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(spans.starts)
+    digest.update(spans.ends)
+    for _ in range(runs):
+        start = time.perf_counter()
+        deque(pattern.finditer(text), maxlen=0)
+        yield time.perf_counter() - start
+    return len(spans), digest.hexdigest()
+
+
+def _serve(conn: Connection, position: Any, cache: MatchCache | None) -> None:
+    """Worker process loop, run jobs sent over `conn` against the named sources.
+
+    Results are sent along with the time spent in each stage of the job. Jobs
+    report where they are through `position` (a shared value). The sources keep
+    the results of full scans in `cache`.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sources: dict[str, MatchSource] = {}
+    conn.send(("ready", None))
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except EOFError:
+            break
+        if kind == "text":
+            name, text = payload
+            sources.setdefault(name, MatchSource(cache=cache)).set_text(text)
+            continue
+        if kind == "edit":
+            name, edit = payload
+            sources[name].apply_edit(*edit)
+            continue
+        if kind == "cancel":
+            continue  # the job finished before the cancellation arrived
+        name, func, args = payload
+        source = sources.setdefault(name, MatchSource(cache=cache))
+        stages = source.stages = {}
+        source.position = position
+        position.value = -1
+        start = time.perf_counter()
+        try:
+            result = func(source, *args)
+            if inspect.isgenerator(result):
+                result = _report(conn, result)
+            elapsed = time.perf_counter() - start
+            stages["match"] = elapsed - sum(stages.values())
+            conn.send(("ok", (result, stages)))
+        except MatchCancelled:
+            conn.send(("cancelled", None))
+        except Exception as e:
+            conn.send(("error", e))
+
+
+def _report(conn: Connection, job: Generator[Any, Any, T]) -> T:
+    """Send each progress report of a job, stopping if it gets cancelled."""
+    while True:
+        try:
+            progress = next(job)
+        except StopIteration as stop:
+            return stop.value  # type: ignore[no-any-return]
+        conn.send(("progress", progress))
+        # the only message that can arrive while a job runs is a cancellation
+        if conn.poll():
+            conn.recv()
+            job.close()
+            raise MatchCancelled
+
+
+class MatchWorker:
+    """Run regular expression jobs in a separate process that can be killed.
+
+    Jobs run one at a time. If a job runs past the time budget the worker
+    process is terminated (and restarted on the next job) so a catastrophic
+    backtracking pattern can never hang the application. Jobs that return a
+    generator report progress as they go, the time budget then applies to each
+    step, and they can be cancelled between steps.
+    """
+
+    def __init__(
+        self, timeout: float = DEFAULT_TIMEOUT, cache: MatchCache | None = None
+    ) -> None:
+        """Initialize the worker.
+
+        Args:
+            timeout: Time budget for each job in seconds. Defaults to 1.0.
+            cache: On-disk cache for the results of full scans (see
+                `MatchSource`). Defaults to None.
+        """
+        self.timeout = timeout
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._process: BaseProcess | None = None
+        self._conn: Connection | None = None
+        self._texts: dict[str, str | MappedText] = {}
+        self._ready = False
+        self._position: Any = None  # shared with the process (see `_serve`)
+
+    def start(self) -> None:
+        """Start the worker process (if it isn't already running).
+
+        Call this before the application takes over stdio so multiprocessing
+        can launch its helper processes.
+        """
+        with self._lock:
+            self._start()
+
+    def _start(self) -> Connection:
+        if self._conn is not None:
+            return self._conn
+        context = multiprocessing.get_context("spawn")
+        conn, child_conn = context.Pipe()
+        self._position = context.RawValue("q", -1)
+        process = context.Process(
+            target=_serve, args=(child_conn, self._position, self.cache), daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._process, self._conn, self._ready = process, conn, False
+        return conn
+
+    def _wait_until_ready(self, conn: Connection) -> None:
+        # wait for the worker to boot so startup doesn't count against a job
+        if not self._ready:
+            conn.recv()
+            self._ready = True
+
+    def close(self) -> None:
+        """Stop the worker process."""
+        with self._lock:
+            self._kill()
+
+    def _kill(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+        if self._conn is not None:
+            self._conn.close()
+        self._process = self._conn = None
+        self._texts.clear()
+
+    def run(
+        self,
+        func: Callable[..., T],
+        text: str | MappedText,
+        *args: Any,
+        name: str = "",
+        base: str | None = None,
+        edit: TextEdit | None = None,
+        progress: Callable[[Any], object] | None = None,
+        cancel: threading.Event | None = None,
+        stages: dict[str, float] | None = None,
+    ) -> T:
+        """Run a job in the worker process.
+
+        The worker keeps the last text sent under each name. The text is only
+        sent again when it changes, and if it changed by a known edit of the
+        text that was sent last, only the edited range is sent.
+
+        Args:
+            func: Module level job function, called as `func(source, *args)`
+                with the `MatchSource` for `name`. If it returns a generator,
+                its items are progress reports and its return value the result.
+            text: Text (or memory mapped file) to run the job against.
+            args: Additional job arguments.
+            name: Name of the text within the worker. Defaults to "".
+            base: Text that `edit` was applied to. Defaults to None.
+            edit: Edit taking `base` to `text`. Defaults to None.
+            progress: Called (from the calling thread) with each progress
+                report. Defaults to None.
+            cancel: Set to stop the job at its next progress report.
+                Defaults to None.
+            stages: Filled in with the seconds spent compiling, matching and
+                transferring data to and from the worker. Defaults to None.
+
+        Raises:
+            MatchTimeout: If the job (or a step of it) didn't finish within the
+                time budget.
+            MatchCancelled: If the job was cancelled.
+
+        Returns:
+            The job result.
+        """
+        with self._lock:
+            conn = self._start()
+            self._wait_until_ready(conn)
+            start = time.perf_counter()
+            sent = self._texts.get(name)
+            if text is not sent and text != sent:
+                if edit is not None and sent is not None and sent is base:
+                    assert isinstance(text, str)
+                    edit_start, edit_end, new_end = edit
+                    replacement = text[edit_start:new_end]
+                    conn.send(("edit", (name, (edit_start, edit_end, replacement))))
+                else:
+                    conn.send(("text", (name, text)))
+                self._texts[name] = text
+            conn.send(("job", (name, func, args)))
+            cancelling = False
+            while True:
+                if not conn.poll(self.timeout):
+                    position = self._position.value
+                    self._kill()
+                    raise MatchTimeout(self.timeout, position)
+                status, result = conn.recv()
+                if status != "progress":
+                    break
+                if cancel is not None and cancel.is_set():
+                    if not cancelling:
+                        conn.send(("cancel", None))
+                        cancelling = True
+                elif progress is not None:
+                    progress(result)
+            elapsed = time.perf_counter() - start
+        if status == "cancelled":
+            raise MatchCancelled
+        if status == "error":
+            raise result
+        result, job_stages = result
+        if stages is not None:
+            stages.update(job_stages)
+            stages["transfer"] = elapsed - sum(job_stages.values())
+        return result  # type: ignore[no-any-return]
@@ -0,0 +1,144 @@
+import re
+from collections import OrderedDict
+from re import _parser  # type: ignore[attr-defined]
+
+FLAG_PATTERN = re.compile(r"\(\?([a,i,L,m,s,u,x]*?)\)")
+
+
+class PatternCache:
+    """A bounded LRU cache of compiled regular expressions.
+
+    Invalid expressions are cached as well so repeated validation of the same
+    bad string doesn't compile it over and over.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of expressions to keep. Defaults to 64.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[str, re.Pattern[str] | re.error] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def compile(self, regex: str) -> re.Pattern[str]:
+        """Compile a regular expression, reusing a cached result when possible.
+
+        Args:
+            regex: Regular expression string.
+
+        Raises:
+            re.error: If `regex` isn't a valid regular expression.
+
+        Returns:
+            Compiled regular expression.
+        """
+        cache = self._cache
+        try:
+            result = cache[regex]
+        except KeyError:
+            self.misses += 1
+            try:
+                result = re.compile(regex)
+            except re.error as e:
+                result = e
+            cache[regex] = result
+            if len(cache) > self.maxsize:
+                cache.popitem(last=False)
+        else:
+            self.hits += 1
+            cache.move_to_end(regex)
+
+        if isinstance(result, re.error):
+            raise re.error(result.msg, result.pattern, result.pos)
+        return result
+
+    def clear(self) -> None:
+        """Remove all cached expressions and reset the counters."""
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+
+PATTERN_CACHE = PatternCache()
+
+
+def compile_pattern(regex: str) -> re.Pattern[str]:
+    """Compile a regular expression using the shared process-wide cache.
+
+    Args:
+        regex: Regular expression string.
+
+    Raises:
+        re.error: If `regex` isn't a valid regular expression.
+
+    Returns:
+        Compiled regular expression.
+    """
+    return PATTERN_CACHE.compile(regex)
+
+
+def toggle_flag(regex: str, letter: str) -> str:
+    """Turn an inline flag on or off at the start of a regular expression.
+
+    Args:
+        regex: Regular expression string.
+        letter: Inline flag letter (e.g. "i" for re.IGNORECASE).
+
+    Returns:
+        The regular expression with the flag toggled.
+    """
+    current_flags = FLAG_PATTERN.match(regex)
+    if not current_flags:
+        return f"(?{letter}){regex}"
+    flags = current_flags.groups()[0]
+    updated_flags = flags.replace(letter, "") if letter in flags else flags + letter
+    return (
+        FLAG_PATTERN.sub(f"(?{updated_flags})", regex)
+        if updated_flags
+        else FLAG_PATTERN.sub("", regex)
+    )
+
+
+def compile_template(pattern: re.Pattern[str], template: str) -> list[str | int]:
+    """Parse a substitution template once into literal strings and group numbers.
+
+    Args:
+        pattern: Compiled regular expression the template is used with.
+        template: Substitution expression string.
+
+    Raises:
+        re.error: If `template` isn't valid for `pattern`.
+
+    Returns:
+        Template parts, literal text as strings and group references as ints.
+    """
+    parsed = _parser.parse_template(template, pattern)
+    if isinstance(parsed, tuple):  # Python 3.11
+        groups, literals = parsed
+        parts = list(literals)
+        for index, group in groups:
+            parts[index] = group
+    else:
+        parts = parsed
+    return [part for part in parts if part != ""]
+
+
+def expand_template(parts: list[str | int], match: re.Match[str]) -> str:
+    """Build the replacement for a match from a parsed substitution template.
+
+    Args:
+        parts: Template parts (see `compile_template`).
+        match: Match to build the replacement for.
+
+    Returns:
+        Replacement text.
+    """
+    group = match.group
+    return "".join(
+        part if isinstance(part, str) else group(part) or "" for part in parts
+    )
@@ -0,0 +1,216 @@
+import re
+from functools import lru_cache
+from re import _compiler, _constants, _parser  # type: ignore[attr-defined]
+from typing import Any
+
+from .automaton import ATOMS, REPEATS, compile_items
+
+MIN_REPEATS = 2  # fewer repetitions can only backtrack polynomially
+
+# characters used to check if two character sets overlap
+PROBES = "".join(map(chr, range(256))) + "ſKıİ١٢ 　ßéπж中"
+
+NESTED = (
+    "nested quantifiers (like `(a+)+`) can match the same text in exponentially "
+    "many ways, a failing match could take forever"
+)
+ALTERNATION = (
+    "overlapping alternatives in a repeated group (like `(a|ab)*`) can match the "
+    "same text in exponentially many ways, a failing match could take forever"
+)
+ADJACENT = (
+    "adjacent quantifiers matching the same characters (like `\\d+\\d+`) are "
+    "retried at every split of the text, a failing match could take very long"
+)
+
+Atoms = list[re.Pattern[str]]
+
+
+def _overlap(first: Atoms, second: Atoms) -> bool:
+    """Check if two sets of single character matchers share a character."""
+    return any(
+        any(atom.match(char) for atom in first)
+        and any(atom.match(char) for atom in second)
+        for char in PROBES
+    )
+
+
+def _first(items: Any, flags: int, reverse: bool = False) -> tuple[Atoms, bool]:
+    """Get the atoms that can match the first (or last) character of parsed items.
+
+    Returns:
+        The atoms and whether the items can match an empty string.
+    """
+    atoms: Atoms = []
+    for op, av in reversed(items) if reverse else items:
+        if op in ATOMS:
+            atoms.append(compile_items([(op, av)], flags))
+            return atoms, False
+        if op is _constants.SUBPATTERN:
+            first, nullable = _first(av[3].data, _scoped(flags, av), reverse)
+        elif op is _constants.ATOMIC_GROUP:
+            first, nullable = _first(av.data, flags, reverse)
+        elif op is _constants.BRANCH:
+            nullable = False
+            first = []
+            for branch in av[1]:
+                branch_first, branch_nullable = _first(branch.data, flags, reverse)
+                first += branch_first
+                nullable |= branch_nullable
+        elif op in REPEATS or op is _constants.POSSESSIVE_REPEAT:
+            first, nullable = _first(av[2].data, flags, reverse)
+            nullable |= av[0] == 0
+        else:
+            # assertions, backreferences and conditionals are skipped, which can
+            # only miss (and not make up) a problem
+            continue
+        atoms += first
+        if not nullable:
+            return atoms, False
+    return atoms, True
+
+
+def _all(items: Any, flags: int) -> Atoms:
+    """Get every atom in parsed items."""
+    atoms: Atoms = []
+    for op, av in items:
+        if op in ATOMS:
+            atoms.append(compile_items([(op, av)], flags))
+        elif op is _constants.SUBPATTERN:
+            atoms += _all(av[3].data, _scoped(flags, av))
+        elif op is _constants.BRANCH:
+            for branch in av[1]:
+                atoms += _all(branch.data, flags)
+        elif op in REPEATS or op is _constants.POSSESSIVE_REPEAT:
+            atoms += _all(av[2].data, flags)
+        elif op is _constants.ATOMIC_GROUP:
+            atoms += _all(av.data, flags)
+    return atoms
+
+
+def _scoped(flags: int, av: Any) -> int:
+    """Get the flags within a group."""
+    return int(_compiler._combine_flags(flags, av[1], av[2]))
+
+
+def _ambiguous_repeat(items: Any, flags: int, after: Atoms) -> bool:
+    """Check if a repeat in parsed items can stop at different points in a run.
+
+    That's the case when the characters a repeat consumes could also start
+    what follows it (`after` follows the items, e.g. the next repetition of an
+    enclosing repeat).
+    """
+    for index, (op, av) in enumerate(items):
+        follow, nullable = _first(items[index + 1 :], flags)
+        if nullable:
+            follow = follow + after
+        if op in REPEATS:
+            low, high, body = av
+            if high > 1 and high != low and _overlap(_all(body.data, flags), follow):
+                return True
+            if high > 1:
+                follow = follow + _first(body.data, flags)[0]
+            if _ambiguous_repeat(body.data, flags, follow):
+                return True
+        elif op is _constants.SUBPATTERN:
+            if _ambiguous_repeat(av[3].data, _scoped(flags, av), follow):
+                return True
+        elif op is _constants.BRANCH:
+            if any(_ambiguous_repeat(p.data, flags, follow) for p in av[1]):
+                return True
+    return False
+
+
+def _ambiguous_branches(items: Any, flags: int) -> bool:
+    """Check if alternatives (outside of nested repeats) can start the same way."""
+    for op, av in items:
+        if op is _constants.SUBPATTERN:
+            if _ambiguous_branches(av[3].data, _scoped(flags, av)):
+                return True
+        elif op is _constants.BRANCH:
+            firsts = [_first(branch.data, flags) for branch in av[1]]
+            if sum(nullable for _, nullable in firsts) > 1:
+                return True
+            for index, (first, _) in enumerate(firsts):
+                if any(_overlap(first, other) for other, _ in firsts[index + 1 :]):
+                    return True
+            if any(_ambiguous_branches(branch.data, flags) for branch in av[1]):
+                return True
+    return False
+
+
+def _check(items: Any, flags: int, followed: bool) -> str | None:
+    """Find a construct in parsed items that could backtrack catastrophically.
+
+    Backtracking only happens when something after a construct fails to match,
+    so constructs that nothing follows (`followed`) are fine.
+    """
+    for index, (op, av) in enumerate(items):
+        rest = followed or index < len(items) - 1
+        if op is _constants.SUBPATTERN:
+            problem = _check(av[3].data, _scoped(flags, av), rest)
+        elif op is _constants.BRANCH:
+            problem = next(
+                filter(None, (_check(branch.data, flags, rest) for branch in av[1])),
+                None,
+            )
+        elif op in REPEATS:
+            problem = _check_repeat(items, index, flags, followed)
+        else:
+            continue
+        if problem is not None:
+            return problem
+    return None
+
+
+def _check_repeat(items: Any, index: int, flags: int, followed: bool) -> str | None:
+    """Check a repeat, its body, and the repeats following it."""
+    low, high, body = items[index][1]
+    rest = followed or index < len(items) - 1
+    if high > MIN_REPEATS and rest:
+        # a repetition could end at several points and start the next one there
+        if _ambiguous_repeat(body.data, flags, _first(body.data, flags)[0]):
+            return NESTED
+        if _ambiguous_branches(body.data, flags):
+            return ALTERNATION
+
+    if high is _constants.MAXREPEAT and rest:
+        # every split of a run between this repeat and a following one is tried,
+        # there's only more than one if a repetition of either could be one of
+        # the other (so they have to start and end with the same characters)
+        first = _first(body.data, flags)[0]
+        last = _first(body.data, flags, reverse=True)[0]
+        for after, (op, av) in enumerate(items[index + 1 :], index + 1):
+            if (
+                op in REPEATS
+                and av[1] is _constants.MAXREPEAT
+                and (followed or after < len(items) - 1)
+                and _overlap(first, _first(av[2].data, flags)[0])
+                and _overlap(last, _first(av[2].data, flags, reverse=True)[0])
+            ):
+                return ADJACENT
+            if not _first([(op, av)], flags)[1]:
+                break
+    return _check(body.data, flags, rest)
+
+
+@lru_cache(maxsize=64)
+def find_backtracking(regex: str) -> str | None:
+    """Find constructs in a pattern that could backtrack catastrophically.
+
+    The parsed pattern is checked (without running it) for repeats nested in
+    repeats, alternatives of a repeated group that can start with the same
+    character, and adjacent repeats matching the same characters. Atomic
+    groups and possessive repeats never backtrack so they're skipped.
+
+    Args:
+        regex: Regular expression string.
+
+    Raises:
+        re.error: If `regex` isn't a valid regular expression.
+
+    Returns:
+        A description of the first problem found, or None.
+    """
+    parsed = _parser.parse(regex)
+    return _check(parsed.data, parsed.state.flags, False)
@@ -0,0 +1,70 @@
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from textual.app import App
+from textual.timer import Timer
+
+if TYPE_CHECKING:
+    from .text_inputs import RegexTextArea
+
+FRAME_INTERVAL = 1 / 60  # seconds
+
+
+class UpdateScheduler:
+    """Coalesce update requests for text areas into one recompute per frame.
+
+    Every request bumps a generation counter and tags the requesting text area
+    with it. Matching jobs remember the generation they were started for so any
+    result that arrives after a newer request is discarded instead of painted.
+    """
+
+    def __init__(self, app: App[Any], interval: float = FRAME_INTERVAL) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            app: The running application (used for timers).
+            interval: Time to wait for more requests before a recompute.
+                Defaults to one frame at 60 fps.
+        """
+        self.app = app
+        self.interval = interval
+        self.generation = 0
+        self._pending: dict["RegexTextArea", None] = {}
+        self._prepare: dict["RegexTextArea", Callable[[], object]] = {}
+        self._timer: Timer | None = None
+
+    def schedule(
+        self, widget: "RegexTextArea", prepare: Callable[[], object] | None = None
+    ) -> int:
+        """Request a recompute of matches and highlighting for a text area.
+
+        Args:
+            widget: Text area to update.
+            prepare: Called once (latest request wins) right before the recompute,
+                e.g. to sync text from another widget. Defaults to None.
+
+        Returns:
+            The generation number assigned to the request.
+        """
+        self.generation += 1
+        widget.generation = self.generation
+        if prepare is not None:
+            self._prepare[widget] = prepare
+        self._pending[widget] = None
+        if self._timer is None:
+            self._timer = self.app.set_timer(self.interval, self.flush)
+        return self.generation
+
+    def flush(self) -> None:
+        """Run all pending recomputes."""
+        prepare, self._prepare = self._prepare, {}
+        for callback in prepare.values():
+            callback()
+
+        pending, self._pending = self._pending, {}
+        for widget in pending:
+            widget.recompute()
+
+        self._timer = None
+        if self._pending:
+            self._timer = self.app.set_timer(self.interval, self.flush)
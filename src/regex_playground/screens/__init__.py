@@ -1,4 +1,25 @@
-from .about_modal import AboutModal
-from .help_modal import HelpModal
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["AboutModal", "HelpModal"]
+if TYPE_CHECKING:
+    from .about_modal import AboutModal
+    from .files_modal import FilesModal
+    from .help_modal import HelpModal
+    from .race_modal import RaceModal
+
+__all__ = ["AboutModal", "FilesModal", "HelpModal", "RaceModal"]
+
+# modals are rarely opened so they're imported on first use (see `__getattr__`)
+MODULES = {
+    "AboutModal": "about_modal",
+    "FilesModal": "files_modal",
+    "HelpModal": "help_modal",
+    "RaceModal": "race_modal",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a modal screen the first time it's used."""
+    if name not in MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(f".{MODULES[name]}", __name__), name)
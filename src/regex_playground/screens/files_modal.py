@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from textual import on
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Center, Vertical
+from textual.message import Message
+from textual.screen import ModalScreen
+from textual.widgets import Label, OptionList
+from textual.widgets.option_list import Option
+
+from ..search import FileSearch
+
+
+class FilesModal(ModalScreen[Path | None]):
+    """Match counts for the current expression across many files."""
+
+    BINDINGS = [
+        Binding("escape", "dismiss_modal", show=False),
+    ]
+
+    @dataclass
+    class Counted(Message):
+        """Posted when the matches in a file have been counted."""
+
+        index: int  # index of the file
+        count: int | None  # None if the file couldn't be read
+
+    def __init__(self, files: list[Path], regex: str, *args, **kwargs) -> None:
+        self.files = files
+        self.regex = regex
+        self.counts: dict[int, int | None] = {}
+        self.search = FileSearch(
+            files,
+            regex,
+            lambda index, count: self.post_message(self.Counted(index, count)),
+        )
+        super().__init__(*args, **kwargs)
+
+    def compose(self) -> ComposeResult:
+        """Compose the content of the modal dialog."""
+        with Vertical():
+            with Center():
+                yield Label("Files", id="title")
+            yield Label("", id="message")
+            yield OptionList(
+                *(
+                    Option(self.format_count(path, None), id=str(index))
+                    for index, path in enumerate(self.files)
+                )
+            )
+
+    def on_mount(self) -> None:
+        """Start searching the files."""
+        self.search.start()
+        self.update_status()
+        self.query_one(OptionList).focus()
+
+    def on_unmount(self) -> None:
+        """Stop searching the files."""
+        self.search.cancel()
+
+    @staticmethod
+    def format_count(path: Path, count: int | None, done: bool = False) -> str:
+        """Format an option showing the match count for a file.
+
+        Args:
+            path: File path.
+            count: Number of matches.
+            done: Has the file been searched. Defaults to False.
+
+        Returns:
+            Option prompt.
+        """
+        if not done:
+            return f"{'…':>10}  {path}"
+        if count is None:
+            return f"{'error':>10}  {path}"
+        return f"{count:>10,}  {path}"
+
+    def update_status(self) -> None:
+        """Show the search progress and totals."""
+        matches = sum(count or 0 for count in self.counts.values())
+        matched = sum(1 for count in self.counts.values() if count)
+        status = f"{matches:,} matches in {matched} of {len(self.files)} files"
+        if len(self.counts) < len(self.files):
+            status += f" (searching {len(self.counts)}/{len(self.files)})"
+        self.query_one("#message", Label).update(status)
+
+    @on(Counted)
+    def show_count(self, message: Counted) -> None:
+        """Show the match count for a file."""
+        self.counts[message.index] = message.count
+        prompt = self.format_count(self.files[message.index], message.count, True)
+        self.query_one(OptionList).replace_option_prompt(str(message.index), prompt)
+        self.update_status()
+
+    @on(OptionList.OptionSelected)
+    def open_file(self, event: OptionList.OptionSelected) -> None:
+        """Open the selected file."""
+        self.dismiss(self.files[event.option_index])
+
+    def action_dismiss_modal(self) -> None:
+        """Dismiss the modal."""
+        self.dismiss(None)
@@ -22,7 +22,7 @@ RegEx Playground is split into two halves.
 
 ### Top Half ⬆
 
-- Expression Input: This is where you enter a regular expression to test (including any flags). The results in the Text panel will update as you type.
+- Expression Input: This is where you enter a regular expression to test (including any flags). The results in the Text panel will update as you type. A yellow border warns about constructs that could backtrack catastrophically (like `(a+)+`), hover over the input for an explanation.
 - Text Panel: This is where you enter text to test your expression against. You can paste text directly into the text area, load text from a file via the `CTRL+L` keybinding, or load text via the command-line interface (CLI). Matches will be highlighted as you type.
 
 ### Bottom Half ⬇
@@ -33,6 +33,15 @@ RegEx Playground is split into two halves.
 ## Other Options
 
 - Global Toggle: RegEx Playground uses the `re.finditer` method to find all non-overlapping matches within your text. You can disable this with the `Ctrl+G` keybinding. When disabled, only the first match will be highlighted/substituted.
+- Capture Groups: Each group of a match is drawn in its own color. Hover over a match to see its span and the number, name and span of each group.
+- Match Navigation: Use `F8` to jump to the next match (`Shift+F8` for the previous one). Use `F9` to list every match with its line number and a preview, press `Enter` (or click) to jump to one.
+- Files: Loaded several files (or a directory) from the CLI? Use `F4` to see how many matches your expression finds in each file, and select a file to load it.
+- Follow: Use `Ctrl+F` to follow the loaded file as it grows (like `tail -f`), or start with `--follow`. New lines are appended and matched as they're written, and only the last 10,000 lines are kept (see `--retain`). Press `Ctrl+F` again to stop.
+- Cache: Large files (over 1 MB) remember their matches on disk, so reopening one with the same expression is instant. The last expression and substitution are restored on startup. Use `--no-cache` to turn this off.
+- Linear-Time Engine: Expressions that could backtrack catastrophically (nested repeats like `(a+)+$` or repeated alternations like `(a|aa)*`) are matched by a linear-time automaton instead of `re`, as long as they don't use backreferences, lookarounds, atomic groups or possessive repeats. The match count shows "linear-time engine" when it's used. Matches are the same either way.
+- Profiling: Wondering which lines make your expression slow? Use `F5` in the Text Panel to color each line by how long matching takes on it. The heatmap updates as you edit, press `F5` again to turn it off.
+- Pattern Race: Use `F10` to time candidate rewrites of your expression against the text (median and 95th percentile of 15 scans) and check they find the same matches.
+- Timings: Feeling slow? Use `F3` to show how long each stage of recent updates took (compiling, matching, highlighting, rendering, etc.). While shown, `Ctrl+T` exports the timings to a JSON file you can attach to a bug report.
 - Result as Input: Want to performance multiple operations on your text? Use `Ctrl+R` to reset the Text Panel with the text from the Result Panel.
 - Saving: You can save the resulting text (after applying the substitution to your matches) via the `CTRL+S` keybinding. You must select the Result text area for this keybinding to be available.
 
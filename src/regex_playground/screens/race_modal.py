@@ -0,0 +1,199 @@
+import asyncio
+import re
+import threading
+from dataclasses import dataclass, field
+from statistics import median
+
+from textual import on, work
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Center, Vertical
+from textual.coordinate import Coordinate
+from textual.message import Message
+from textual.screen import ModalScreen
+from textual.widgets import DataTable, Input, Label
+
+from ..expression.regex_input import ValidRegex
+from ..matcher import MatchTimeout, race_job
+
+COLUMNS = ("expression", "runs", "median (ms)", "p95 (ms)", "matches", "same matches")
+
+
+@dataclass
+class Entry:
+    """A candidate expression in a pattern race and its results."""
+
+    regex: str
+    times: list[float] = field(default_factory=list)  # seconds of each timed scan
+    count: int | None = None  # number of matches (once finished)
+    digest: str | None = None  # digest of the match spans (once finished)
+    error: str | None = None  # why the expression couldn't be timed
+
+
+class RaceModal(ModalScreen[None]):
+    """Time candidate expressions against the text and compare their matches.
+
+    The expressions are timed one after the other in the match worker process
+    (see `race_job`), so a pattern that backtracks catastrophically just times
+    out. Every expression's matches are compared to those of the first one.
+    """
+
+    BINDINGS = [
+        Binding("escape", "dismiss_modal", show=False),
+        Binding("ctrl+r", "race", "Race Again"),
+        Binding("ctrl+d", "remove", "Remove Expression"),
+    ]
+
+    @dataclass
+    class Timed(Message):
+        """Posted (from a worker thread) when a scan has been timed."""
+
+        entry: Entry
+        seconds: float
+
+    def __init__(self, text: str, regex: str, *args, **kwargs) -> None:
+        """Initialize the modal.
+
+        Args:
+            text: Text to time the expressions against.
+            regex: First expression to race (the reference for matches).
+        """
+        self.text = text
+        self.entries = [Entry(regex)] if regex else []
+        super().__init__(*args, **kwargs)
+
+    def compose(self) -> ComposeResult:
+        """Compose the content of the modal dialog."""
+        with Vertical():
+            with Center():
+                yield Label("Pattern Race", id="title")
+            yield Label("", id="message")
+            yield Input(
+                placeholder="Candidate expression (press Enter to add)",
+                validators=ValidRegex(),
+                id="candidate",
+            )
+            yield DataTable(cursor_type="row", zebra_stripes=True)
+
+    def on_mount(self) -> None:
+        """Show the expressions and start the race."""
+        table = self.query_one(DataTable)
+        for column in COLUMNS:
+            table.add_column(column, key=column)
+        for index in range(len(self.entries)):
+            table.add_row(*self.format_entry(index))
+        self.query_one("#candidate", Input).focus()
+        self.action_race()
+
+    def format_entry(self, index: int) -> tuple[str, ...]:
+        """Format a row of the results table.
+
+        Args:
+            index: Index of the expression.
+
+        Returns:
+            Cell values, in `COLUMNS` order.
+        """
+        entry = self.entries[index]
+        times = sorted(entry.times)
+        timing = ("", "")
+        if times:
+            p95 = times[int(0.95 * (len(times) - 1))]
+            timing = (f"{median(times) * 1000:.2f}", f"{p95 * 1000:.2f}")
+        if entry.error is not None:
+            same = entry.error
+        elif entry.digest is None:
+            same = "…"
+        elif index == 0:
+            same = "reference"
+        elif self.entries[0].digest is None:
+            same = ""
+        else:
+            same = "yes" if entry.digest == self.entries[0].digest else "NO"
+        count = "" if entry.count is None else f"{entry.count:,}"
+        return (entry.regex, str(len(times)), *timing, count, same)
+
+    def show_entries(self) -> None:
+        """Refresh the results table (and the fastest expression)."""
+        table = self.query_one(DataTable)
+        for index in range(len(self.entries)):
+            for column, value in zip(COLUMNS, self.format_entry(index)):
+                table.update_cell_at(Coordinate(index, COLUMNS.index(column)), value)
+        finished = [entry for entry in self.entries if entry.digest is not None]
+        message = f"Timing {len(self.entries)} expressions against the text"
+        if finished and all(
+            entry.digest is not None or entry.error is not None
+            for entry in self.entries
+        ):
+            fastest = min(finished, key=lambda entry: median(entry.times))
+            message = f"Fastest: {fastest.regex}"
+        self.query_one("#message", Label).update(message)
+
+    @on(Input.Submitted, "#candidate")
+    def add_candidate(self, event: Input.Submitted) -> None:
+        """Add a candidate expression and race them all again."""
+        if not event.value or (
+            event.validation_result and not event.validation_result.is_valid
+        ):
+            return
+        self.entries.append(Entry(event.value))
+        self.query_one(DataTable).add_row(*self.format_entry(len(self.entries) - 1))
+        event.input.value = ""
+        self.action_race()
+
+    @on(Timed)
+    def show_time(self, message: Timed) -> None:
+        """Add the time of a scan to the results."""
+        message.entry.times.append(message.seconds)
+        self.show_entries()
+
+    def action_remove(self) -> None:
+        """Remove the selected expression from the race."""
+        table = self.query_one(DataTable)
+        if not self.entries:
+            return
+        index = table.cursor_row
+        del self.entries[index]
+        row_key, _ = table.coordinate_to_cell_key(Coordinate(index, 0))
+        table.remove_row(row_key)
+        self.show_entries()
+
+    def action_race(self) -> None:
+        """Time all expressions again."""
+        # new entries so times reported by a cancelled race don't count
+        self.entries = [Entry(entry.regex) for entry in self.entries]
+        self.show_entries()
+        self.race()
+
+    @work(exclusive=True, group="race")
+    async def race(self) -> None:
+        """Time each expression in turn in the match worker process."""
+        worker = self.app.match_worker  # type: ignore[attr-defined]
+        for entry in list(self.entries):
+            cancel = threading.Event()
+
+            def progress(seconds: float, entry: Entry = entry) -> None:
+                self.post_message(self.Timed(entry, seconds))
+
+            try:
+                entry.count, entry.digest = await asyncio.to_thread(
+                    worker.run,
+                    race_job,
+                    self.text,
+                    entry.regex,
+                    name="race",
+                    progress=progress,
+                    cancel=cancel,
+                )
+            except asyncio.CancelledError:
+                cancel.set()
+                raise
+            except MatchTimeout:
+                entry.error = "timed out"
+            except re.error:
+                entry.error = "invalid"
+            self.show_entries()
+
+    def action_dismiss_modal(self) -> None:
+        """Dismiss the modal."""
+        self.dismiss(None)
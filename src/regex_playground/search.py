@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+from collections.abc import Callable, Iterable
+from functools import partial
+from multiprocessing.pool import Pool
+from pathlib import Path
+
+from .batch import read_chunks, stream_matches
+from .patterns import FLAG_PATTERN, compile_pattern
+
+
+def collect_files(paths: Iterable[Path]) -> list[Path]:
+    """Expand directories into the (non-hidden) files below them.
+
+    Args:
+        paths: File and directory paths.
+
+    Returns:
+        File paths, directory contents sorted by path.
+    """
+    files: list[Path] = []
+    for path in paths:
+        if not path.is_dir():
+            files.append(path)
+            continue
+        files.extend(
+            sorted(
+                file
+                for file in path.rglob("*")
+                if file.is_file()
+                and not any(
+                    part.startswith(".") for part in file.relative_to(path).parts
+                )
+            )
+        )
+    return files
+
+
+def count_matches(path: Path, regex: str) -> int | None:
+    """Count the regular expression matches in a file.
+
+    The file is streamed (see `stream_matches`) so memory stays bounded.
+
+    Args:
+        path: File path.
+        regex: Regular expression string.
+
+    Returns:
+        Number of matches, or None if the file couldn't be read.
+    """
+    if not FLAG_PATTERN.sub("", regex):
+        return 0
+    pattern = compile_pattern(regex)
+    try:
+        with path.open(errors="replace") as stream:
+            pieces = stream_matches(pattern, read_chunks(stream))
+            return sum(not isinstance(piece, str) for piece in pieces)
+    except OSError:
+        return None
+
+
+class FileSearch:
+    """Count regular expression matches across many files in a process pool.
+
+    Files are searched in parallel, one process per core, and each count is
+    reported as soon as it's ready. Cancelling terminates the pool so a slow
+    pattern can't keep the processes busy after the results are unwanted.
+    """
+
+    def __init__(
+        self,
+        files: list[Path],
+        regex: str,
+        on_result: Callable[[int, int | None], object],
+        processes: int | None = None,
+    ) -> None:
+        """Initialize the search.
+
+        Args:
+            files: File paths to search.
+            regex: Regular expression string.
+            on_result: Called (from a pool thread) with the index of a file and
+                its match count (None if the file couldn't be read).
+            processes: Number of processes. Defaults to None (one per core).
+        """
+        self.files = files
+        self.regex = regex
+        self.on_result = on_result
+        self.processes = processes or os.cpu_count() or 1
+        self._pool: Pool | None = None
+
+    def start(self) -> None:
+        """Start searching."""
+        context = multiprocessing.get_context("spawn")
+        pool = context.Pool(min(self.processes, max(len(self.files), 1)))
+        for index, path in enumerate(self.files):
+            pool.apply_async(
+                count_matches,
+                (path, self.regex),
+                callback=partial(self.on_result, index),
+                error_callback=partial(self._report_error, index),
+            )
+        pool.close()
+        self._pool = pool
+
+    def _report_error(self, index: int, _: BaseException) -> None:
+        self.on_result(index, None)
+
+    def cancel(self) -> None:
+        """Stop searching (no more results are reported)."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
@@ -0,0 +1,192 @@
+import re
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+from typing import overload
+
+from .line_index import LineIndex
+
+
+class SpanStore(Sequence[tuple[int, int]]):
+    """Sorted, non-overlapping match spans stored column-wise in typed arrays.
+
+    A match takes 16 bytes (a start and an end offset) instead of a tuple and
+    two int objects, spans pickle as raw bytes when they're sent between
+    processes, and the garbage collector has nothing to track. Indexing returns
+    (start, end) tuples and slicing returns a new store.
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(
+        self, starts: Iterable[int] | None = None, ends: Iterable[int] | None = None
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            starts: Start offsets. Defaults to None.
+            ends: End offsets (one for each start). Defaults to None.
+        """
+        self.starts = array("q", starts or ())
+        self.ends = array("q", ends or ())
+
+    @classmethod
+    def from_matches(cls, matches: Iterable[re.Match[str]]) -> "SpanStore":
+        """Build a store from regular expression matches.
+
+        Args:
+            matches: Matches (in order).
+
+        Returns:
+            The match spans.
+        """
+        spans = cls()
+        append_start, append_end = spans.starts.append, spans.ends.append
+        for match in matches:
+            start, end = match.span()
+            append_start(start)
+            append_end(end)
+        return spans
+
+    @classmethod
+    def from_spans(cls, spans: Iterable[tuple[int, int]]) -> "SpanStore":
+        """Build a store from (start, end) tuples.
+
+        Args:
+            spans: Match spans (in order).
+
+        Returns:
+            The match spans.
+        """
+        store = cls()
+        append_start, append_end = store.starts.append, store.ends.append
+        for start, end in spans:
+            append_start(start)
+            append_end(end)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @overload
+    def __getitem__(self, index: int) -> tuple[int, int]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "SpanStore": ...
+
+    def __getitem__(self, index: int | slice) -> "tuple[int, int] | SpanStore":
+        if isinstance(index, slice):
+            spans = SpanStore()
+            spans.starts, spans.ends = self.starts[index], self.ends[index]
+            return spans
+        return self.starts[index], self.ends[index]
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return zip(self.starts, self.ends)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SpanStore):
+            return self.starts == other.starts and self.ends == other.ends
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SpanStore({list(self)!r})"
+
+    def bisect(self, offset: int) -> int:
+        """Find the first match starting at or after an offset.
+
+        Args:
+            offset: String offset.
+
+        Returns:
+            Index of the match, or the number of matches if there's none.
+        """
+        return bisect_left(self.starts, offset)
+
+    def find(self, start: int, end: int) -> int | None:
+        """Find a match by its span.
+
+        Args:
+            start: Start offset.
+            end: End offset.
+
+        Returns:
+            Index of the match, or None if there's no such match.
+        """
+        index = self.bisect(start)
+        # an empty match can start where the next one does
+        while index < len(self) and self.starts[index] == start:
+            if self.ends[index] == end:
+                return index
+            index += 1
+        return None
+
+    def append(self, start: int, end: int) -> None:
+        """Add a span after the last one.
+
+        Args:
+            start: Start offset.
+            end: End offset.
+        """
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def extend(self, spans: "SpanStore", shift: int = 0) -> None:
+        """Add spans after the last one.
+
+        Args:
+            spans: Spans to add.
+            shift: Amount to add to each offset. Defaults to 0.
+        """
+        if shift:
+            self.starts.extend(start + shift for start in spans.starts)
+            self.ends.extend(end + shift for end in spans.ends)
+        else:
+            self.starts.extend(spans.starts)
+            self.ends.extend(spans.ends)
+
+
+class LocationStore:
+    """Match (row, column) locations stored column-wise in typed arrays."""
+
+    __slots__ = ("start_rows", "start_columns", "end_rows", "end_columns")
+
+    def __init__(self) -> None:
+        self.start_rows = array("q")
+        self.start_columns = array("q")
+        self.end_rows = array("q")
+        self.end_columns = array("q")
+
+    @classmethod
+    def from_spans(
+        cls, spans: Iterable[tuple[int, int]], line_index: LineIndex
+    ) -> "LocationStore":
+        """Convert match spans into locations.
+
+        Args:
+            spans: Match (start, end) offsets.
+            line_index: Line index of the text the spans are in.
+
+        Returns:
+            The match locations.
+        """
+        locations = cls()
+        line_starts = line_index.line_starts
+        row = line_index.row
+        for start, end in spans:
+            start_row = row(start)
+            end_row = row(end)
+            locations.start_rows.append(start_row)
+            locations.start_columns.append(start - line_starts[start_row])
+            locations.end_rows.append(end_row)
+            locations.end_columns.append(end - line_starts[end_row])
+        return locations
+
+    def __len__(self) -> int:
+        return len(self.start_rows)
+
+    def __iter__(self) -> Iterator[tuple[int, int, int, int]]:
+        """Iterate (start row, start column, end row, end column) locations."""
+        return zip(self.start_rows, self.start_columns, self.end_rows, self.end_columns)
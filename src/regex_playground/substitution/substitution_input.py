@@ -5,6 +5,8 @@ from textual.binding import Binding
 from textual.validation import ValidationResult, Validator
 from textual.widgets import Input
 
+from ..patterns import compile_pattern
+
 
 class ValidSubstitutionRegex(Validator):
     """Custom regular expression substitution string validator."""
@@ -16,7 +18,7 @@ class ValidSubstitutionRegex(Validator):
     def validate(self, value: str) -> ValidationResult:
         """Check if `value` is a valid regular expression substitution."""
         try:
-            pattern = re.compile(self.app.regex)  # type: ignore[attr-defined]
+            pattern = compile_pattern(self.app.regex)  # type: ignore[attr-defined]
             pattern.sub(value, "")
             return self.success()
         except (re.error, IndexError) as e:
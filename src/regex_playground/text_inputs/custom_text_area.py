@@ -1,21 +1,83 @@
-import re
-from collections.abc import Iterator
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 
+from textual.geometry import Region
+from textual.message import Message
 from textual.reactive import reactive
+from textual.strip import Strip
 from textual.widgets import TextArea
+from textual.widgets.text_area import Edit, EditResult
 
-from ..renode import ReNode
+from ..incremental import TextEdit, combine_edits
+from ..line_index import LineIndex
+from ..spans import LocationStore, SpanStore
+from ..timings import Sample, timed
 from .theme import THEME
 
+Highlight = tuple[int, int | None, str]
+
+
+class LazyHighlights(defaultdict[int, list[Highlight]]):
+    """A row highlights mapping that computes missing rows on first access.
+
+    `TextArea` only looks up the rows it renders, so rows are filled in (a block
+    at a time) as they scroll into view instead of all at once.
+    """
+
+    def __init__(self, fill: Callable[[int], None]) -> None:
+        """Initialize the mapping.
+
+        Args:
+            fill: Called with a missing row to compute highlights around it.
+        """
+        super().__init__(list)
+        self.fill = fill
+        self.pending = False
+
+    def __bool__(self) -> bool:
+        return self.pending or super().__len__() > 0
+
+    def __missing__(self, row: int) -> list[Highlight]:
+        if self.pending:
+            self.fill(row)
+        if row not in self:
+            self[row] = []
+        return super().__getitem__(row)
+
+    def clear(self) -> None:
+        self.pending = False
+        super().clear()
+
 
 class RegexTextArea(TextArea):
     """A custom `TextArea` widget with regular expression/substitution highlighting."""
 
     HIGHLIGHT_NAME: str = ""
+    HIGHLIGHT_BLOCK: int = 50  # rows filled at once (about a screen)
 
     regex: reactive[str] = reactive("", init=False)
     global_match: reactive[bool] = reactive(True, init=False)
 
+    generation: int = 0
+    _line_index: LineIndex | None = None
+    _spans: SpanStore = SpanStore()
+    _highlights: LazyHighlights
+    _sent_text: str | None = None  # text last sent for matching
+    _text_edit: TextEdit | None = None  # edits made since `_sent_text`
+    _timing: Sample | None = None  # timings of an update waiting to be rendered
+
+    @dataclass
+    class TimedOut(Message):
+        """Posted when matching didn't finish within the time budget."""
+
+        timeout: float  # time budget in seconds
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._highlights = LazyHighlights(self.fill_highlights)
+
     def on_mount(self) -> None:
         """Actions to take when the widget is mounted within the app."""
         self.setup_theme()
@@ -40,104 +102,274 @@ class RegexTextArea(TextArea):
         cursor_row, _ = self.cursor_location
         self.refresh_lines(cursor_row)
 
+    @property
+    def line_index(self) -> LineIndex:
+        """Line start offsets for the current text (rebuilt only after changes)."""
+        if self._line_index is None:
+            self._line_index = LineIndex(self.text)
+        return self._line_index
+
+    @property
+    def spans(self) -> SpanStore:
+        """Sorted spans of the highlighted matches."""
+        return self._spans
+
+    def _build_highlight_map(self) -> None:
+        """Invalidate any cached text data since the document changed."""
+        self._line_index = None
+        self._spans = SpanStore()
+        self._sent_text = self._text_edit = None
+        super()._build_highlight_map()
+
+    def edit(self, edit: Edit) -> EditResult:
+        """Perform an edit, keeping track of the changed range of the text.
+
+        Args:
+            edit: The Edit to perform.
+
+        Returns:
+            Data relating to the edit.
+        """
+        sent_text, text_edit = self._sent_text, self._text_edit
+        if sent_text is None:
+            return super().edit(edit)
+        line_index = self.line_index
+        start = line_index.offset(edit.top)
+        result = super().edit(edit)
+
+        inserted = self.get_text_range(edit.top, result.end_location)
+        end = start + len(result.replaced_text)
+        line_index.apply_edit(start, end, inserted)
+        self._line_index = line_index
+        self._sent_text = sent_text
+        self._text_edit = combine_edits(text_edit, (start, end, start + len(inserted)))
+        return result
+
     def update(self) -> None:
+        """Schedule an update of matches and highlighting."""
+        self.app.scheduler.schedule(self)  # type: ignore[attr-defined]
+
+    def recompute(self) -> None:
         """Update matches and highlighting (define in subclass)."""
         pass
 
-    def apply_highlighting(self, nodes: list[ReNode], global_match: bool) -> None:
+    def start_timing(self, length: int = 0) -> Sample:
+        """Start timing an update of matches and highlighting.
+
+        Args:
+            length: Length of the text being matched. Defaults to 0.
+
+        Returns:
+            Timings of the update, add stages to it as they run.
+        """
+        return Sample(self.id or "", self.regex, length)
+
+    def finish_timing(self, sample: Sample) -> None:
+        """Record the timings of an update once the text area has been rendered.
+
+        Args:
+            sample: Timings of the update.
+        """
+        if self._timing is not None:
+            self.app.timings.add(self._timing)  # type: ignore[attr-defined]
+        self._timing = sample
+
+    def render_lines(self, crop: Region) -> list[Strip]:
+        """Render the text area, timing the first render after an update."""
+        sample = self._timing
+        if sample is None:
+            return super().render_lines(crop)
+        stages = sample.stages
+        nodes = stages.get("nodes", 0.0)
+        with timed(stages, "render"):
+            lines = super().render_lines(crop)
+        # highlights are filled in while rendering so don't count them twice
+        stages["render"] -= stages.get("nodes", 0.0) - nodes
+        self._timing = None
+        self.app.timings.add(sample)  # type: ignore[attr-defined]
+        return lines
+
+    def apply_highlighting(self, spans: SpanStore, global_match: bool) -> None:
         """Apply highlighting to regular expression matches inside of the TextArea.
 
+        Only the rows that are rendered get their highlights computed (see
+        `fill_highlights`), so this is cheap no matter how many matches there are.
+        The previous matches are diffed against the new ones on the visible rows
+        and only the rows whose matches changed are redrawn.
+
         Args:
-            nodes: Text area nodes to highlight.
+            spans: Sorted match (start, end) offsets within the text to highlight.
             global_match: Should all matches be highlighted.
         """
+        previous = self._spans
+        self._spans = spans if global_match else spans[:1]
+        visible = self.visible_rows()
+        top, bottom = visible.start, visible.stop
+        if self.spans_in_rows(previous, top, bottom) == self.spans_in_rows(
+            self._spans, top, bottom
+        ):
+            changed = []
+        else:
+            changed = [
+                row
+                for row in visible
+                if self.spans_in_rows(previous, row, row + 1)
+                != self.spans_in_rows(self._spans, row, row + 1)
+            ]
+
+        # rows out of view are computed again when they scroll into view
         highlights = self._highlights
+        kept = {row: highlights[row] for row in visible if row in highlights}
         highlights.clear()
+        highlights.pending = bool(self._spans)
+        highlights.update(kept)
+        if previous is not self._spans:
+            # lines rendered before they scrolled out of view may be cached
+            # (comparing the spans would take as long as there are matches)
+            self._line_cache.clear()
+        self.refresh_rows(changed)
+
+    def visible_rows(self) -> range:
+        """Get the rows (lines of the text) within the scroll window.
+
+        The rows are read from the wrapped document's table of display lines
+        (one per line when soft wrap is off). Converting offsets to locations
+        would measure the columns of the lines, which on a huge line takes
+        longer than the rest of a highlight update.
+        """
+        line_info = self.wrapped_document._offset_to_line_info
+        last = len(line_info) - 1
+        scroll_y = self.scroll_offset.y
+        top, _ = line_info[min(scroll_y, last)]
+        bottom, _ = line_info[min(scroll_y + self.size.height, last)]
+        return range(top, bottom + 1)
 
-        counter = 0
-        for node in nodes:
-            if not global_match and counter >= 1:
-                break
-            counter += 1
+    def refresh_rows(self, rows: Iterable[int]) -> None:
+        """Recompute the highlights of rows and redraw them.
 
-            node_start_row, node_start_column = node.start_point
-            node_end_row, node_end_column = node.end_point
+        Rendered lines are cached so clear `_line_cache` first if the rows were
+        rendered with other highlights.
 
-            if node_start_row == node_end_row:
-                highlight = (node_start_column, node_end_column, self.HIGHLIGHT_NAME)
-                highlights[node_start_row].append(highlight)
-            else:
-                # Add the first line of the node range
-                highlights[node_start_row].append(
-                    (node_start_column, None, self.HIGHLIGHT_NAME)
-                )
+        Args:
+            rows: Rows (lines of the text) to redraw.
+        """
+        highlights = self._highlights
+        wrapped_document = self.wrapped_document
+        # the display lines of each row (see `visible_rows`)
+        row_offsets = wrapped_document._line_index_to_offsets
+        for row in rows:
+            highlights.pop(row, None)
+            if row >= self.document.line_count:
+                continue
+            # a soft wrapped row takes up a line for each section
+            offsets = row_offsets[row]
+            self.refresh_lines(offsets[0], len(offsets))
+
+    def spans_in_rows(self, spans: SpanStore, top: int, bottom: int) -> SpanStore:
+        """Get the spans of matches on a range of rows.
+
+        Args:
+            spans: Sorted match (start, end) offsets within the text.
+            top: First row.
+            bottom: Row after the last one.
+
+        Returns:
+            Spans of the matches overlapping the rows.
+        """
+        matches = self.matches_in_rows(spans, top, bottom)
+        return spans[matches.start : matches.stop]
+
+    def matches_in_rows(self, spans: SpanStore, top: int, bottom: int) -> range:
+        """Get the indices of the matches on a range of rows.
+
+        Args:
+            spans: Sorted match (start, end) offsets within the text.
+            top: First row.
+            bottom: Row after the last one.
 
-                # Add the middle lines - entire row of this node is highlighted
-                for node_row in range(node_start_row + 1, node_end_row):
-                    highlights[node_row].append((0, None, self.HIGHLIGHT_NAME))
+        Returns:
+            Indices (into `spans`) of the matches overlapping the rows.
+        """
+        line_index = self.line_index
+        line_starts = line_index.line_starts
+        bottom = min(bottom, len(line_starts))
+        if top >= bottom:
+            return range(0)
+        start_offset = line_starts[top]
+        end_offset = (
+            line_starts[bottom] if bottom < len(line_starts) else line_index.length + 1
+        )
+        # matches are sorted and don't overlap so both starts and ends are ordered
+        first = bisect_right(spans.ends, start_offset)
+        last = bisect_left(spans.starts, end_offset, lo=first)
+        return range(first, last)
+
+    def fill_highlights(self, row: int) -> None:
+        """Compute highlights for the block of rows containing `row`.
+
+        Args:
+            row: Row that needs highlights.
+        """
+        top = row - row % self.HIGHLIGHT_BLOCK
+        bottom = min(top + self.HIGHLIGHT_BLOCK, len(self.line_index))
+        if top >= bottom:
+            return
+        stages = {} if self._timing is None else self._timing.stages
+        with timed(stages, "nodes"):
+            locations = self.matches_to_faux_nodes(
+                self.spans_in_rows(self._spans, top, bottom)
+            )
+
+        rows: dict[int, list[Highlight]] = {r: [] for r in range(top, bottom)}
+        self.add_highlights(rows, locations, self.HIGHLIGHT_NAME)
+        self._highlights.update(rows)
+
+    def add_highlights(
+        self, rows: dict[int, list[Highlight]], locations: LocationStore, name: str
+    ) -> None:
+        """Add highlights for match locations to a block of rows.
 
-                # Add the last line of the node range
-                highlights[node_end_row].append(
-                    (0, node_end_column, self.HIGHLIGHT_NAME)
+        Args:
+            rows: Highlights of each row of the block.
+            locations: Match locations (see `matches_to_faux_nodes`).
+            name: Name of the highlight style.
+        """
+        top, bottom = min(rows), max(rows) + 1
+        for location in locations:
+            node_start_row, node_start_column, node_end_row, node_end_column = location
+
+            if node_start_row == node_end_row:
+                if top <= node_start_row < bottom:
+                    highlight = (node_start_column, node_end_column, name)
+                    rows[node_start_row].append(highlight)
+                continue
+
+            for node_row in range(
+                max(node_start_row, top), min(node_end_row + 1, bottom)
+            ):
+                rows[node_row].append(
+                    (
+                        node_start_column if node_row == node_start_row else 0,
+                        node_end_column if node_row == node_end_row else None,
+                        name,
+                    )
                 )
 
-        self.refresh()
+    def cancel_matching(self) -> None:
+        """Cancel any matching jobs still running for this text area."""
+        self.workers.cancel_group(self, "matching")
 
     def reset_highlighting(self) -> None:
-        """Reset all highlighting."""
-        highlights = self._highlights
-        highlights.clear()
-        self.refresh()
+        """Reset all highlighting (redrawing only the rows that had matches)."""
+        self.apply_highlighting(SpanStore(), True)
 
-    def matches_to_faux_nodes(
-        self, matches: Iterator[re.Match[str]], sub_str: str | None = None
-    ) -> list[ReNode]:
-        """Convert regular expression matches to "faux" nodes for highlighting.
+    def matches_to_faux_nodes(self, spans: Iterable[tuple[int, int]]) -> LocationStore:
+        """Convert regular expression match spans to locations for highlighting.
 
         Args:
-            matches: Regular expression matches for this text area.
-            sub_str: Expression string to use for substitution.
+            spans: Match (start, end) offsets within the text of this text area.
 
         Returns:
-            List of faux-nodes.
+            Start and end (row, column) locations of the matches.
         """
-        nodes: list[ReNode] = []
-
-        offset = 0
-        len_diff = 0
-        for match in matches:
-            start, end = match.span()
-
-            if sub_str is not None:
-                new_text = match.expand(sub_str)
-                len_diff = len(new_text) - (end - start)
-                start += offset
-                end += offset + len_diff
-                offset += len_diff
-
-            start_col = start
-            end_col = end
-
-            start_row = self.text.count("\n", 0, start)
-            end_row = start_row + self.text.count("\n", start, end)
-
-            start_offset = self.text[0:start][::-1].find("\n")
-            end_offset = self.text[start:end][::-1].find("\n")
-
-            if start_offset >= 0:
-                start_col = start_offset
-
-            if start_row == end_row:
-                end_col = start_col + (end - start)
-            else:
-                if end_offset >= 0:
-                    end_col = end_offset
-                if end_col == 0:
-                    end_row -= 1
-
-            node = ReNode(
-                start_point=(start_row, start_col), end_point=(end_row, end_col)
-            )
-            nodes.append(node)
-
-        return nodes
+        return LocationStore.from_spans(spans, self.line_index)
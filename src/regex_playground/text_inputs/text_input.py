@@ -1,15 +1,36 @@
+import asyncio
+import math
 import re
+import threading
+from array import array
+from collections.abc import Callable, Generator
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, TypeVar
 
+from rich.text import Text
 from textual import on, work
 from textual.binding import Binding
+from textual.events import MouseMove
 from textual.message import Message
+from textual.timer import Timer
 from textual.widgets import TextArea
-from textual_fspicker import FileOpen
+from textual.widgets.text_area import Selection
 
-from ..expression.flags import FLAG_PATTERN
-from .custom_text_area import RegexTextArea
+from ..automaton import BACKTRACKING, engine_for
+from ..cache import CACHE_MIN_LENGTH, content_digest
+from ..follow import FOLLOW_INTERVAL, FileFollower, FileReplaced, count_lines
+from ..incremental import TextEdit
+from ..line_index import LineIndex
+from ..mapped import WINDOW_ROWS, MappedText, NonAsciiPattern
+from ..matcher import MatchTimeout, cost_job, groups_job, match_job, window_job
+from ..patterns import FLAG_PATTERN, compile_pattern
+from ..spans import SpanStore
+from ..timings import Sample, timed
+from .custom_text_area import Highlight, RegexTextArea
+from .theme import GROUP_COLORS, THEME
+
+T = TypeVar("T")
 
 
 class TextInput(RegexTextArea):
@@ -18,9 +39,26 @@ class TextInput(RegexTextArea):
     BINDINGS = [
         Binding("ctrl+l", "load_file", "Load File"),
         Binding("ctrl+r", "reset", "Reset Text"),
+        Binding("f5", "profile", "Profile"),
+        Binding("ctrl+pagedown", "next_window", "Next Lines", show=False),
+        Binding("ctrl+pageup", "previous_window", "Previous Lines", show=False),
     ]
 
     HIGHLIGHT_NAME = "match"
+    HEAT_LEVELS = 4  # number of heat styles, the hottest lines get the last one
+    GROUP_MATCHES = 2000  # most matches to find capture groups for at once
+    FOLLOW_SLACK: float = 0.1  # see `append_lines`
+
+    mapped: MappedText | None = None  # memory mapped file being displayed
+    following: FileFollower | None = None  # file whose new lines are appended
+    _retain: int = 0  # lines of the followed file kept
+    _follow_timer: Timer | None = None
+    _window: tuple[int, int] = (0, 0)  # byte range of the displayed rows
+    _scan: SpanStore | None = None  # spans found so far by the running scan
+    profiling: bool = False  # show the cost of matching each line as heat
+    _costs: "array[float] | None" = None  # seconds spent matching on each line
+    _max_cost: float = 0.0
+    _groups: dict[int, SpanStore]  # capture group spans of matches (by index)
 
     @dataclass
     class Clicked(Message):
@@ -39,10 +77,42 @@ class TextInput(RegexTextArea):
         """Posted when successful matches are found."""
 
         count: int
+        progress: float | None = None  # fraction scanned if still scanning
+        engine: str = BACKTRACKING  # engine that found the matches
+
+    @dataclass
+    class MatchSelected(Message):
+        """Posted when a match is selected (see `select_match`)."""
+
+        index: int  # index of the match in `spans`
+        count: int  # number of highlighted matches
+
+    @dataclass
+    class ScanProgress(Message, bubble=False):
+        """Posted (from a worker thread) as a running scan finds matches."""
+
+        scan: SpanStore  # spans found so far by the scan
+        count: int  # number of matches found so far
+        spans: SpanStore  # spans found since the last report
+        progress: float  # fraction of the text scanned
+
+    @dataclass
+    class CostProgress(Message, bubble=False):
+        """Posted (from a worker thread) as profiling times more lines."""
+
+        costs: "array[float]"  # costs found so far by the profiling run
+        row: int  # first line of the new costs
+        new: "array[float]"  # costs found since the last report
+        progress: float  # fraction of the text profiled
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._groups = {}
+        super().__init__(*args, **kwargs)
 
     @work(exclusive=True)
     async def action_load_file(self) -> None:
         """Load a text file into `TextInput`."""
+        from textual_fspicker import FileOpen
 
         def load_file(path: Path | None) -> None:
             """Load a file into the main text area.
@@ -62,17 +132,756 @@ class TextInput(RegexTextArea):
 
     def action_reset(self) -> None:
         """Clear the text area."""
+        if self.mapped is not None:
+            self.load_text("")
+            return
         self.clear()
 
+    def load_text(self, text: str) -> None:
+        """Load text into the TextArea, closing any memory mapped or followed file.
+
+        Args:
+            text: The text to load into the TextArea.
+        """
+        if self.following is not None:
+            self.stop_following()
+            self.line_number_start = 1
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+            self.read_only = False
+            self.line_number_start = 1
+        super().load_text(text)
+        self.load_line_index(text)
+
+    def load_line_index(self, text: str) -> None:
+        """Read the line index of a large text from the cache (or build and cache it).
+
+        Args:
+            text: The text loaded into the TextArea.
+        """
+        cache = self.app.cache  # type: ignore[attr-defined]
+        if cache is None or len(text) < CACHE_MIN_LENGTH:
+            return
+        digest = content_digest(text)
+        line_index = cache.get_line_index(digest)
+        if line_index is None:
+            line_index = LineIndex(text)
+            cache.put_line_index(digest, line_index)
+        self._line_index = line_index
+
+    def load_mapped(self, mapped: MappedText) -> None:
+        """Display a memory mapped file (read-only) a window of rows at a time.
+
+        Args:
+            mapped: Memory mapped file.
+        """
+        self.load_text("")
+        self.mapped = mapped
+        self.read_only = True
+        self.show_window(0)
+
+    def show_window(self, top: int) -> None:
+        """Decode and display the rows of the memory mapped file from `top` on.
+
+        Args:
+            top: First row to display.
+        """
+        if self.mapped is None:
+            return
+        top = max(0, min(top, self.mapped.line_count - 1))
+        start, end, text = self.mapped.window(top, top + WINDOW_ROWS)
+        self._window = (start, end)
+        self.line_number_start = top + 1
+        super().load_text(text)
+
+    def action_next_window(self) -> None:
+        """Display the next window of rows of the memory mapped file."""
+        if self.mapped is not None:
+            self.show_window(self.line_number_start - 1 + WINDOW_ROWS)
+
+    def action_previous_window(self) -> None:
+        """Display the previous window of rows of the memory mapped file."""
+        if self.mapped is not None:
+            self.show_window(self.line_number_start - 1 - WINDOW_ROWS)
+
+    def follow(self, path: Path, lines: int) -> None:
+        """Display the last lines of a file and append the lines written to it.
+
+        The file is checked for new lines every `FOLLOW_INTERVAL` seconds. They're
+        appended as an edit, so only the appended text is sent to the match
+        worker and matched (see `rematch`). Only the last `lines` lines are kept
+        (see `append_lines`), so memory stays bounded however long it runs.
+        The lines before the ones shown are counted in a thread and the line
+        numbers shifted once they are (see `number_followed_lines`).
+
+        Args:
+            path: File path.
+            lines: Number of lines to keep.
+
+        Raises:
+            OSError: If the file can't be read.
+        """
+        follower = FileFollower(path)
+        try:
+            start, text = follower.tail(lines)
+        except OSError:
+            follower.close()
+            raise
+        self.load_text(text)
+        self.following = follower
+        self._retain = lines
+        self.read_only = True
+        self.border_title = f"following {path.name}"
+        self._follow_timer = self.set_interval(FOLLOW_INTERVAL, self.read_followed)
+        self.scroll_end(animate=False)
+        if start:
+            self.number_followed_lines(follower, start)
+
+    @work(exclusive=True, group="follow")
+    async def number_followed_lines(self, follower: FileFollower, end: int) -> None:
+        """Count the lines of the followed file before the ones shown.
+
+        Args:
+            follower: Followed file.
+            end: Byte offset of the first line shown.
+        """
+        try:
+            skipped = await asyncio.to_thread(count_lines, follower.path, end)
+        except OSError:
+            return
+        if follower is self.following:
+            # lines dropped meanwhile were added already, so shift (not set)
+            self.line_number_start += skipped
+
+    def stop_following(self) -> None:
+        """Stop appending the lines written to the followed file (keeping the text)."""
+        if self._follow_timer is not None:
+            self._follow_timer.stop()
+            self._follow_timer = None
+        if self.following is not None:
+            self.following.close()
+            self.following = None
+        self.read_only = False
+        self.border_title = None
+
+    def read_followed(self) -> None:
+        """Append the lines written to the followed file since it was read last."""
+        follower = self.following
+        if follower is None:
+            return
+        try:
+            text = follower.read()
+        except FileReplaced:
+            self.notify(
+                f"{follower.path.name} was truncated or replaced, following the new"
+                " file.",
+                title="File Replaced",
+                severity="warning",
+            )
+            self.follow(follower.path, self._retain)
+            return
+        except OSError as e:
+            self.stop_following()
+            self.notify(f"{e}", title="Error Following File", severity="warning")
+            return
+        if text:
+            self.append_lines(text)
+
+    def append_lines(self, text: str) -> None:
+        """Append lines of the followed file, dropping the oldest ones.
+
+        Dropping lines at the start and appending others at the end before the
+        text is matched again makes one edit of the whole text (see
+        `combine_edits`), which is matched in full. So lines are only dropped
+        once there are `FOLLOW_SLACK` times more of them than are kept, and the
+        text is matched in full once every so many appended lines.
+
+        The highlighted matches are kept (shifted if lines were dropped) until
+        the text is matched again, so they don't flicker as lines come in.
+
+        Args:
+            text: Lines to append.
+        """
+        spans = self._spans
+        at_end = self.scroll_offset.y >= self.max_scroll_y
+        self.insert(text, self.document.end)
+        excess = self.document.line_count - 1 - self._retain
+        offset = 0
+        if excess > self._retain * self.FOLLOW_SLACK:
+            offset = self.line_index.line_starts[excess]
+            _, height = self.wrapped_document.location_to_offset((excess, 0))
+            self.delete((0, 0), (excess, 0))
+            self.line_number_start += excess
+            if not at_end:
+                self.scroll_to(y=self.scroll_offset.y - height, animate=False)
+        # the followed text can't be undone, don't keep what was dropped
+        self.history.clear()
+
+        if spans:
+            kept = SpanStore()
+            kept.extend(spans[spans.bisect(offset) :], -offset)
+            self.apply_highlighting(kept, True)
+        if at_end:
+            self.scroll_end(animate=False)
+
+    def _build_highlight_map(self) -> None:
+        """Drop the capture groups of the matches since the document changed."""
+        self._groups.clear()
+        super()._build_highlight_map()
+
     @on(TextArea.Changed)
-    def update(self) -> None:
+    def text_changed(self) -> None:
+        """Text updated."""
+        self.update()
+
+    @property
+    def engine(self) -> str:
+        """Name of the engine matching the current expression."""
+        if self.mapped is not None or not self.regex:
+            return BACKTRACKING  # memory mapped files are searched as bytes
+        return engine_for(self.regex)
+
+    def recompute(self) -> None:
         """Update matches and highlighting."""
+        self.cancel_profiling()
         if not self.regex or not re.sub(FLAG_PATTERN, "", self.regex):
+            self.cancel_matching()
+            self.reset_highlighting()
+            self.post_message(self.MatchesFound(0))
+            return
+        if self.mapped is not None:
+            start, end = self._window
+            count = 0 if self.global_match else 1
+            sample = self.start_timing(self.mapped.size)
+            self.find_window_matches(
+                self.mapped, self.regex, start, end, count, self.generation, sample
+            )
+            return
+        sample = self.start_timing()
+        with timed(sample.stages, "prepare"):
+            text = self.text
+        sample.length = len(text)
+        self.find_matches(
+            text, self.regex, self.generation, sample, self._sent_text, self._text_edit
+        )
+        self._sent_text, self._text_edit = text, None
+
+    async def run_scan(
+        self,
+        func: Callable[..., Generator[Any, Any, T]],
+        text: Any,
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """Run a matching job that highlights matches as they are found.
+
+        Progress reports from the job are posted as `ScanProgress` messages and
+        cancelling the calling worker stops the job at its next report.
+
+        Args:
+            func: Progressive job function (see `MatchWorker.run`).
+            text: Text (or memory mapped file) to run the job against.
+            args: Additional job arguments.
+            kwargs: Additional `MatchWorker.run` arguments.
+
+        Returns:
+            The job result.
+        """
+        worker = self.app.match_worker  # type: ignore[attr-defined]
+        scan = self._scan = SpanStore()
+        cancel = threading.Event()
+
+        def progress(report: tuple[int, SpanStore, float]) -> None:
+            self.post_message(self.ScanProgress(scan, *report))
+
+        try:
+            return await asyncio.to_thread(
+                worker.run,
+                func,
+                text,
+                *args,
+                progress=progress,
+                cancel=cancel,
+                **kwargs,
+            )
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+        finally:
+            if self._scan is scan:
+                self._scan = None
+
+    @on(ScanProgress)
+    def show_progress(self, message: ScanProgress) -> None:
+        """Highlight the matches found so far and update the match count."""
+        if message.scan is not self._scan:
+            return
+        spans = message.spans
+        if self.mapped is not None:
+            start, end = self._window
+            spans = self.mapped.char_spans(start, end, spans)
+        message.scan.extend(spans)
+        self.apply_highlighting(message.scan, self.global_match)
+        self.post_message(
+            self.MatchesFound(message.count, message.progress, self.engine)
+        )
+
+    @work(exclusive=True, group="matching")
+    async def find_matches(
+        self,
+        text: str,
+        regex: str,
+        generation: int,
+        sample: Sample,
+        base: str | None = None,
+        edit: TextEdit | None = None,
+    ) -> None:
+        """Find matches in a separate process and highlight them.
+
+        Args:
+            text: Text to search.
+            regex: Regular expression string.
+            generation: Update generation the job was started for.
+            sample: Timings of the update.
+            base: Text previously searched. Defaults to None.
+            edit: Edit taking `base` to `text`. Defaults to None.
+        """
+        try:
+            spans = await self.run_scan(
+                match_job,
+                text,
+                regex,
+                name="input",
+                base=base,
+                edit=edit,
+                stages=sample.stages,
+            )
+        except MatchTimeout as e:
+            if generation != self.generation:
+                return
+            self.reset_highlighting()
+            self.post_message(self.MatchesFound(0))
+            self.post_message(self.TimedOut(e.timeout))
+            if self.profiling:
+                self.profile_costs(text, regex, generation)
+            return
+        if generation != self.generation:
+            return
+        with timed(sample.stages, "highlight"):
+            self.apply_highlighting(spans, self.global_match)
+        self.finish_timing(sample)
+        self.post_message(self.MatchesFound(len(spans), engine=self.engine))
+        self.find_groups()
+        if self.profiling:
+            self.profile_costs(text, regex, generation)
+
+    @work(exclusive=True, group="matching")
+    async def find_window_matches(
+        self,
+        mapped: MappedText,
+        regex: str,
+        start: int,
+        end: int,
+        count: int,
+        generation: int,
+        sample: Sample,
+    ) -> None:
+        """Find matches in a memory mapped file and highlight the displayed ones.
+
+        The whole file is searched but only the spans within the displayed rows
+        are sent back.
+
+        Args:
+            mapped: Memory mapped file to search.
+            regex: Regular expression string.
+            start: Start byte offset of the displayed rows.
+            end: End byte offset of the displayed rows.
+            count: Maximum number of matches to find (0 for all).
+            generation: Update generation the job was started for.
+            sample: Timings of the update.
+        """
+        try:
+            total, spans = await self.run_scan(
+                window_job,
+                mapped,
+                regex,
+                start,
+                end,
+                count,
+                name="input",
+                stages=sample.stages,
+            )
+        except (MatchTimeout, re.error) as e:
+            if generation != self.generation:
+                return
             self.reset_highlighting()
             self.post_message(self.MatchesFound(0))
+            if isinstance(e, MatchTimeout):
+                self.post_message(self.TimedOut(e.timeout))
+            elif isinstance(e, NonAsciiPattern):
+                self.notify(
+                    f"{e}, the file is searched as bytes.",
+                    title="Non-ASCII Expression",
+                    severity="warning",
+                )
+            return
+        if generation != self.generation or mapped is not self.mapped:
+            return
+        with timed(sample.stages, "highlight"):
+            self.apply_highlighting(mapped.char_spans(start, end, spans), True)
+        self.finish_timing(sample)
+        self.post_message(self.MatchesFound(total))
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        """Find the capture groups of the matches scrolled into view."""
+        super().watch_scroll_y(old_value, new_value)
+        if round(old_value) != round(new_value):
+            self.find_groups()
+
+    def find_groups(self) -> None:
+        """Find the capture groups of the matches in view (see `groups_job`).
+
+        Groups are only found for the text that was last matched, once matching
+        has finished and until the text is edited.
+        """
+        text = self._sent_text
+        if (
+            text is None
+            or self._text_edit is not None
+            or self._scan is not None
+            or not self._spans
+        ):
+            return
+        try:
+            if not compile_pattern(self.regex).groups:
+                return
+        except re.error:
             return
-        pattern = re.compile(self.regex)
-        matches = pattern.finditer(self.text)
-        nodes = self.matches_to_faux_nodes(matches)
-        self.apply_highlighting(nodes, self.global_match)
-        self.post_message(self.MatchesFound(len(nodes)))
+        visible = self.visible_rows()
+        matches = self.matches_in_rows(self._spans, visible.start, visible.stop)
+        matches = matches[: self.GROUP_MATCHES]
+        if all(index in self._groups for index in matches):
+            return
+        self.find_group_spans(text, self.regex, matches, self._spans, self.generation)
+
+    @work(exclusive=True, group="groups")
+    async def find_group_spans(
+        self,
+        text: str,
+        regex: str,
+        matches: range,
+        spans: SpanStore,
+        generation: int,
+    ) -> None:
+        """Find the capture groups of matches in a separate process and draw them.
+
+        Args:
+            text: Text the matches were found in.
+            regex: Regular expression string.
+            matches: Indices of the matches.
+            spans: Match (start, end) offsets.
+            generation: Update generation the matches were found for.
+        """
+        worker = self.app.match_worker  # type: ignore[attr-defined]
+        try:
+            group_spans = await asyncio.to_thread(
+                worker.run,
+                groups_job,
+                text,
+                regex,
+                spans[matches.start : matches.stop],
+                name="input",
+            )
+        except MatchTimeout:
+            return
+        if generation != self.generation or spans is not self._spans:
+            return
+        count = len(group_spans) // len(matches)
+        for number, index in enumerate(matches):
+            self._groups[index] = group_spans[number * count : (number + 1) * count]
+        self._line_cache.clear()
+        self.refresh_rows(self.visible_rows())
+
+    def on_mouse_move(self, event: MouseMove) -> None:
+        """Show the span and capture groups of the match under the mouse."""
+        tooltip = None
+        row, column = self.get_target_document_location(event)
+        line_index = self.line_index
+        if row < len(line_index):
+            offset = line_index.offset((row, column))
+            spans = self._spans
+            index = spans.bisect(offset + 1) - 1
+            if index >= 0 and offset < spans.ends[index]:
+                tooltip = self.describe_match(index)
+        if tooltip != self.tooltip:
+            self.tooltip = tooltip
+
+    def describe_match(self, index: int) -> Text:
+        """Describe a match and its capture groups (name, number and span).
+
+        Args:
+            index: Index of the match in `spans`.
+
+        Returns:
+            The description.
+        """
+        start, end = self._spans[index]
+        description = Text(f"match {index + 1:,}  {start}-{end}")
+        groups = self._groups.get(index)
+        if groups is None:
+            return description
+        names = {
+            number: name
+            for name, number in compile_pattern(self.regex).groupindex.items()
+        }
+        text = self._sent_text or ""
+        for number, (group_start, group_end) in enumerate(groups, 1):
+            label = f"group {number}"
+            if number in names:
+                label += f" <{names[number]}>"
+            description.append("\n")
+            description.append(label, THEME.syntax_styles[self.get_group_style(number)])
+            if group_start < 0:
+                description.append("  unmatched")
+                continue
+            captured = text[group_start:group_end]
+            if len(captured) > 40:
+                captured = captured[:39] + "…"
+            description.append(f"  {group_start}-{group_end}  {captured!r}")
+        return description
+
+    def get_group_style(self, number: int) -> str:
+        """Get the name of the highlight style of a capture group.
+
+        Args:
+            number: Group number.
+
+        Returns:
+            Name of the style in the theme.
+        """
+        return f"group-{(number - 1) % len(GROUP_COLORS) + 1}"
+
+    def select_match(self, index: int) -> None:
+        """Select a highlighted match and scroll it into view.
+
+        Args:
+            index: Index of the match in `spans`.
+        """
+        spans = self.spans
+        start, end = spans[index]
+        line_index = self.line_index
+        # spans can be behind the text while it's matched again after an edit
+        start, end = min(start, line_index.length), min(end, line_index.length)
+        self.selection = Selection(line_index.location(start), line_index.location(end))
+        self.scroll_cursor_visible(center=True)
+        self.post_message(self.MatchSelected(index, len(spans)))
+
+    def selected_match(self) -> int | None:
+        """Get the index of the selected match, if the selection is a match."""
+        line_index = self.line_index
+        start, end = sorted(self.selection)
+        return self.spans.find(line_index.offset(start), line_index.offset(end))
+
+    def next_match(self) -> None:
+        """Select the match after the selected one, or after the cursor."""
+        if not self.spans:
+            return
+        index = self.selected_match()
+        if index is None:
+            index = self.spans.bisect(self.line_index.offset(self.cursor_location))
+        else:
+            index += 1
+        self.select_match(index % len(self.spans))
+
+    def previous_match(self) -> None:
+        """Select the match before the selected one, or before the cursor."""
+        if not self.spans:
+            return
+        index = self.selected_match()
+        if index is None:
+            index = self.spans.bisect(self.line_index.offset(self.cursor_location))
+        self.select_match((index - 1) % len(self.spans))
+
+    def action_profile(self) -> None:
+        """Turn the match cost heatmap on or off."""
+        if self.mapped is not None:
+            self.notify(
+                "Profiling isn't available for memory mapped files.",
+                title="Profiling",
+                severity="warning",
+            )
+            return
+        self.profiling = not self.profiling
+        if self.profiling:
+            self.update()
+        else:
+            self.cancel_profiling()
+
+    def cancel_profiling(self) -> None:
+        """Cancel a running profiling job and remove the heatmap."""
+        self.workers.cancel_group(self, "profiling")
+        if self._costs is not None:
+            self._costs = None
+            self.show_costs()
+
+    @work(exclusive=True, group="profiling")
+    async def profile_costs(self, text: str, regex: str, generation: int) -> None:
+        """Time match attempts on each line in a separate process (see `cost_job`).
+
+        Lines are colored by cost as they're timed. If an attempt runs past the
+        time budget, profiling stops and the line it was made on is the hottest.
+
+        Args:
+            text: Text to profile.
+            regex: Regular expression string.
+            generation: Update generation the job was started for.
+        """
+        worker = self.app.match_worker  # type: ignore[attr-defined]
+        costs = self._costs = array("d")
+        self._max_cost = 0.0
+        received: array[float] = array("d")  # costs reported, shown or not
+        cancel = threading.Event()
+
+        def progress(report: tuple[int, "array[float]", float]) -> None:
+            received.extend(report[1])
+            self.post_message(self.CostProgress(costs, *report))
+
+        try:
+            await asyncio.to_thread(
+                worker.run,
+                cost_job,
+                text,
+                regex,
+                name="input",
+                progress=progress,
+                cancel=cancel,
+            )
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+        except MatchTimeout as e:
+            if generation != self.generation or costs is not self._costs:
+                return
+            row = e.position if e.position >= 0 else len(received)
+            self.post_message(
+                self.CostProgress(costs, row, array("d", [math.inf]), 1.0)
+            )
+            self.notify(
+                f"Matching at line {row + 1} ran past the {e.timeout * 1000:.0f} ms"
+                " time budget.",
+                title="Profiling Stopped",
+                severity="warning",
+            )
+            return
+        if generation != self.generation or costs is not self._costs:
+            return
+        if received:
+            row = max(range(len(received)), key=received.__getitem__)
+            self.notify(
+                f"Line {row + 1} is the slowest ({received[row] * 1000:.2f} ms).",
+                title="Profiling Finished",
+            )
+
+    @on(CostProgress)
+    def show_cost_progress(self, message: CostProgress) -> None:
+        """Color the lines timed so far."""
+        costs = message.costs
+        if costs is not self._costs:
+            return
+        # lines timed after the last report but before a timeout count as cool
+        costs.extend([0.0] * (message.row - len(costs)))
+        costs.extend(message.new)
+        self.show_costs()
+
+    def show_costs(self) -> None:
+        """Refresh the heatmap (and the match highlighting on top of it)."""
+        costs = self._costs
+        self._max_cost = max(costs, default=0.0) if costs else 0.0
+        highlights = self._highlights
+        highlights.clear()
+        highlights.pending = bool(self._spans) or bool(costs)
+        self._line_cache.clear()
+        self.refresh()
+
+    def heat(self, row: int) -> int:
+        """Get the heat level of a line, from 0 (cool) to `HEAT_LEVELS`.
+
+        Each level covers half the cost of the next one, the level of the
+        slowest line is `HEAT_LEVELS`.
+
+        Args:
+            row: Line to get the heat of.
+
+        Returns:
+            Heat level.
+        """
+        costs = self._costs
+        if costs is None or row >= len(costs) or not costs[row]:
+            return 0
+        if math.isinf(self._max_cost):
+            return self.HEAT_LEVELS if math.isinf(costs[row]) else 0
+        ratio = costs[row] / self._max_cost
+        return max(0, self.HEAT_LEVELS + math.floor(math.log2(ratio)))
+
+    def apply_highlighting(self, spans: SpanStore, global_match: bool) -> None:
+        """Apply match highlighting, keeping the heatmap (see `show_costs`).
+
+        Capture groups are dropped, they're found again for the matches in view
+        once matching has finished (see `find_groups`).
+        """
+        had_groups = bool(self._groups)
+        self._groups.clear()
+        super().apply_highlighting(spans, global_match)
+        self._highlights.pending |= bool(self._costs)
+        if had_groups:
+            self._line_cache.clear()
+            self.refresh_rows(self.visible_rows())
+
+    def fill_highlights(self, row: int) -> None:
+        """Compute highlights for the block of rows containing `row`.
+
+        The heatmap is drawn under the match highlighting and capture groups
+        over it.
+
+        Args:
+            row: Row that needs highlights.
+        """
+        super().fill_highlights(row)
+        top = row - row % self.HIGHLIGHT_BLOCK
+        bottom = min(top + self.HIGHLIGHT_BLOCK, len(self.line_index))
+        highlights = self._highlights
+        if self._costs:
+            for block_row in range(top, bottom):
+                level = self.heat(block_row)
+                if level:
+                    highlight = (0, None, f"heat-{level}")
+                    highlights[block_row] = [highlight, *highlights[block_row]]
+        if self._groups and top < bottom:
+            self.fill_group_highlights(top, bottom)
+
+    def fill_group_highlights(self, top: int, bottom: int) -> None:
+        """Draw the capture groups found for the matches on a block of rows.
+
+        Args:
+            top: First row of the block.
+            bottom: Row after the last one.
+        """
+        groups: dict[int, SpanStore] = {}
+        for index in self.matches_in_rows(self._spans, top, bottom):
+            group_spans = self._groups.get(index)
+            if group_spans is None:
+                continue
+            for number, (start, end) in enumerate(group_spans, 1):
+                if start >= 0:
+                    groups.setdefault(number, SpanStore()).append(start, end)
+
+        rows: dict[int, list[Highlight]] = {r: [] for r in range(top, bottom)}
+        # later groups are drawn over earlier ones (nested groups come later)
+        for number, group_spans in sorted(groups.items()):
+            locations = self.matches_to_faux_nodes(group_spans)
+            self.add_highlights(rows, locations, self.get_group_style(number))
+        highlights = self._highlights
+        for block_row, group_highlights in rows.items():
+            if group_highlights:
+                highlights[block_row] = highlights[block_row] + group_highlights
@@ -1,3 +1,4 @@
+import asyncio
 import re
 from dataclasses import dataclass
 
@@ -6,10 +7,11 @@ from textual.binding import Binding
 from textual.events import Key
 from textual.message import Message
 from textual.reactive import reactive
-from textual_fspicker import FileSave
+from textual.widgets.text_area import Selection
 
-from ..expression.flags import FLAG_PATTERN
-from ..screens.overwrite import OverwriteModal
+from ..matcher import MatchTimeout, Patch, substitute_job
+from ..patterns import FLAG_PATTERN
+from ..timings import Sample, timed
 from .custom_text_area import RegexTextArea
 
 
@@ -23,10 +25,14 @@ class TextResult(RegexTextArea):
     ]
 
     HIGHLIGHT_NAME = "sub"
+    REWRAP_SHIFTS: int = 10  # see `patch_text`
 
     match_text: reactive[str] = reactive("", init=False)
     substitution: reactive[str] = reactive("", init=False)
 
+    _showing_match_text = False  # is the match text loaded (not a substitution)
+    _result_token: int | None = None  # identifies the substitution shown
+
     @dataclass
     class ResetInputWithResult(Message):
         """Posted when the user request to reset the input text to the result text."""
@@ -41,39 +47,182 @@ class TextResult(RegexTextArea):
     def load_text(self, text: str, update_match_text: bool = False) -> None:
         """Load text into the TextArea and set the match text.
 
+        If the match text is shown and the new one only adds text at its end
+        (e.g. lines of a followed file), the added text is appended instead of
+        reloading the whole document.
+
         Args:
             text: The text to load into the TextArea.
             update_match_text: Should the match text be updated?
         """
+        previous = self.match_text
+        appended = (
+            update_match_text
+            and self._showing_match_text
+            and self.document.newline == "\n"
+            and len(text) > len(previous)
+            and text.startswith(previous)
+        )
         if update_match_text:
             self.match_text = text
-        super().load_text(text)
+        if appended:
+            self.insert(text[len(previous) :], self.document.end)
+            self.history.clear()
+        else:
+            super().load_text(text)
+        self._showing_match_text = update_match_text
+        self._result_token = None
+
+    def patch_text(self, patches: list[Patch]) -> None:
+        """Replace ranges of the text, reusing the rest of the document.
+
+        Each range is replaced and rewrapped on its own (bottom up, so the
+        offsets of the ones above stay valid). Rewrapping a range that changes
+        the number of display lines shifts every line below it, so once the
+        shifted lines add up to `REWRAP_SHIFTS` times the lines of the text,
+        the rest is rewrapped all at once instead.
+
+        Args:
+            patches: Replaced (start, end) ranges of the text and their
+                replacements, in order.
+        """
+        if self.document.newline != "\n":
+            # offsets count a "\r\n" as two characters but locations don't
+            text = self.text
+            pieces: list[str] = []
+            last = 0
+            for start, end, replacement in patches:
+                pieces += (text[last:start], replacement)
+                last = end
+            pieces.append(text[last:])
+            self.load_text("".join(pieces))
+            return
+
+        document = self.document
+        wrapped_document = self.wrapped_document
+        line_index = self.line_index
+        visible = self.visible_rows()
+        rows: set[int] = set()
+        shifted = 0
+
+        def height(top: int, bottom: int) -> int:
+            """Count the display lines of a range of rows."""
+            get_offsets = wrapped_document.get_offsets
+            return sum(len(get_offsets(row)) + 1 for row in range(top, bottom + 1))
+
+        for start, end, replacement in reversed(patches):
+            top, bottom = line_index.location(start), line_index.location(end)
+            if shifted > self.REWRAP_SHIFTS * document.line_count:
+                document.replace_range(top, bottom, replacement)
+                continue
+            old_height = height(top[0], bottom[0])
+            result = document.replace_range(top, bottom, replacement)
+            wrapped_document.wrap_range(top, bottom, result.end_location)
+            if height(top[0], result.end_location[0]) != old_height:
+                shifted += document.line_count - top[0]
+            rows.update(
+                range(max(top[0], visible.start), min(bottom[0], visible.stop) + 1)
+            )
+        if shifted > self.REWRAP_SHIFTS * document.line_count:
+            wrapped_document.wrap(self.wrap_width, self.indent_width)
+
+        self._build_highlight_map()
+        line_index.apply_edits(patches)
+        self._line_index = line_index
+        self._showing_match_text = False
+        anchor, cursor = self.selection
+        selection = Selection(
+            self.clamp_visitable(anchor), self.clamp_visitable(cursor)
+        )
+        if selection != self.selection:
+            self.selection = selection
+        self._refresh_size()
+        if shifted:
+            self.refresh()
+        else:
+            self.refresh_rows(rows)
 
     def watch_match_text(self) -> None:
         """Match text updated."""
+        self._showing_match_text = False
         self.update()
 
     def watch_substitution(self, _: str, new_value: str) -> None:
         """Regular expression substitution string updated."""
         self.update()
 
-    def update(self) -> None:
+    def recompute(self) -> None:
         """Apply substitutions and update highlighting."""
         if (
             not self.regex
             or not self.substitution
             or not re.sub(FLAG_PATTERN, "", self.regex)
         ):
-            self.load_text(self.match_text, True)
+            self.cancel_matching()
+            if not self._showing_match_text:
+                # reloading a large document blocks the UI so only do it if needed
+                self.load_text(self.match_text, True)
             return
-        pattern = re.compile(self.regex)
-        new_text = pattern.sub(
-            self.substitution, self.match_text, count=0 if self.global_match else 1
+        self.substitute_matches(
+            self.match_text,
+            self.regex,
+            self.substitution,
+            self.global_match,
+            self.generation,
+            self.start_timing(len(self.match_text)),
         )
-        self.load_text(new_text)
-        matches = pattern.finditer(self.match_text)
-        nodes = self.matches_to_faux_nodes(matches, self.substitution)
-        self.apply_highlighting(nodes, self.global_match)
+
+    @work(exclusive=True, group="matching")
+    async def substitute_matches(
+        self,
+        text: str,
+        regex: str,
+        substitution: str,
+        global_match: bool,
+        generation: int,
+        sample: Sample,
+    ) -> None:
+        """Apply substitutions in a separate process and highlight them.
+
+        Args:
+            text: Text to substitute.
+            regex: Regular expression string.
+            substitution: Substitution expression string.
+            global_match: Should all matches be substituted.
+            generation: Update generation the job was started for.
+            sample: Timings of the update.
+        """
+        worker = self.app.match_worker  # type: ignore[attr-defined]
+        count = 0 if global_match else 1
+        try:
+            token, result, spans = await asyncio.to_thread(
+                worker.run,
+                substitute_job,
+                text,
+                regex,
+                substitution,
+                count,
+                self._result_token,
+                name="result",
+                stages=sample.stages,
+            )
+        except MatchTimeout as e:
+            if generation != self.generation:
+                return
+            self.load_text(text)
+            self.post_message(self.TimedOut(e.timeout))
+            return
+        if generation != self.generation:
+            return
+        with timed(sample.stages, "load"):
+            if isinstance(result, str):
+                self.load_text(result)
+            else:
+                self.patch_text(result)
+        self._result_token = token
+        with timed(sample.stages, "highlight"):
+            self.apply_highlighting(spans, global_match)
+        self.finish_timing(sample)
 
     def action_load_as_input(self) -> None:
         """Set the input text to the current result text."""
@@ -102,6 +251,10 @@ class TextResult(RegexTextArea):
             )
             return
 
+        from textual_fspicker import FileSave
+
+        from ..screens.overwrite import OverwriteModal
+
         path = await self.app.push_screen(
             FileSave(".", title="Save Text As"),
             wait_for_dismiss=True,
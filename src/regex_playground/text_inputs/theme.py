@@ -1,6 +1,9 @@
 from rich.style import Style
 from textual.widgets.text_area import TextAreaTheme
 
+# capture group colors, groups past the last one start over at the first
+GROUP_COLORS = ("#66d9ef", "#ae81ff", "#f92672", "#e6db74", "#fd971f")
+
 THEME = TextAreaTheme(
     name="regex_playground",
     base_style=Style(color="#f8f8f2", bgcolor="#272822"),
@@ -13,5 +16,15 @@ THEME = TextAreaTheme(
     syntax_styles={
         "match": Style(bgcolor="#4ebf71", bold=True),  # $success color
         "sub": Style(bgcolor="#fea62b", bold=True),  # $warning color
+        # match cost heatmap, from cool to hot
+        "heat-1": Style(bgcolor="#3b3a2a"),
+        "heat-2": Style(bgcolor="#5a4322"),
+        "heat-3": Style(bgcolor="#86401f"),
+        "heat-4": Style(bgcolor="#b8291f"),
+        # capture groups, drawn over the match
+        **{
+            f"group-{number}": Style(color="#272822", bgcolor=color, bold=True)
+            for number, color in enumerate(GROUP_COLORS, 1)
+        },
     },
 )
@@ -0,0 +1,110 @@
+import json
+import platform
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from importlib.metadata import version
+from statistics import fmean
+
+TIMINGS_SIZE = 200  # updates kept for the timings overlay and export
+
+# stages of an update in the order they happen
+STAGES = (
+    "prepare",  # collecting the text to search
+    "hash",  # hashing a large text to look it up in the cache (in the worker)
+    "cache",  # reading and writing cached results (in the worker process)
+    "compile",  # compiling the expression (in the worker process)
+    "match",  # finding matches or substituting (in the worker process)
+    "transfer",  # sending text and results to and from the worker process
+    "load",  # loading substituted text into the text area
+    "highlight",  # applying highlighting
+    "nodes",  # converting spans to highlighted rows (while rendering)
+    "render",  # the rest of rendering the text area
+)
+
+
+@contextmanager
+def timed(stages: dict[str, float], name: str) -> Iterator[None]:
+    """Add the time spent in a block to a stage.
+
+    Args:
+        stages: Seconds spent by stage name.
+        name: Stage name.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+
+@dataclass
+class Sample:
+    """Stage timings of one update of a text area."""
+
+    widget: str  # id of the text area
+    regex: str
+    length: int = 0  # length of the text
+    time: float = field(default_factory=time.time)  # when the update started
+    stages: dict[str, float] = field(default_factory=dict)  # seconds by stage
+
+
+class Timings:
+    """A ring buffer of the stage timings of recent updates."""
+
+    def __init__(self, maxlen: int = TIMINGS_SIZE) -> None:
+        """Initialize the buffer.
+
+        Args:
+            maxlen: Maximum number of samples to keep. Defaults to 200.
+        """
+        self.samples: deque[Sample] = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def add(self, sample: Sample) -> None:
+        """Add a sample, dropping the oldest one if the buffer is full.
+
+        Args:
+            sample: Timings of an update.
+        """
+        self.samples.append(sample)
+
+    def summary(self) -> dict[str, dict[str, tuple[float, float, float]]]:
+        """Summarize the samples by text area and stage.
+
+        Returns:
+            The last, mean and 95th percentile seconds of each stage, by text
+            area id and stage name (in `STAGES` order).
+        """
+        by_widget: dict[str, dict[str, list[float]]] = {}
+        for sample in self.samples:
+            stages = by_widget.setdefault(sample.widget, {})
+            for stage, seconds in sample.stages.items():
+                stages.setdefault(stage, []).append(seconds)
+
+        summary: dict[str, dict[str, tuple[float, float, float]]] = {}
+        for widget, stages in by_widget.items():
+            summary[widget] = {}
+            for stage in sorted(stages, key=STAGES.index):
+                values = stages[stage]
+                p95 = sorted(values)[int(0.95 * (len(values) - 1))]
+                summary[widget][stage] = (values[-1], fmean(values), p95)
+        return summary
+
+    def to_json(self) -> str:
+        """Dump the samples (and the environment they were taken in) as JSON.
+
+        Returns:
+            JSON document.
+        """
+        data = {
+            "version": version("regex_playground"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "samples": [asdict(sample) for sample in self.samples],
+        }
+        return json.dumps(data, indent=2)
@@ -0,0 +1,48 @@
+from rich.table import Table
+from textual.widgets import Static
+
+from .timings import Timings
+
+REFRESH_INTERVAL = 0.5  # seconds
+
+
+class TimingsOverlay(Static):
+    """An overlay showing how long each stage of recent updates took."""
+
+    def __init__(self, timings: Timings, *args, **kwargs) -> None:
+        """Initialize the overlay.
+
+        Args:
+            timings: Timings to show.
+        """
+        self.timings = timings
+        super().__init__(*args, **kwargs)
+
+    def on_mount(self) -> None:
+        """Refresh the timings while the overlay is shown."""
+        self.set_interval(REFRESH_INTERVAL, self.show_timings)
+
+    def show_timings(self) -> None:
+        """Show the last, mean and 95th percentile time of each stage."""
+        if not self.display:
+            return
+        table = Table(
+            "stage",
+            "last",
+            "mean",
+            "p95",
+            title=f"Timings (ms, last {len(self.timings)} updates)",
+            box=None,
+        )
+        for column in table.columns[1:]:
+            column.justify = "right"
+        for widget, stages in self.timings.summary().items():
+            table.add_row(f"[b]{widget}")
+            for stage, (last, mean, p95) in stages.items():
+                table.add_row(
+                    f"  {stage}",
+                    f"{last * 1000:.1f}",
+                    f"{mean * 1000:.1f}",
+                    f"{p95 * 1000:.1f}",
+                )
+        self.update(table)